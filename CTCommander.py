@@ -1,8 +1,16 @@
 import sys
-from PyQt6.QtWidgets import QApplication
-from Classes.CTCommanderManager import CTCommanderManager
+from Classes.CommandLine import COMMANDS
+
 
 def main():
+    # Headless commands never import PyQt6 (see Classes/CommandLine.py)
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        from Classes.CommandLine import run
+        sys.exit(run(sys.argv[1:]))
+
+    from PyQt6.QtWidgets import QApplication
+    from Classes.CTCommanderManager import CTCommanderManager
+
     app = QApplication(sys.argv)
     
     ct_commander_manager = CTCommanderManager()
@@ -14,4 +22,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-      
\ No newline at end of file
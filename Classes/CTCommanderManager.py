@@ -1,17 +1,34 @@
 import os
 import re
+import time
+from PyQt6.QtCore import QTimer
 from Classes.UI.MainWindow import MainWindow
+from Classes.UI.sections.consoleSection import INFO, WARNING, ERROR
 from Classes.IO.JsonHandler import JsonHandler
 from Classes.GObjectCreator import GObjectCreator
-from Classes.GMaterialDB import GMaterialDB
-from Classes.IO.project_io import ProjectSerializer, ProjectDeserializer
+from Classes.MaterialRegistry import MaterialRegistry
+from Classes.IO.project_io import ProjectSerializer, ProjectDeserializer, ProjectSnapshot, material_db_paths, read_project_stream
+from Classes.IO.json_stream import JsonStream
+from Classes.IO.project_archive import ProjectArchive, is_project_archive, save_project_document
+from Classes.IO.edit_journal import EditJournal, fold_records
+from Classes.IO.macro_io import MacroExporter
 
 class CTCommanderManager:
+    AUTOSAVE_INTERVAL_MS = 30_000
+    IMPORT_PROGRESS_S = 0.1     # hierarchy / progress updates while a project streams in
+
     def __init__(self):
         self.node_tree = None
-        self.material_db_list = []
+        self.materials = MaterialRegistry()
         
         self.json_handler = JsonHandler()
+
+        # edits since the project file was last written; folded into it by autosave()
+        self.journal = EditJournal()
+        self.autosave_timer = QTimer()
+        self.autosave_timer.setInterval(self.AUTOSAVE_INTERVAL_MS)
+        self.autosave_timer.timeout.connect(self.autosave)
+        self.autosave_timer.start()
         
         if self.node_tree is None:
             self.node_tree = GObjectCreator.create_gate_root()
@@ -26,7 +43,8 @@ class CTCommanderManager:
     
         
     def get_material_db(self):
-        return self.material_db_list
+        """Material names of every loaded database (merged namespace)."""
+        return self.materials.names
         
     def get_geant4_version(self):
         """Detects the Geant4 version from the parent directory of CTCommander.py."""
@@ -68,7 +86,7 @@ class CTCommanderManager:
     
     def import_json(self, file_path):
         """
-        Import a value snapshot and apply it:
+        Import a value snapshot (JSON or .ctproj archive) and apply it:
         - import material DB if present
         - ensure static nodes exist
         - create missing distribution children when needed
@@ -76,224 +94,207 @@ class CTCommanderManager:
         """
         if not file_path:
             return
+        previous = self.node_tree
+        materials = self.materials.state()
         try:
-            data = self.json_handler.load(file_path)
+            if is_project_archive(file_path):
+                # sections are decoded and applied when first opened
+                data = ProjectArchive(file_path)
+                if "root" not in data.head:
+                    data = data.document()
+                self.apply_project_snapshot(data)  # uses ProjectSnapshot.apply_node recursively
+                head = data.head if isinstance(data, ProjectArchive) else data
+            else:
+                head = self.stream_project_snapshot(file_path)
         except Exception as e:
-            self.ct_commander_window.write_to_console(f"Import failed: {e}")
+            # a file that breaks off half way leaves the project and its material databases as they were
+            if self.materials.state() != materials:
+                self.materials.restore(materials)
+                self.ct_commander_window.set_material_db_available(len(self.materials) > 0)
+                if previous is not None:
+                    GObjectCreator.set_material_options(previous, self.get_material_db())
+            self.node_tree = previous
+            self.ct_commander_window.populate_hierarchy_tree(previous)
+            self.ct_commander_window.write_to_console(f"Import failed: {e}", ERROR)
             return
 
         try:
-            self.apply_project_snapshot(data)  # uses _apply_object_snapshot recursively
-            self.ct_commander_window.populate_hierarchy_tree(self.node_tree)
+            self.journal.attach(file_path, saved_seq=head.get("journal_seq", 0))
+            if self.journal.pending:
+                # edits made after the last autosave of this file (the app did not close normally)
+                applied, skipped = self.journal.replay(self.node_tree, self.get_material_db())
+                self.ct_commander_window.write_to_console(
+                    f"Recovered {applied} unsaved edits from {self.journal.path}"
+                    + (f" ({skipped} no longer apply)" if skipped else ""), WARNING)
+                # replayed records can add, remove or rename objects the hierarchy already shows
+                self.ct_commander_window.populate_hierarchy_tree(self.node_tree)
+            self.ct_commander_window.reset_history()      # the steps refer to objects of the old tree
             self.ct_commander_window.write_to_console(f"Imported project from: {file_path}")
         except Exception as e:
-            self.ct_commander_window.write_to_console(f"Apply failed: {e}")
+            self.ct_commander_window.write_to_console(f"Apply failed: {e}", ERROR)
 
     def export_json(self, file_path):
         """
-        Save a value snapshot of the current project:
-        - material_db_path (if any)
+        Save a value snapshot of the current project (a .ctproj name writes an archive):
+        - material database paths (if any)
         - root tree with values/units/children
         """
         if not file_path:
             return
         try:
-            data = self.build_project_snapshot()  # uses _build_snapshot recursively
-            self.json_handler.save(file_path, data)  # your JsonHandler.save
+            data = self.build_project_snapshot()  # uses ProjectSnapshot.build_node recursively
+            self.journal.wait()                   # an autosave may be writing the same file
+            save_project_document(file_path, data)
+            # the file holds every edit: drop the journal, and journal this file from now on
+            self.journal.discard()
+            self.journal.attach(file_path)
+            self.journal.discard()
             self.ct_commander_window.write_to_console(f"Exported project to: {file_path}")
         except Exception as e:
-            self.ct_commander_window.write_to_console(f"Export failed: {e}")
+            self.ct_commander_window.write_to_console(f"Export failed: {e}", ERROR)
+
+    def autosave(self, wait=False):
+        """
+        Fold the journaled edits into the project file, in the background
+        (wait=True blocks until it is on disk). The open tree is not read: the
+        records are replayed onto the file as last written (fold_records).
+        Sections of a .ctproj that are not opened yet keep reading the archive
+        as it was loaded, not the rewritten file.
+        """
+        error = self.journal.check()
+        if error is not None:
+            self.ct_commander_window.write_to_console(f"Autosave failed: {error}", ERROR)
+        # taken now: the material list is replaced, never changed in place
+        material_db, paths, version = self.get_material_db(), list(self.materials.paths), self.gate_version
+
+        def fold(project_path, journal_path):
+            return fold_records(project_path, journal_path, material_db, paths, version)
+
+        path = self.journal.project_path
+        if self.journal.compact(fold, lambda data: save_project_document(path, data)) is None:
+            return
+        if wait:
+            error = self.journal.wait()
+            if error is not None:
+                self.ct_commander_window.write_to_console(f"Autosave failed: {error}", ERROR)
+
+    def export_macro(self, file_path):
+        """Render the current node tree to a GATE macro file."""
+        if not file_path:
+            return
+        try:
+            exporter = MacroExporter(material_db_path=self.materials.paths)
+            count = exporter.write(self.node_tree, file_path)
+            self.ct_commander_window.write_to_console(f"Exported {count} macro lines to: {file_path}")
+        except Exception as e:
+            self.ct_commander_window.write_to_console(f"Macro export failed: {e}", ERROR)
         
         
 
     def import_material_db(self, file_path):
-        """Handles Material Database import and updates UI."""
+        """Handles Material Database import (added to the loaded ones) and updates UI."""
+        self.import_material_dbs([file_path])
 
-        self.material_db = GMaterialDB(file_path)
-        if not hasattr(self.material_db, "file_path"):
-            self.material_db.file_path = file_path
-        self.ct_commander_window.write_to_console(self.material_db.read_material_db())
-        self.material_db_list = self.material_db.get_material_DB()
-        
-        self.ct_commander_window.set_material_db_available(True)
+    def import_material_dbs(self, paths, replace=False):
+        """
+        Load several Material Databases at once (thread pool) into the registry;
+        setMaterial dropdowns offer the merged names, the first database wins.
+        """
+        if replace:
+            self.materials.clear()
+        for path, db in zip(paths, self.materials.load(paths)):
+            level = INFO if db.store is not None else ERROR
+            self.ct_commander_window.write_to_console(f"{os.path.basename(path)}: {db.status}", level)
+        report = self.materials.duplicate_report()
+        if report:
+            self.ct_commander_window.write_to_console(report, WARNING)
+
+        self.ct_commander_window.set_material_db_available(len(self.materials) > 0)
 
-        self.material_db.print_materialDB()
-        print(self.material_db_list)        
-        
 
         if self.node_tree and self.node_tree.get_nb_daughters() > 0:
+            GObjectCreator.set_material_options(self.node_tree, self.get_material_db())
+            self.ct_commander_window.refresh_inspector()
             self.ct_commander_window.write_to_console("Material database loaded. Existing node tree preserved.")
         else:
-            self.node_tree = GObjectCreator.create_static_objects(self.node_tree, self.material_db_list, gate_version=self.gate_version, sd_names=[])
+            self.node_tree = GObjectCreator.create_static_objects(self.node_tree, self.get_material_db(), gate_version=self.gate_version, sd_names=[])
             self.ct_commander_window.populate_hierarchy_tree(self.node_tree)
             
             
-    def _param_to_value_snapshot(self, p) -> dict:
-        # Store just what's needed to recreate UI state
-        snap = {
-            "label": getattr(p, "displayed_name", None) or getattr(p, "name", None),
-            "values": list(p.default_value_list or []),
-        }
-        du = getattr(p, "default_unit", None)
-        if du is not None:
-            snap["unit"] = du
-        return snap
-
-    def _object_meta(self, obj) -> dict:
-        """Small hints that help re-create missing children (no paths)."""
-        meta = {}
-        # commonly used on your objects
-        if getattr(obj, "role", None):
-            meta["role"] = obj.role
-        if getattr(obj, "system_type", None):
-            meta["system_type"] = obj.system_type
-        if getattr(obj, "system_level", None):
-            meta["system_level"] = obj.system_level
-        # sources / distributions
-        if getattr(obj, "source_type", None):
-            meta["source_type"] = obj.source_type
-        if getattr(obj, "subtype", None):
-            meta["distribution_type"] = obj.subtype  # you stored type in create_distribution_child
-        # for world daughters you can add "shape" if you attach it on creation
-        if getattr(obj, "parent", None) and obj.parent.get_name() == "world":
-            if getattr(obj, "subtype", None):
-                meta["shape"] = obj.subtype
-        return meta
-
-    def _build_snapshot(self, obj) -> dict:
-        return {
-            "name": obj.get_name(),
-            "node_type": obj.get_type(),
-            "meta": self._object_meta(obj),
-            "parameters": [self._param_to_value_snapshot(p) for p in getattr(obj, "parameters", [])],
-            "children": [self._build_snapshot(c) for c in getattr(obj, "daughters", [])]
-        }
-
     def build_project_snapshot(self) -> dict:
-        # include material DB path if present so we can auto-import on restore
-        material_db_path = getattr(getattr(self, "material_db", None), "file_path", None)
-        return {
-            "schema": "2.0",
-            "material_db_path": material_db_path,
-            "root": self._build_snapshot(self.node_tree) if self.node_tree else None
-        }
-        
-    
-    def _find_child_by_name(self, parent_obj, name):
-        for c in getattr(parent_obj, "daughters", []):
-            if c.get_name() == name:
-                return c
-        return None
-
-    def _apply_param_values(self, obj, param_snapshots: list):
-        # Match by label (displayed_name). This avoids persisting path strings.
-        label_to_param = {}
-        for p in getattr(obj, "parameters", []):
-            key = getattr(p, "displayed_name", None) or getattr(p, "name", None)
-            if key:
-                label_to_param.setdefault(key, []).append(p)  # allow duplicates if any
-
-        for ps in (param_snapshots or []):
-            label = ps.get("label")
-            if not label:
-                continue
-            candidates = label_to_param.get(label, [])
-            if not candidates:
-                continue
-            # apply to all candidates sharing the label
-            for p in candidates:
-                p.default_value_list = list(ps.get("values", []))
-                if "unit" in ps:
-                    p.default_unit = ps["unit"]
-
-    def _maybe_create_child_from_meta(self, parent_obj, child_snap: dict):
+        # include material DB paths if present so we can auto-import on restore
+        return ProjectSnapshot(self.get_material_db()).build(self.node_tree, self.materials.paths)
+
+    def stream_project_snapshot(self, file_path) -> dict:
         """
-        Create dynamic children (e.g. /source/<name>, /distributions/<name>) if they don't exist yet.
-        We use the parent's name + child meta to decide what factory to call.
+        Apply a JSON project while it is read: each node is applied as soon as it
+        is parsed (memory stays bounded by one node, not the document) and the
+        hierarchy shows the nodes as they arrive. The nodes go to a fresh tree,
+        which replaces the project once the whole file is read. Returns the
+        document head.
         """
-        name = child_snap.get("name")
-        meta = child_snap.get("meta", {}) or {}
-
-        parent_name = (getattr(parent_obj, "name", None) or parent_obj.get_name() or "").lower()
-
-        # ---- Distributions ----
-        dist_type = meta.get("distribution_type")
-        if parent_name == "distributions" and dist_type:
-            new_obj = GObjectCreator.create_distribution_child(name, dist_type)
-            parent_obj.add_daughter(new_obj)
-            return new_obj
-
-        # ---- Source ----
-        src_type = meta.get("source_type")
-        if parent_name == "source" and src_type:
-            new_obj = GObjectCreator.create_source_child(name, src_type)
-            parent_obj.add_daughter(new_obj)
-            return new_obj
-
-        # ---- Geometry (anywhere under world): use 'shape' ----
-        shape = meta.get("shape")
-        if shape:
-            # Check if parent is under world (at any depth)
-            anc = parent_obj
-            under_world = False
-            while anc is not None:
-                if getattr(anc, "name", "").lower() == "world":
-                    under_world = True
-                    break
-                anc = anc.get_parent()
-
-            if under_world:
-                # If your factory can create a child under ANY parent, use it.
-                # Most implementations of create_world_daughter are happy as long as you add_daughter(new_obj).
-                new_obj = GObjectCreator.create_world_daughter(name, shape, self.get_material_db())
-                parent_obj.add_daughter(new_obj)
-                return new_obj
-
-        # Nothing to create
-        return None
-
-    def _apply_object_snapshot(self, obj, snap: dict):
-        # apply meta
-        meta = snap.get("meta", {}) or {}
-        if "role" in meta:
-            obj.role = meta["role"]
-        if "system_type" in meta:
-            obj.system_type = meta["system_type"]
-        if "system_level" in meta:
-            obj.system_level = meta["system_level"]
-
-        # apply parameter values by label
-        self._apply_param_values(obj, snap.get("parameters", []))
-
-        # recurse for children (create missing dynamic ones when we can)
-        for child_snap in (snap.get("children") or []):
-            name = child_snap.get("name")
-            child_obj = self._find_child_by_name(obj, name)
-            if child_obj is None:
-                child_obj = self._maybe_create_child_from_meta(obj, child_snap)
-            if child_obj is not None:
-                self._apply_object_snapshot(child_obj, child_snap)
-
-    def apply_project_snapshot(self, data: dict):
-        # 0) material DB auto-import if present
-        mdb = (data or {}).get("material_db_path")
-        if mdb and os.path.exists(mdb):
-            # this calls your existing loader + updates UI flags
-            self.import_material_db(mdb)
-
-        # 1) ensure we have the base tree (gate root + static nodes)
-        if not self.node_tree or not getattr(self.node_tree, "daughters", None):
-            from Classes.GObjectCreator import GObjectCreator
-            self.node_tree = GObjectCreator.create_gate_root()
-            # Add standard static nodes (physics, digitizer, distributions, source, output, acquisition, verbose, vis, world)
-            self.node_tree = GObjectCreator.create_static_objects(
-                self.node_tree, self.get_material_db(), gate_version=self.gate_version, sd_names=[]
-            )
+        window = self.ct_commander_window
+        total = os.path.getsize(file_path) or 1
+        tree = None
+
+        def on_root(head):
+            nonlocal tree
+            tree = self.prepare_project_tree(head)
+            window.begin_import(tree)
+            parents = {}                    # id -> object that got children since the last update
+            next_update = time.monotonic() + self.IMPORT_PROGRESS_S
+
+            def on_node(obj):
+                nonlocal next_update
+                if obj.parent is not None:
+                    parents[id(obj.parent)] = obj.parent
+                if time.monotonic() >= next_update:
+                    window.import_progress(stream.bytes_read / total, parents.values())
+                    parents.clear()
+                    next_update = time.monotonic() + self.IMPORT_PROGRESS_S
+
+            ProjectSnapshot(self.get_material_db()).apply_stream(tree, stream, on_node, head)
+            window.import_progress(1.0, parents.values())
+
+        with open(file_path, "rb") as f:
+            stream = JsonStream(f)
+            try:
+                head = read_project_stream(stream, on_root)
+            finally:
+                window.end_import()
+        if tree is not None:
+            self.node_tree = tree
+            window.write_to_console("Project imported and applied.")
+        else:
+            self.apply_project_snapshot(head)      # no "root" node: schema 1.0 document
+        return head
+
+    def prepare_project_tree(self, head: dict):
+        """
+        Load the project's material databases and return a fresh tree to apply it to.
+        The open tree is left alone until the whole document applied: a file that
+        breaks off half way must not have overwritten its values.
+        """
+        # 0) material DB auto-import if present (the project's databases replace the loaded ones)
+        paths = [p for p in material_db_paths(head) if os.path.exists(p)]
+        if paths:
+            self.import_material_dbs(paths, replace=True)
+
+        # 1) the base tree: gate root + static nodes (physics, digitizer, distributions,
+        #    source, output, acquisition, verbose, vis, world)
+        root = GObjectCreator.create_gate_root()
+        return GObjectCreator.create_static_objects(root, self.get_material_db(), gate_version=self.gate_version, sd_names=[])
+
+    def apply_project_snapshot(self, data: dict | ProjectArchive):
+        archive = data if isinstance(data, ProjectArchive) else None
+        tree = self.prepare_project_tree(archive.head if archive else data)
 
         # 2) apply snapshot from root downward
-        root_snap = (data or {}).get("root") or {}
-        if root_snap:
-            self._apply_object_snapshot(self.node_tree, root_snap)
+        if archive is not None:
+            ProjectSnapshot(self.get_material_db()).apply_archive(tree, archive)
+        else:
+            ProjectSnapshot(self.get_material_db()).apply(tree, data)
+        self.node_tree = tree
 
         # 3) refresh UI
         self.ct_commander_window.populate_hierarchy_tree(self.node_tree)
@@ -0,0 +1,256 @@
+"""
+Headless entry point: python CTCommander.py <command> ...
+
+Nothing in here (or anything it imports) may pull in PyQt6, so batch jobs on
+compute nodes start in a few tens of milliseconds. The module itself only
+imports the standard library (CTCommander.py reads COMMANDS on every start,
+the GUI included); each command imports what it needs, so numpy and the
+geometry engines load only for the commands that use them.
+"""
+import argparse
+import os
+import sys
+
+COMMANDS = ("export", "sweep", "materials", "convert", "placements", "overlaps", "bounds")
+
+
+def _gate_version(text: str):
+    from Classes.GObjectCreator import GObjectCreator
+    return GObjectCreator._norm_gv(text)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from Classes.IO.project_archive import EXTENSION
+    parser = argparse.ArgumentParser(prog="CTCommander", description="CTCommander headless tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Render a project JSON to GATE macros")
+    export.add_argument("project", help=f"Project JSON (schema 1.0 or 2.0) or {EXTENSION} archive")
+    out = export.add_mutually_exclusive_group(required=True)
+    out.add_argument("-o", "--output", help="Macro file to write ('-' for stdout)")
+    out.add_argument("--split-dir", help="Write one macro per section plus main.mac into this folder")
+    export.add_argument("--material-db", action="append",
+                        help="Override the material databases stored in the project (repeat for several)")
+    export.add_argument("--gate-version", type=_gate_version, default=(9, 2, 0), help="e.g. 9.2 or 9.3.0")
+    export.add_argument("--no-run", action="store_true", help="Omit /gate/run/initialize and /gate/application/start")
+    export.set_defaults(func=cmd_export)
+
+    sweep = sub.add_parser("sweep", help="Write one macro set per point of a parameter sweep")
+    sweep.add_argument("project", help="Base project JSON")
+    sweep.add_argument("spec", help="Sweep spec JSON (see Classes/ParameterSweep.py)")
+    sweep.add_argument("-o", "--output-dir", required=True, help="Folder receiving variant_NNNN/ and manifest.json")
+    sweep.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    sweep.add_argument("--split", action="store_true", help="One macro per section in each variant folder")
+    sweep.add_argument("--material-db", action="append",
+                       help="Override the material databases stored in the project (repeat for several)")
+    sweep.add_argument("--gate-version", type=_gate_version, default=(9, 2, 0), help="e.g. 9.2 or 9.3.0")
+    sweep.set_defaults(func=cmd_sweep)
+
+    materials = sub.add_parser("materials", help="List the materials of databases with derived quantities")
+    materials.add_argument("db", nargs="+", help="Gate material databases (.db); a name defined twice comes from the first")
+    materials.add_argument("--element", help="Only materials containing this element (name or symbol)")
+    materials.add_argument("--min-density", type=float, help="Only materials denser than this (g/cm3)")
+    materials.add_argument("--max-density", type=float, help="Only materials lighter than this (g/cm3)")
+    materials.set_defaults(func=cmd_materials)
+
+    convert = sub.add_parser("convert", help=f"Convert a project between JSON and the {EXTENSION} archive format")
+    convert.add_argument("source", help=f"Project JSON or {EXTENSION} archive")
+    convert.add_argument("target", help=f"Output file; a {EXTENSION} name writes an archive, anything else JSON")
+    convert.set_defaults(func=cmd_convert)
+
+    placements = sub.add_parser("placements", help="Count the copies of every volume, repeaters expanded")
+    placements.add_argument("project", help=f"Project JSON or {EXTENSION} archive")
+    placements.add_argument("--save", help="Write each volume's (N, 4, 4) placements in the world (mm) to this .npz file")
+    placements.set_defaults(func=cmd_placements)
+
+    overlaps = sub.add_parser("overlaps", help="Check for overlapping volumes and volumes outside their mother "
+                                                "(exit status 1 if any)")
+    overlaps.add_argument("project", help=f"Project JSON or {EXTENSION} archive")
+    overlaps.add_argument("--tolerance", type=float, help="Overlaps up to this depth are ignored (mm, default 1e-6)")
+    overlaps.add_argument("--limit", type=int, default=50, help="Report at most this many problems of each kind")
+    overlaps.set_defaults(func=cmd_overlaps)
+
+    bounds = sub.add_parser("bounds", help="Print the extents of every volume with its daughters (mm), "
+                                           "optionally sizing the world around them")
+    bounds.add_argument("project", help=f"Project JSON or {EXTENSION} archive")
+    bounds.add_argument("--fit-world", type=float, metavar="MARGIN",
+                        help="Size the world around its daughters with this margin (mm)")
+    bounds.add_argument("-o", "--output", help=f"With --fit-world: write the resized project (JSON or {EXTENSION})")
+    bounds.set_defaults(func=cmd_bounds)
+    return parser
+
+
+def load_project(path: str, gate_version=(9, 2, 0)):
+    """Return (node_tree, raw data) for a project JSON file."""
+    from Classes.IO.JsonHandler import JsonHandler
+    from Classes.IO.project_io import load_project_tree
+    from Classes.IO.project_archive import ProjectArchive, is_project_archive
+    if is_project_archive(path):
+        archive = ProjectArchive(path)
+        return load_project_tree(archive, gate_version=gate_version), archive.head
+    data = JsonHandler().load(path)
+    return load_project_tree(data, gate_version=gate_version), data
+
+
+def cmd_export(args) -> int:
+    from Classes.IO.macro_io import MacroExporter
+    from Classes.IO.project_io import material_db_paths
+    root, data = load_project(args.project, args.gate_version)
+    exporter = MacroExporter(
+        material_db_path=args.material_db or material_db_paths(data),
+        include_run_commands=not args.no_run,
+    )
+    if args.split_dir:
+        files = exporter.write_split(root, args.split_dir)
+        print(f"Wrote {len(files)} macro files to {args.split_dir}", file=sys.stderr)
+    elif args.output == "-":
+        exporter.write(root, sys.stdout)
+    else:
+        count = exporter.write(root, args.output)
+        print(f"Wrote {count} lines to {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_sweep(args) -> int:
+    from Classes.ParameterSweep import ParameterSweep
+    sweep = ParameterSweep.from_files(
+        args.project, args.spec,
+        gate_version=args.gate_version,
+        material_db_path=args.material_db,
+    )
+    manifest = sweep.run(args.output_dir, workers=args.workers, split=args.split)
+    print(f"Wrote {len(manifest['variants'])} variants to {args.output_dir}", file=sys.stderr)
+    return 0
+
+
+def cmd_materials(args) -> int:
+    from Classes.MaterialRegistry import MaterialRegistry
+    from Classes.MaterialPhysics import MaterialPhysics
+    registry = MaterialRegistry()
+    for db in registry.load(args.db):
+        if db.store is None:
+            raise ValueError(db.status.removeprefix("Error: "))
+    rows, known = [], False
+    for path in registry.paths:
+        db = registry.databases[path]
+        try:
+            names = db.store.query(args.element, args.min_density, args.max_density)
+        except KeyError:
+            continue        # element not defined in this database
+        known = True
+        physics = MaterialPhysics.for_db(db)
+        rows += [(name, path, db.store, physics) for name in names if registry.index[name] == path]
+    if not known:
+        raise ValueError(f"unknown element '{args.element}'")
+    report = registry.duplicate_report()
+    if report:
+        print(report, file=sys.stderr)
+
+    width = max([len("Material")] + [len(r[0]) for r in rows])
+    source = len(registry) > 1
+    print(f"{'Material':<{width}}  {'d (g/cm3)':>10}  {'Z eff':>7}  {'rho_e/w':>8}  {'I (eV)':>7}"
+          + ("  Database" if source else ""))
+    for name, path, store, physics in rows:
+        row = store.row(name)
+        print(f"{name:<{width}}  {store.density[row]:>10.4g}  {physics.z_eff[row]:>7.3f}"
+              f"  {physics.relative_electron_density[row]:>8.4f}  {physics.mean_excitation[row]:>7.1f}"
+              + (f"  {os.path.basename(path)}" if source else ""))
+    return 0
+
+
+def cmd_convert(args) -> int:
+    from Classes.IO.JsonHandler import JsonHandler
+    from Classes.IO.project_archive import EXTENSION, load_project_document, write_project_archive
+    document = load_project_document(args.source)
+    if args.target.lower().endswith(EXTENSION):
+        count = write_project_archive(args.target, document)
+        print(f"Wrote {count} sections to {args.target}", file=sys.stderr)
+    else:
+        JsonHandler().save(args.target, document)
+        print(f"Wrote {args.target}", file=sys.stderr)
+    return 0
+
+
+def _world(root, project: str):
+    world = next((d for d in root.daughters if d.get_name() == "world"), None)
+    if world is None:
+        raise ValueError(f"'{project}' has no world volume")
+    return world
+
+
+def cmd_placements(args) -> int:
+    import numpy as np
+    from Classes.RepeaterExpansion import expand_tree
+    root, _ = load_project(args.project)
+    world = _world(root, args.project)
+    frames = expand_tree(world)
+    keys = {world: "world"}
+    stack = [world]
+    while stack:
+        mother = stack.pop()
+        for d in reversed(mother.daughters):
+            if d in frames:
+                keys[d] = f"{keys[mother]}/{d.get_name()}"
+                stack.append(d)
+    width = max(len(k) for k in keys.values())
+    print(f"{'Volume':<{width}}  {'per mother':>10}  {'in world':>10}")
+    for obj, key in keys.items():
+        mother = len(frames[obj.parent]) if obj is not world else 1
+        print(f"{key:<{width}}  {len(frames[obj]) // mother:>10}  {len(frames[obj]):>10}")
+    if args.save:
+        np.savez_compressed(args.save, **{key: frames[obj] for obj, key in keys.items()})
+        print(f"Wrote the placements of {len(keys)} volumes to {args.save}", file=sys.stderr)
+    return 0
+
+
+def cmd_overlaps(args) -> int:
+    from Classes.OverlapCheck import TOLERANCE, check_overlaps
+    root, _ = load_project(args.project)
+    tolerance = TOLERANCE if args.tolerance is None else args.tolerance
+    report = check_overlaps(_world(root, args.project), tolerance=tolerance)
+    for line in report.lines(limit=args.limit):
+        print(line)
+    return 0 if report.ok else 1
+
+
+def cmd_bounds(args) -> int:
+    from Classes.GeometryBounds import BoundsEngine, apply_sizes, format_extent
+    from Classes.IO.project_io import ProjectSnapshot, material_db_paths
+    from Classes.IO.project_archive import save_project_document
+    if args.output and args.fit_world is None:
+        raise ValueError("--output needs --fit-world")
+    root, data = load_project(args.project)
+    world = _world(root, args.project)
+    engine = BoundsEngine()
+    rows = []       # (indented name, copies, extent in its mother's frame)
+    stack = [(world, 0)]
+    while stack:
+        obj, depth = stack.pop()
+        extent = engine.extent(obj)
+        rows.append(("  " * depth + obj.get_name(), extent.copies, extent.subtree if obj is world else extent.placed))
+        stack.extend((d, depth + 1) for d in reversed(obj.daughters) if getattr(d, "enabled", True))
+    width = max(len(r[0]) for r in rows)
+    print(f"{'Volume':<{width}}  {'copies':>6}  Extent in its mother, with its daughters")
+    for name, copies, box in rows:
+        print(f"{name:<{width}}  {copies:>6}  {format_extent(box)}")
+
+    if args.fit_world is not None:
+        changes = apply_sizes(world, engine.fit(world, args.fit_world))
+        for param, _, _ in changes:
+            print(f"world {param.displayed_name}: {param.default_value_list[0]:g} {param.default_unit}", file=sys.stderr)
+        if not changes:
+            print("The world already fits its daughters" if engine.fit(world) else "Nothing in the world has a size to fit around",
+                  file=sys.stderr)
+        if args.output:
+            save_project_document(args.output, ProjectSnapshot().build(root, material_db_paths(data)))
+            print(f"Wrote {args.output}", file=sys.stderr)
+    return 0
+
+
+def run(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
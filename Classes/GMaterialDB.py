@@ -1,4 +1,26 @@
+import io
+import json
 import os
+import re
+import tempfile
+
+import numpy as np
+
+# density units found in Gate material databases, as factors to g/cm3
+DENSITY_UNITS = {"g/cm3": 1.0, "mg/cm3": 1e-3, "kg/m3": 1e-3, "g/l": 1e-3, "mg/l": 1e-6}
+
+_NUMBER_UNIT = re.compile(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(\S*)\s*$")
+
+
+def _properties(text):
+    """'d=1.0 g/cm3 ; n=2 ; state=liquid' -> {'d': '1.0 g/cm3', 'n': '2', 'state': 'liquid'}"""
+    props = {}
+    for part in text.split(";"):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            props[key.strip()] = value.strip()
+    return props
+
 
 class GElement(object):
     def __init__(self, name, symbol, number, weight):
@@ -14,41 +36,183 @@ class GElement(object):
         return f"{self.name}:   S= {self.symbol}    ;   Z=  {self.atomic_number}    ;   A=  {self.atomic_weight} g/mole"
      
      
-#May need to expand material later   
 class GMaterial(object):
-    def __init__(self, name):
+    """
+    One [Materials] entry. components holds the '+el:'/'+mat:' lines as
+    (kind, name, key, value): kind 'el' or 'mat', key 'n' (number of atoms)
+    or 'f' (mass fraction).
+    """
+    def __init__(self, name, density=None, n_components=0, state=None, components=None):
         self.name = name
-        #self.density = density
-        
+        self.density = density      # g/cm3
+        self.n_components = n_components
+        self.state = state
+        self.components = components if components is not None else []
         
     def __repr__(self):
-        return f"GMaterial({self.name})"    
+        return f"GMaterial({self.name}, d={self.density} g/cm3, n={self.n_components})"    
     
     def __str__(self):
         return f"{self.name}"
 
 
+class MaterialStore(object):
+    """
+    Columnar view of a parsed database: one row per material, one column per
+    element.
+      - names, index (name -> row), density (g/cm3), state
+      - element_names, element_index (name and symbol -> column), Z, A
+      - fractions: (materials x elements) element mass fractions, rows sum to 1
+      - element_materials: element name -> rows of the materials containing it
+    """
+    def __init__(self, elements, materials, fractions=None):
+        self.element_names = [e.name for e in elements]
+        self.element_index = {}
+        for col, e in enumerate(elements):
+            self.element_index[e.name] = col
+            self.element_index.setdefault(e.symbol, col)
+        self.Z = np.array([e.atomic_number for e in elements], dtype=np.float64)
+        self.A = np.array([e.atomic_weight for e in elements], dtype=np.float64)
+
+        self.names = [m.name for m in materials]
+        self.index = {name: row for row, name in enumerate(self.names)}
+        self.density = np.array([np.nan if m.density is None else m.density for m in materials], dtype=np.float64)
+        self.state = [m.state for m in materials]
+
+        if fractions is None:
+            self.fractions = np.zeros((len(materials), len(elements)), dtype=np.float64)
+            self._fill_fractions(materials)
+        else:
+            self.fractions = fractions
+        self.element_materials = {name: np.flatnonzero(self.fractions[:, col])
+                                  for col, name in enumerate(self.element_names)}
+
+    def _fill_fractions(self, materials):
+        by_name = {m.name: m for m in materials}
+        done = set()
+
+        def resolve(m, chain=()):
+            row = self.index[m.name]
+            if m.name in done:
+                return self.fractions[row]
+            if m.name in chain:
+                raise ValueError(f"circular '+mat' reference through '{m.name}'")
+            vec = np.zeros(len(self.element_names))
+            by_atoms = all(key == "n" for _kind, _name, key, _v in m.components)
+            for kind, name, key, value in m.components:
+                if kind == "mat":
+                    sub = by_name.get(name)
+                    if sub is None:
+                        raise KeyError(f"unknown material '{name}'")
+                    vec += value * resolve(sub, chain + (m.name,))
+                    continue
+                col = self.element_index.get(m.name if name == "auto" else name)
+                if col is None:
+                    raise KeyError(f"unknown element '{name}'")
+                vec[col] += value * self.A[col] if by_atoms else value
+            total = vec.sum()
+            if total > 0:
+                vec /= total
+            self.fractions[row] = vec
+            done.add(m.name)
+            return vec
+
+        for m in materials:
+            try:
+                resolve(m)
+            except (KeyError, ValueError) as e:
+                print(f"Error resolving composition of material {m.name} - {e}")
+                done.add(m.name)
+
+    # ---------------------- lookups ----------------------
+    def row(self, name):
+        return self.index[name]
+
+    def element_column(self, element):
+        """Column of an element given by name ('Lead') or symbol ('Pb')."""
+        return self.element_index[element]
+
+    def composition(self, name):
+        """{element name: mass fraction} of one material."""
+        fr = self.fractions[self.index[name]]
+        return {self.element_names[col]: float(fr[col]) for col in np.flatnonzero(fr)}
+
+    def query(self, element=None, min_density=None, max_density=None, min_fraction=0.0):
+        """
+        Names of the materials matching every given criterion, e.g.
+        query(element="Pb", min_density=5.0). Densities are in g/cm3.
+        """
+        mask = np.ones(len(self.names), dtype=bool)
+        if element is not None:
+            mask &= self.fractions[:, self.element_column(element)] > min_fraction
+        if min_density is not None:
+            mask &= self.density > min_density
+        if max_density is not None:
+            mask &= self.density < max_density
+        return [self.names[row] for row in np.flatnonzero(mask)]
+
+
 class GMaterialDB(object):
+    # Parsed databases are reused while their file is unchanged: in memory
+    # (abs path -> (mtime_ns, size, GMaterialDB)) and on disk in a '<file>.cache'
+    # sidecar next to the database, read back with a single read.
+    SIDECAR_SUFFIX = ".cache"
+    SIDECAR_VERSION = 1
+    _LOADED: dict[str, tuple] = {}
+
     def __init__(self, file_path):
         self.element_DB = {}
         self.material_DB = {}
         self.file_path = file_path
+        self.store = None
+        self.status = None
         
     def get_material_DB(self):
         return [material.name for material in self.material_DB.values()]
-    
+
+    @classmethod
+    def load(cls, file_path) -> "GMaterialDB":
+        """
+        Parsed database for file_path, from the in-memory cache, the sidecar or
+        the text file, in that order. The result's status holds the message for
+        the console; treat the returned object as read-only, it may be shared.
+        """
+        try:
+            st = os.stat(file_path)
+        except (OSError, TypeError):
+            db = cls(file_path)
+            db.read_material_db()       # reports the missing file
+            return db
+        key = os.path.abspath(file_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        cached = cls._LOADED.get(key)
+        if cached is not None and cached[:2] == stamp:
+            return cached[2]
+
+        db = cls(file_path)
+        if db._read_sidecar(stamp):
+            db.status = "Loaded Material Database from cache."
+        else:
+            db.read_material_db()
+            if db.store is None:
+                return db
+            db._write_sidecar(stamp)
+        cls._LOADED[key] = (*stamp, db)
+        return db
+
     def read_material_db(self):
         if not self.file_path:
-            print("No materialDB path was provided.")
-            return "No materialDB path was provided."
+            self.status = "No materialDB path was provided."
+            return self.status
         
         if not os.path.exists(self.file_path):
-            print(f"Error: File '{self.file_path}' not found.")
-            return f"Error: File '{self.file_path}' not found."
+            self.status = f"Error: File '{self.file_path}' not found."
+            return self.status
         
         if not self.file_path.lower().endswith(".db"):
-            print("Error: Selected file is not a Material Database file.")
-            return("Error: Selected file is not a Material Database file.")
+            self.status = "Error: Selected file is not a Material Database file."
+            return self.status
         
         with open(self.file_path, "r", encoding="utf-8") as f:
             lines = f.readlines()
@@ -76,8 +240,12 @@ class GMaterialDB(object):
                 
                 currentMaterialLines.append(line) 
                 
-        print("Successfully imported Material Database.")
-        return "Successfully imported Material Database."       
+        if currentMaterialLines:    # the last material has no successor to flush it
+            self.parse_material(currentMaterialLines)
+
+        self.build_store()
+        self.status = "Successfully imported Material Database."
+        return self.status
                 
                 
     def parse_element(self, line):
@@ -103,16 +271,94 @@ class GMaterialDB(object):
             print(f"Error parsing element line: {line} - {e}")
             
     def parse_material(self, lines):
-        """Parse a line from the Materials section."""
+        """Parse a material header line and its '+el:'/'+mat:' component lines."""
         
         if len(lines) < 1:
             print("No lines were sent as a paramter to parse material.")
             return
             
-        name_part, properties_part = lines[0].split(":")
-        name = name_part.strip()
+        try:
+            name_part, properties_part = lines[0].split(":", 1)
+            name = name_part.strip()
+            properties = _properties(properties_part)
+
+            density = None
+            if "d" in properties:
+                value, unit = _NUMBER_UNIT.match(properties["d"]).groups()
+                density = float(value) * DENSITY_UNITS[unit or "g/cm3"]
+
+            components = []
+            for line in lines[1:]:
+                kind, _, rest = line[1:].partition(":")
+                comp = _properties(rest)
+                key = "n" if "n" in comp else "f"
+                components.append((kind.strip().lower(), comp.get("name", ""), key, float(comp.get(key, 0))))
+
+            self.material_DB[name] = GMaterial(name, density, int(float(properties.get("n", len(components)))),
+                                               properties.get("state"), components)
+        except Exception as e:
+            print(f"Error parsing material: {lines[0]} - {e}")
+
+    def build_store(self):
+        """(Re)build the columnar MaterialStore from element_DB/material_DB."""
+        self.store = MaterialStore(list(self.element_DB.values()), list(self.material_DB.values()))
+        return self.store
         
-        self.material_DB[name] = GMaterial(name)
+    # ---------------------- sidecar ----------------------
+    def _sidecar_path(self):
+        return self.file_path + self.SIDECAR_SUFFIX
+
+    def _write_sidecar(self, stamp):
+        """
+        Save the parsed database next to its file; skipped if the folder is read-only.
+        Written to a temporary file and moved into place, so a reader never sees half of it.
+        """
+        meta = {
+            "version": self.SIDECAR_VERSION,
+            "stamp": list(stamp),
+            "elements": [[e.name, e.symbol, e.atomic_number, e.atomic_weight] for e in self.element_DB.values()],
+            "materials": [[m.name, m.density, m.n_components, m.state, m.components] for m in self.material_DB.values()],
+        }
+        buf = io.BytesIO()
+        np.savez_compressed(buf, meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+                 fractions=self.store.fractions)
+        path = self._sidecar_path()
+        try:
+            # a name of its own: several processes may write the same sidecar at once
+            fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                       dir=os.path.dirname(path) or None)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(buf.getbuffer())
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def _read_sidecar(self, stamp) -> bool:
+        """Load what _write_sidecar saved; False (parse the text file) if it is missing, stale or unreadable."""
+        try:
+            with open(self._sidecar_path(), "rb") as f:
+                data = f.read()
+            arrays = np.load(io.BytesIO(data), allow_pickle=False)
+            meta = json.loads(arrays["meta"].tobytes().decode("utf-8"))
+            if meta.get("version") != self.SIDECAR_VERSION or tuple(meta.get("stamp", ())) != stamp:
+                return False
+            elements = {name: GElement(name, symbol, number, weight)
+                        for name, symbol, number, weight in meta["elements"]}
+            materials = {name: GMaterial(name, density, n_components, state, [tuple(c) for c in components])
+                         for name, density, n_components, state, components in meta["materials"]}
+            store = MaterialStore(list(elements.values()), list(materials.values()), arrays["fractions"])
+        except Exception:
+            # truncated or damaged (BadZipFile, EOFError, ...): a cache miss, the text file is parsed again
+            return False
+
+        self.element_DB, self.material_DB, self.store = elements, materials, store
+        return True
         
     def print_materialDB(self):
         print(len(self.element_DB))
@@ -123,4 +369,4 @@ class GMaterialDB(object):
         print(len(self.material_DB))
         print("\nMATERIALS\n")
         for material in self.material_DB.values():
-            print(material.__str__())        
\ No newline at end of file
+            print(material.__str__())
\ No newline at end of file
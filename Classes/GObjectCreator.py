@@ -1,5 +1,5 @@
 from Classes.GateParameter import GateParameter
-from Classes.GateObject import GateObject
+from Classes.GateObject import GateObject, ParameterTemplate
 from Classes.StaticData import (
     LENGTH_UNITS, ANGLE_UNITS, PHYSICS_LISTS, COLORS, LINE_STYLE, INC_EXC, TIME_UNITS, VIEWER_TYPES, SPEED_UNITS, ANGULAR_SPEED_UNITS, 
     FREQUENCY_UNITS, ENERGY_UNITS, SOURCE_PARTICLES, SOURCE_ENERGY_TYPES, SOURCE_ANG_TYPES, SOURCE_DOMAINS, SOURCE_SHAPES_BY_DOMAIN, 
@@ -9,6 +9,13 @@ from Classes.StaticData import (
 from typing import Iterable, Sequence
 
 class GObjectCreator():
+    # Projects are saved as changes against the parameters built here (see
+    # GateParameter.is_changed); bump when a factory default value changes.
+    FACTORY_VERSION = 1
+
+    # shape -> ParameterTemplate of its world daughters, see world_daughter_template
+    _WORLD_TEMPLATES: dict[str, ParameterTemplate] = {}
+
     # ---------------------- small factories ----------------------
     ### Method to create a TextArea parameter line
     @staticmethod
@@ -76,6 +83,38 @@ class GObjectCreator():
     # Create a child GObject of the world
     @staticmethod
     def create_world_daughter(name: str, shape: str, material_db):
+        # Volumes share their shape's default rows and only get their own
+        # parameters once they are opened or edited (see ParameterTemplate).
+        template = GObjectCreator.world_daughter_template(shape, material_db)
+        obj = GateObject.from_template(name, "world", template)
+        obj.subtype = shape
+        return obj
+
+    @staticmethod
+    def world_daughter_template(shape: str, material_db) -> ParameterTemplate:
+        """Default parameter rows of a world daughter, built once per shape (and material list)."""
+        cached = GObjectCreator._WORLD_TEMPLATES.get(shape)
+        if cached is None or cached.key is not material_db:
+            rows = GObjectCreator.build_world_daughter_parameters(ParameterTemplate.PLACEHOLDER, shape, material_db)
+            cached = GObjectCreator._WORLD_TEMPLATES[shape] = ParameterTemplate(rows, key=material_db)
+        return cached
+
+    @staticmethod
+    def set_material_options(root: GateObject, material_db):
+        """Offer material_db in every setMaterial dropdown of root's tree (the material databases changed)."""
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            stack.extend(obj.daughters)
+            if obj.template is not None:
+                obj.rebase_template(GObjectCreator.world_daughter_template(obj.subtype, material_db))
+                continue
+            for p in obj.parameters:
+                if p.path.endswith("/setMaterial") and p.input_type_list == ["DropDown"]:
+                    p.value_list = [material_db]
+
+    @staticmethod
+    def build_world_daughter_parameters(name: str, shape: str, material_db) -> list[GateParameter]:
         g = GObjectCreator
         
         # Field templates per shape: (subpath, label, inputs_count, units, default_unit_index)
@@ -159,10 +198,7 @@ class GObjectCreator():
         params += GObjectCreator.build_placement_parameters(f"/{name}")
         params += GObjectCreator.build_moving_parameters(f"/{name}")
         params += GObjectCreator.get_visualization_parameters(name)
-
-        obj = GateObject(name, "", "world", params)
-        obj.subtype = shape
-        return obj
+        return params
     
     
     @staticmethod
@@ -1,44 +1,518 @@
+import sys
+
 from Classes.GateParameter import GateParameter
 
+
+class ParameterList(list):
+    """
+    The parameters of one GateObject. Behaves like a plain list, but every
+    mutation keeps the owner's path/label indexes (and its tree index) in sync.
+    """
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner, items=()):
+        super().__init__(items)
+        self._owner = owner
+
+    def append(self, param):
+        super().append(param)
+        self._owner._parameter_added(param)
+
+    def insert(self, i, param):
+        super().insert(i, param)
+        self._owner._parameter_added(param)
+
+    def extend(self, params):
+        params = list(params)
+        super().extend(params)
+        for p in params:
+            self._owner._parameter_added(p)
+
+    def __iadd__(self, params):
+        self.extend(params)
+        return self
+
+    def _rebuild(self, op, *args):
+        self._owner._unindex_parameters()
+        try:
+            return op(self, *args)
+        finally:
+            self._owner._reindex_parameters()
+
+    def remove(self, param):
+        self._rebuild(list.remove, param)
+
+    def pop(self, i=-1):
+        return self._rebuild(list.pop, i)
+
+    def clear(self):
+        self._rebuild(list.clear)
+
+    def __setitem__(self, i, value):
+        self._rebuild(list.__setitem__, i, value)
+
+    def __delitem__(self, i):
+        self._rebuild(list.__delitem__, i)
+
+
+def _index_add(index: dict, key, item):
+    # Single hits are stored bare, a list only appears for repeated keys.
+    hit = index.get(key)
+    if hit is None:
+        index[key] = item
+    elif type(hit) is list:
+        hit.append(item)
+    else:
+        index[key] = [hit, item]
+
+
+def _index_get(index: dict, key) -> list:
+    hit = index.get(key)
+    if hit is None:
+        return []
+    return list(hit) if type(hit) is list else [hit]
+
+
+def _index_add_once(index: dict, key, item):
+    hit = index.get(key)
+    if hit is not item and not (type(hit) is list and item in hit):
+        _index_add(index, key, item)
+
+
+def _index_discard(index: dict, key, item):
+    hit = index.get(key)
+    if hit is item:
+        del index[key]
+    elif type(hit) is list:
+        kept = [x for x in hit if x is not item]
+        if len(kept) > 1:
+            index[key] = kept
+        elif kept:
+            index[key] = kept[0]
+        else:
+            del index[key]
+
+
+class ParameterTemplate(object):
+    """
+    Default parameter rows shared by every object created from it (flyweight).
+    Rows are built once under PLACEHOLDER instead of an object name; an object
+    gets its own GateParameter copies only when its parameter list is first
+    requested (inspector, edits, lookups), read-only passes use the rows as-is.
+    """
+    PLACEHOLDER = "<volume>"
+    __slots__ = ("rows", "key", "_head", "_suffixes", "_by_label")
+
+    def __init__(self, rows, key=None):
+        self.rows = tuple(rows)
+        self.key = key              # what the rows were built from, to detect stale caches
+        self._head = f"/{self.PLACEHOLDER}"
+        self._suffixes = {p.tail for p in self.rows if p.head == self._head}
+        self._by_label: dict = {}
+        for p in self.rows:
+            if p.displayed_name:
+                self._by_label.setdefault(p.displayed_name, []).append(p)
+
+    def rows_by_label(self, label) -> list:
+        return self._by_label.get(label, [])
+
+    def has_label(self, label) -> bool:
+        return label in self._by_label
+
+    def has_path(self, path, name) -> bool:
+        base = f"/{name}"
+        return path.startswith(base) and path[len(base):] in self._suffixes
+
+    def materialize(self, name) -> list:
+        head, base = self._head, sys.intern(f"/{name}")
+        return [p.clone(head=base if p.head == head else None) for p in self.rows]
+
+
+class TreeIndex(object):
+    """
+    Tree-wide path/label -> owning GateObject(s), shared by every object of one tree.
+    Paths are indexed by their object part ('/vol1', GateParameter.head), once
+    per owner, so the index grows with the objects rather than with their rows;
+    the owners then answer the full path from their own index.
+    """
+    __slots__ = ("by_path", "by_label", "templated", "deferred")
+
+    def __init__(self):
+        self.by_path: dict = {}     # path head -> owner(s)
+        self.by_label: dict = {}
+        self.templated: dict = {}   # creation name -> template-backed object(s), see GateObject.from_template
+        self.deferred: dict = {}    # objects with a pending deferred load (ordered set), see GateObject.defer
+
+    def load_deferred(self):
+        """Run every pending deferred load, so the index covers the whole tree."""
+        while self.deferred:
+            next(iter(self.deferred))._load_deferred()
+
+    def add(self, obj, param):
+        _index_add_once(self.by_path, param.head, obj)
+        if param.displayed_name:
+            _index_add(self.by_label, param.displayed_name, obj)
+
+    def add_object(self, obj):
+        if obj._deferred is not None:
+            self.deferred[obj] = None
+        if obj._parameters is None:
+            _index_add(self.templated, obj._template_name, obj)
+            return
+        params = obj._parameters
+        for head in {p.head for p in params}:
+            _index_add(self.by_path, head, obj)
+        for p in params:
+            if p.displayed_name:
+                _index_add(self.by_label, p.displayed_name, obj)
+
+    def discard_object(self, obj):
+        """Drop obj from the keys its parameters use (the rest of the tree is not visited)."""
+        self.deferred.pop(obj, None)
+        if obj._parameters is None:
+            _index_discard(self.templated, obj._template_name, obj)
+            return
+        params = obj._parameters
+        for key in {p.head for p in params}:
+            _index_discard(self.by_path, key, obj)
+        for key in {p.displayed_name for p in params if p.displayed_name}:
+            _index_discard(self.by_label, key, obj)
+
+
 class GateObject(object):
-    def __init__(self, name, path, node_type, parameters=None, parent=None, 
+    __slots__ = ("name", "path", "node_type", "_tree", "_by_path", "_by_label", "_parameters",
+                 "_template", "_template_name", "_deferred",
+                 "_daughters", "enabled", "role", "parent",
+                 "system_type", "system_name", "system_level",
+                 "subtype", "shape", "source_type", "distribution_type")
+
+    def __init__(self, name, path, node_type, parameters=None, parent=None,
                  system_type: str | None = None, system_name: str | None = None,system_level: str | None = None):
         self.name = name
         self.path = path
         self.node_type = node_type
-        self.parameters = list(parameters or [])
-        self.daughters = []
+        self._tree = None           # TreeIndex, created once the object gets daughters or joins a tree
+        self._by_path = None        # per-object indexes, built on first lookup
+        self._by_label = None
+        self._parameters = ParameterList(self, parameters or [])
+        self._template = None
+        self._template_name = None
+        self._deferred = None       # (loader, has_daughters), see defer
+        self._daughters = []
         self.enabled = True
         self.role = None
         self.parent = parent
-        
+
         # Systems
         self.system_type = system_type
         self.system_name = system_name or (name if system_type else None)
         self.system_level = system_level
-        
+
         #Source
         self.subtype = None     # e.g. "gps", "PencilBeam", "TPSPencilBeam", etc.
-    
+
+    @classmethod
+    def from_template(cls, name, node_type, template: ParameterTemplate, path=""):
+        """Object whose parameters are the template rows until first requested."""
+        obj = cls(name, path, node_type)
+        obj._parameters = None
+        obj._template = template
+        obj._template_name = name       # paths keep the creation name, like built objects
+        return obj
+
+    # ---------------------- deferred load ----------------------
+    def defer(self, loader, has_daughters: bool = False):
+        """
+        Run loader(self) once, right before the parameters or daughters of this
+        object are first used (lazily opened project sections). has_daughters
+        tells the hierarchy whether to offer an expander in the meantime.
+        """
+        self._deferred = (loader, has_daughters)
+        if self._tree is not None:
+            self._tree.deferred[self] = None
+
+    def is_deferred(self) -> bool:
+        """Whether a deferred load is still pending (see defer)."""
+        return self._deferred is not None
+
+    def load(self):
+        """Run a pending deferred load now; its error is raised and the load stays pending."""
+        if self._deferred is not None:
+            self._load_deferred()
+
+    def _load_deferred(self):
+        deferred = self._deferred
+        self._deferred = None
+        if self._tree is not None:
+            self._tree.deferred.pop(self, None)
+        try:
+            deferred[0](self)
+        except BaseException:
+            # still pending: a save must not write the factory values in place of the section
+            self._deferred = deferred
+            if self._tree is not None:
+                self._tree.deferred[self] = None
+            raise
+
+    @property
+    def daughters(self) -> list:
+        if self._deferred is not None:
+            self._load_deferred()
+        return self._daughters
+
+    @daughters.setter
+    def daughters(self, daughters):
+        self._daughters = daughters
+
+    def has_daughters(self) -> bool:
+        """Whether the object has (or will have) daughters, without running a deferred load."""
+        if self._deferred is not None and self._deferred[1]:
+            return True
+        return bool(self._daughters)
+
+    # ---------------------- parameters / index ----------------------
+    @property
+    def parameters(self) -> ParameterList:
+        if self._deferred is not None:
+            self._load_deferred()
+        if self._parameters is None:
+            self._materialize()
+        return self._parameters
+
+    @parameters.setter
+    def parameters(self, params):
+        self._unindex_parameters()
+        self._parameters = ParameterList(self, params)
+        self._template = None
+        self._reindex_parameters()
+
+    def peek_parameters(self):
+        """
+        Parameters for read-only passes (export, snapshots). A template-backed
+        object returns the shared template rows, whose paths use
+        ParameterTemplate.PLACEHOLDER as object name; never modify them.
+        """
+        if self._deferred is not None:
+            self._load_deferred()
+        return self._template.rows if self._parameters is None else self._parameters
+
+    def peek_parameters_by_label(self, label) -> list:
+        if self._deferred is not None:
+            self._load_deferred()
+        if self._parameters is None:
+            return self._template.rows_by_label(label)
+        return self.get_parameters_by_label(label)
+
+    def own_parameter_count(self) -> int:
+        """Parameters held by this object itself (0 while it shares its template's rows)."""
+        return 0 if self._parameters is None else len(self._parameters)
+
+    @property
+    def template(self) -> ParameterTemplate | None:
+        """Template still backing the parameters, None once materialized (or never template-backed)."""
+        return self._template if self._parameters is None else None
+
+    def rebase_template(self, template: ParameterTemplate):
+        """Back a not yet materialized object by another template with the same rows (e.g. newer dropdown options)."""
+        if self._parameters is None:
+            self._template = template
+
+    def _materialize(self):
+        tree = self._tree
+        if tree is not None:
+            tree.discard_object(self)
+        self._parameters = ParameterList(self, self._template.materialize(self._template_name))
+        self._template = None
+        if tree is not None:
+            tree.add_object(self)
+
+    def _parameter_added(self, param):
+        if self._by_path is not None:
+            _index_add(self._by_path, param.tail, param)
+        if self._by_label is not None and param.displayed_name:
+            _index_add(self._by_label, param.displayed_name, param)
+        if self._tree is not None:
+            self._tree.add(self, param)
+
+    def _unindex_parameters(self):
+        if self._tree is not None:
+            self._tree.discard_object(self)
+        self._by_path = self._by_label = None
+
+    def _reindex_parameters(self):
+        if self._tree is not None:
+            self._tree.add_object(self)
+
+    def _path_index(self) -> dict:
+        # paths are keyed by their row part (GateParameter.tail, shared strings);
+        # _path_hits checks the object part
+        if self._by_path is None:
+            self._by_path = {}
+            for p in self.parameters:
+                _index_add(self._by_path, p.tail, p)
+        return self._by_path
+
+    def _label_index(self) -> dict:
+        if self._by_label is None:
+            self._by_label = {}
+            for p in self.parameters:
+                if p.displayed_name:
+                    _index_add(self._by_label, p.displayed_name, p)
+        return self._by_label
+
+    def get_parameter(self, path):
+        """First parameter of this object with that path, or None."""
+        if self._deferred is not None:
+            self._load_deferred()
+        if self._parameters is None and not self._template.has_path(path, self._template_name):
+            return None
+        hits = self._path_hits(path)
+        return hits[0] if hits else None
+
+    def get_parameters(self, path) -> list:
+        """Every parameter of this object with that path (rows like /moves/insert repeat)."""
+        if self._deferred is not None:
+            self._load_deferred()
+        if self._parameters is None and not self._template.has_path(path, self._template_name):
+            return []
+        return self._path_hits(path)
+
+    def _path_hits(self, path) -> list:
+        cut = path.find("/", 1)
+        head, tail = ("", path) if cut < 0 else (path[:cut], path[cut:])
+        hit = self._path_index().get(tail)
+        if hit is None:
+            return []
+        if type(hit) is not list:
+            return [hit] if hit.head == head else []
+        return [p for p in hit if p.head == head]
+
+    def get_parameters_by_label(self, label) -> list:
+        if self._deferred is not None:
+            self._load_deferred()
+        if self._parameters is None and not self._template.has_label(label):
+            return []
+        return _index_get(self._label_index(), label)
+
+    def find_parameter(self, path):
+        """First parameter with that path anywhere in this object's tree, or None."""
+        if self._tree is None:
+            hits = self.find_parameters(path)
+            return hits[0][1] if hits else None
+        self._tree.load_deferred()
+        cut = path.find("/", 1)
+        for owner in _index_get(self._tree.by_path, "" if cut < 0 else path[:cut]):
+            param = owner.get_parameter(path)
+            if param is not None:
+                return param
+        if self._tree.templated:
+            hits = self.find_parameters(path)
+            return hits[0][1] if hits else None
+        return None
+
+    def find_parameters(self, path) -> list:
+        """[(owner, parameter)] for every parameter of the tree with that path."""
+        return [(o, p) for o in self._owners(path, "by_path") for p in o.get_parameters(path)]
+
+    def find_parameters_by_label(self, label) -> list:
+        """[(owner, parameter)] for every parameter of the tree with that displayed name."""
+        return [(o, p) for o in self._owners(label, "by_label") for p in o.get_parameters_by_label(label)]
+
+    def _owners(self, key, index_name):
+        tree = self._tree
+        if tree is None:
+            return list(self._walk())
+        tree.load_deferred()
+        if index_name == "by_path":
+            cut = key.find("/", 1)
+            owners = _index_get(tree.by_path, "" if cut < 0 else key[:cut])
+        else:
+            owners = _index_get(tree.by_label, key)
+        if tree.templated:
+            # template-backed objects are found through their creation name
+            # (paths) or their template (labels); get_parameters* materializes them
+            if index_name == "by_path":
+                name = key.split("/", 2)[1] if key.startswith("/") else None
+                owners += _index_get(tree.templated, name)
+            else:
+                owners += [o for hit in tree.templated.values() for o in (hit if type(hit) is list else (hit,))
+                           if o._template.has_label(key)]
+        return list(dict.fromkeys(owners))   # an owner repeats once per row
+
+    def _walk(self):
+        stack = [self]
+        while stack:
+            obj = stack.pop()
+            yield obj
+            stack.extend(reversed(obj.daughters))
+
+    def __copy__(self):
+        # Detached shallow copy (used for copy-on-write clones): it gets its own
+        # parameter list and no tree index, the original tree stays untouched.
+        # Do not add_daughter() onto such a copy, its daughters are shared.
+        if self._deferred is not None:
+            self._load_deferred()
+        clone = object.__new__(type(self))
+        for slot in GateObject.__slots__:
+            if hasattr(self, slot):
+                setattr(clone, slot, getattr(self, slot))
+        clone._tree = None
+        clone._by_path = clone._by_label = None
+        clone._template = None
+        clone._parameters = ParameterList(clone, self.parameters)
+        return clone
+
+    # ---------------------- hierarchy ----------------------
     def get_daughters(self):
         return self.daughters
-    
+
     def get_name(self):
         return self.name
-    
+
     def get_type(self):
         return self.node_type
-    
+
     def get_nb_daughters(self):
         return len(self.daughters)
-    
+
     def get_parent(self):
         return self.parent
-    
+
     def add_daughter(self, daughter_obj):
+        self.insert_daughter(len(self.daughters), daughter_obj)
+
+    def insert_daughter(self, row, daughter_obj):
+        # A detached subtree's own index is simply dropped; a subtree still
+        # registered in another tree is unregistered from it first.
+        abandoned = daughter_obj._tree if daughter_obj.parent is None else None
         daughter_obj.parent = self
-        self.daughters.append(daughter_obj)
-        
+        self.daughters.insert(row, daughter_obj)
+        if self._tree is None:
+            self._tree = TreeIndex()
+            self._tree.add_object(self)
+        tree = self._tree
+        for obj in daughter_obj._walk():
+            if obj._tree is tree:
+                continue
+            if obj._tree is not None and obj._tree is not abandoned:
+                obj._tree.discard_object(obj)
+            obj._tree = tree
+            tree.add_object(obj)
+
+    def remove_daughter(self, daughter_obj):
+        self.daughters.remove(daughter_obj)
+        daughter_obj.parent = None
+        for obj in daughter_obj._walk():
+            if obj._tree is not None:
+                obj._tree.discard_object(obj)
+            obj._tree = None
+        if daughter_obj.daughters:
+            # the removed subtree keeps a tree index of its own
+            tree = TreeIndex()
+            for obj in daughter_obj._walk():
+                obj._tree = tree
+                tree.add_object(obj)
+
     def is_system_root(self) -> bool:
         return bool(self.system_type)
 
@@ -49,20 +523,20 @@ class GateObject(object):
     def attach_to_system(self, system_name: str, level: str):
         self.system_name = system_name
         self.system_level = level
-    
-        
+
+
     def to_dict(self):
         return {
         "name": self.name,
         "path": self.path,
         "node_type": self.node_type,
-        "parameters": [parameter.to_dict() for parameter in self.parameters], 
+        "parameters": [parameter.to_dict() for parameter in self.parameters],
         "daughters": [daughter.to_dict() for daughter in self.daughters],
         "system_type": self.system_type,
         "system_name": self.system_name,
         "system_level": self.system_level,
     }
-    
-        
+
+
     def __str__(self):
         return f"{self.name}"
\ No newline at end of file
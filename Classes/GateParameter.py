@@ -1,20 +1,221 @@
+import sys
+import weakref
+
 import Classes.StaticData as StaticData
 
+# Value and option tables a parameter is built with (default values, dropdown
+# options, unit lists, input types) are shared by every parameter holding an
+# equal list instead of being copied per instance. The intern table holds them
+# weakly: a table no parameter uses any more is released. Values assigned
+# later (edits, sweeps) stay plain per-parameter lists. Never mutate a table in
+# place: assign a new list or use GateParameter.set_value.
+_SHARED = weakref.WeakValueDictionary()
+
+
+class _Table(list):
+    """A shared table: a list the intern table can hold weakly."""
+    __slots__ = ("__weakref__",)
+
+
+def _table_key(seq):
+    # The type is part of the key: 0, 0.0 and False compare equal but export differently.
+    key = []
+    for v in seq:
+        t = list if isinstance(v, list) else type(v)
+        if t is list:
+            key.append((t, _table_key(v)))
+        elif t is float and v != v:
+            raise TypeError("NaN")          # never equal to itself, would leak one table per use
+        else:
+            key.append((t, v))
+    return tuple(key)
+
+
+def shared_list(seq):
+    """Return the canonical shared list equal to seq."""
+    if seq is None:
+        return None
+    try:
+        key = _table_key(seq)
+        table = _SHARED.get(key)
+    except TypeError:       # unhashable items, keep as-is
+        return seq
+    if table is None:
+        table = _SHARED[key] = _Table(shared_list(v) if isinstance(v, list) else v for v in seq)
+    return table
+
+
+def split_path(path: str) -> tuple[str, str]:
+    """'/vol1/geometry/setXLength' -> ('/vol1', '/geometry/setXLength'), both interned."""
+    cut = path.find("/", 1)
+    if cut < 0:
+        return "", sys.intern(path)
+    return sys.intern(path[:cut]), sys.intern(path[cut:])
+
+
+def _same_table(a, b) -> bool:
+    # Shared tables compare by identity; edited values need a typed comparison.
+    a, b = a or [], b or []
+    if a is b:
+        return True
+    try:
+        return _table_key(a) == _table_key(b)
+    except TypeError:
+        return len(a) == len(b) and all(type(x) is type(y) and x == y for x, y in zip(a, b))
+
+
+def _same_checkbox(x, y) -> bool:
+    # CheckBox values of older files are 0/1 where the factory stores False/True
+    return type(x) in (bool, int) and type(y) in (bool, int) and x == y
+
+
+_UNTRACKED = object()   # factory value of parameters that no factory created
+
+
+def table_keys(params) -> list:
+    """Per parameter, a key equal for parameters holding the same value table and unit (bulk passes group rows by it)."""
+    return [(id(p._default_values), id(p._unit_list), p._unit) for p in params]
+
+
+def _own_list(values):
+    return values if values is None or type(values) is _Table else list(values)
+
+
 class GateParameter(object):
+    # The path is kept as its object part ('/vol1', shared by the rows of one
+    # object) and its row part ('/geometry/setXLength', shared by every object).
+    __slots__ = ("_head", "_tail", "displayed_name", "_input_types", "_default_values", "_value_list",
+                 "_unit_list", "_unit", "_factory_values", "_factory_unit")
+
     def __init__(self, path, displayed_name, input_type_list, default_value_list, value_list, unit_list=None, default_unit=0):
         self.path = path
         self.displayed_name = displayed_name
-        self.input_type_list = input_type_list        
-        self.default_value_list = default_value_list
-        self.value_list = value_list
-        #self.set_value = None
-        self.unit_list = unit_list
-        self.default_unit = default_unit
+        self.input_type_list = input_type_list
+        self._default_values = shared_list(default_value_list)
+        self._value_list = shared_list(value_list)
+        self._unit_list = shared_list(unit_list) if unit_list else unit_list
+        self._unit = None
         if unit_list:
             self.default_unit = unit_list[default_unit]
+        self.mark_pristine()
+
+    @property
+    def path(self) -> str:
+        return self._head + self._tail
+
+    @path.setter
+    def path(self, path):
+        self._head, self._tail = split_path(path)
+
+    @property
+    def head(self) -> str:
+        """Object part of the path ('/vol1'), '' for paths with a single component."""
+        return self._head
+
+    @property
+    def tail(self) -> str:
+        """Rest of the path ('/geometry/setXLength')."""
+        return self._tail
+
+    # ---------------------- shared tables ----------------------
+    @property
+    def default_value_list(self):
+        return self._default_values
+
+    @default_value_list.setter
+    def default_value_list(self, values):
+        self._default_values = _own_list(values)
+
+    def set_value(self, index, value):
+        """Set one entry of default_value_list (copy-on-write, the list may be shared)."""
+        values = list(self._default_values or [])
+        while len(values) <= index:
+            values.append(None)
+        values[index] = value
+        self._default_values = values
+
+    @property
+    def input_type_list(self):
+        return self._input_types
+
+    @input_type_list.setter
+    def input_type_list(self, types):
+        self._input_types = shared_list(types)
+
+    @property
+    def value_list(self):
+        return self._value_list
+
+    @value_list.setter
+    def value_list(self, values):
+        self._value_list = _own_list(values)
+
+    # ---------------------- units ----------------------
+    @property
+    def unit_list(self):
+        return self._unit_list
+
+    @unit_list.setter
+    def unit_list(self, units):
+        current = self.default_unit
+        self._unit_list = shared_list(units) if units else units
+        self._unit = None
+        self.default_unit = current
+
+    @property
+    def default_unit(self):
+        """Chosen unit string; stored as a small index into unit_list."""
+        if type(self._unit) is int and self._unit_list:
+            return self._unit_list[self._unit]
+        return self._unit
+
+    @default_unit.setter
+    def default_unit(self, unit):
+        units = self._unit_list
+        if units and unit in units:
+            self._unit = units.index(unit)
         else:
-            self.default_unit = None
-    
+            self._unit = unit       # None, or a unit outside the list (kept verbatim)
+
+    # ---------------------- changes ----------------------
+    def mark_pristine(self):
+        """Take the current value and unit as the factory state (done on construction)."""
+        self._factory_values = self._default_values
+        self._factory_unit = self._unit
+
+    def untrack(self):
+        """Forget the factory state: the parameter counts as changed (not created by a factory)."""
+        self._factory_values = _UNTRACKED
+
+    def is_changed(self) -> bool:
+        """True when the value or the unit differs from the factory state."""
+        factory = self._factory_values
+        if factory is _UNTRACKED or self._unit != self._factory_unit:
+            return True
+        values = self._default_values
+        if _same_table(values, factory):
+            return False
+        types = self._input_types or ()
+        if "CheckBox" not in types:
+            return True
+        values, factory = values or [], factory or []
+        return len(values) != len(factory) or not all(
+            _same_checkbox(x, y) if i < len(types) and types[i] == "CheckBox" else _same_table([x], [y])
+            for i, (x, y) in enumerate(zip(values, factory)))
+
+    def clone(self, path=None, head=None):
+        """Copy sharing the value/option tables, optionally under another path or object part (interned)."""
+        c = GateParameter.__new__(GateParameter)
+        c._head, c._tail, c.displayed_name = self._head, self._tail, self.displayed_name
+        c._input_types, c._default_values, c._value_list = self._input_types, self._default_values, self._value_list
+        c._unit_list, c._unit = self._unit_list, self._unit
+        c._factory_values, c._factory_unit = self._factory_values, self._factory_unit
+        if path is not None:
+            c.path = path
+        elif head is not None:
+            c._head = head
+        return c
+
     def to_dict(self):
         return {
             "path": self.path,
@@ -31,31 +232,8 @@ class GateParameter(object):
         if not self.unit_list:
             return None  # No unit list to compare
         
-        unit_lists = {
-            "LENGTH_UNITS": StaticData.LENGTH_UNITS,
-            "SURFACE_UNITS": StaticData.SURFACE_UNITS,
-            "VOLUME_UNITS": StaticData.VOLUME_UNITS,
-            "ANGLE_UNITS": StaticData.ANGLE_UNITS,
-            "TIME_UNITS": StaticData.TIME_UNITS,
-            "SPEED_UNITS": StaticData.SPEED_UNITS,
-            "ANGULAR_SPEED_UNITS": StaticData.ANGULAR_SPEED_UNITS,
-            "ENERGY_UNITS": StaticData.ENERGY_UNITS,
-            "ACTIVITY_DOSE_UNITS": StaticData.ACTIVITY_DOSE_UNITS,
-            "AMOUNT_OF_SUBSTANCE_UNITS": StaticData.AMOUNT_OF_SUBSTANCE_UNITS,
-            "MASS_UNITS": StaticData.MASS_UNITS,
-            "VOLUMIC_MASS_UNITS": StaticData.VOLUMIC_MASS_UNITS,
-            "ELECTRIC_CHARGE_UNITS": StaticData.ELECTRIC_CHARGE_UNITS,
-            "ELECTRIC_CURRENT_UNITS": StaticData.ELECTRIC_CURRENT_UNITS,
-            "ELECTRIC_POTENTIAL_UNITS": StaticData.ELECTRIC_POTENTIAL_UNITS,
-            "MAGNETIC_FLUX_UNITS": StaticData.MAGNETIC_FLUX_UNITS,
-            "TEMPERATURE_UNITS": StaticData.TEMPERATURE_UNITS,
-            "FORCE_PRESSURE_UNITS": StaticData.FORCE_PRESSURE_UNITS,
-            "POWER_UNITS": StaticData.POWER_UNITS,
-            "FREQUENCY_UNITS": StaticData.FREQUENCY_UNITS
-        }
-
-        for list_name, predefined_list in unit_lists.items():
-            if set(self.unit_list) == set(predefined_list):  # Compare as sets to avoid order dependency
+        for list_name in StaticData.UNIT_LIST_FACTORS:
+            if set(self.unit_list) == set(getattr(StaticData, list_name)):  # Compare as sets to avoid order dependency
                 return list_name
 
         return "UNKNOWN"  # If no match is found
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Axis-aligned extents of volumes and their subtrees, and mother sizes that fit them.
+
+    bounds = BoundsEngine()
+    lo, hi = bounds.subtree(world)              # (3,) mm, in the world's own frame
+    sizes = bounds.fit(world, margin=10.0)      # {"geometry/setXLength": 1220.0, ...} in mm
+    bounds.parameter_changed(obj, param)        # after an edit (MainWindow does this)
+
+Each volume has three boxes, in mm (rows read through StaticData.LENGTH_UNIT_FACTORS):
+
+  own       the bounding box of its solid (OverlapCheck.solid_of), in its own frame
+  subtree   the own box united with the placed boxes of its enabled daughters
+  placed    the subtree box around every copy of the volume, in its mother's frame
+            (RepeaterExpansion.volume_placements): a copy with rotation R and
+            translation t holds the box of centre R c + t and half size |R| h,
+            and all copies are united in one array step
+
+A volume's boxes depend only on its own rows and on the volumes below it, so
+they are cached per volume. An edit drops the boxes of the edited volume and
+of its ancestors only (O(depth)); every other subtree keeps its boxes, and the
+next query recomputes the path back to the root. Rows that neither size nor
+place anything (materials, vis, ...) drop nothing.
+
+A box around rotated boxes is larger than what they hold, so extents never
+miss anything but can be loose for rotated subtrees. fit sizes round mothers
+(cylinder, sphere) from the corners of each daughter copy instead.
+Volumes of unknown shape or zero size have no own box. An empty box has
+lo = +inf and hi = -inf.
+"""
+import math
+
+import numpy as np
+
+from Classes.OverlapCheck import shape_of, solid_of
+from Classes.RepeaterExpansion import REPEATERS, _command, volume_placements, volume_rows
+from Classes.StaticData import LENGTH_UNIT_FACTORS
+
+_EMPTY = np.array([[np.inf] * 3, [-np.inf] * 3])
+
+# rows set by fit, per mother shape
+FIT_ROWS = {
+    "box": ("geometry/setXLength", "geometry/setYLength", "geometry/setZLength"),
+    "cylinder": ("geometry/setRmax", "geometry/setHeight"),
+    "sphere": ("geometry/setRmax",),
+}
+
+
+def is_geometric(command: str) -> bool:
+    """Whether a row ('geometry/setXLength', 'ring/setRepeatNumber', ...) sizes or places a volume."""
+    head = command.split("/", 1)[0]
+    return head in ("geometry", "placement", "repeaters") or head in REPEATERS
+
+
+def is_empty(box) -> bool:
+    return not np.all(box[1] >= box[0])
+
+
+def format_extent(box) -> str:
+    """'x -10 .. 10, y -5 .. 5, z 0 .. 30 mm (20 x 10 x 30 mm)', or 'empty'."""
+    if is_empty(box):
+        return "empty"
+    lo, hi = box
+    axes = ", ".join(f"{a} {lo[i]:.6g} .. {hi[i]:.6g}" for i, a in enumerate("xyz"))
+    size = " x ".join(f"{v:.6g}" for v in hi - lo)
+    return f"{axes} mm ({size} mm)"
+
+
+def placed_box(box, placements) -> np.ndarray:
+    """(2, 3) box around a (2, 3) box carried by every placement (N, 4, 4)."""
+    if is_empty(box):
+        return _EMPTY.copy()
+    center, half = (box[0] + box[1]) / 2.0, (box[1] - box[0]) / 2.0
+    rot = placements[:, :3, :3]
+    centers = rot @ center + placements[:, :3, 3]
+    reach = np.abs(rot) @ half
+    return np.array([(centers - reach).min(axis=0), (centers + reach).max(axis=0)])
+
+
+class Extent(object):
+    """The cached boxes of one volume, (2, 3) arrays [lo, hi] in mm."""
+    __slots__ = ("own", "content", "subtree", "placed", "copies")
+
+    def __init__(self, own, content, placements):
+        self.own = own
+        self.content = content      # the daughters' placed boxes, united
+        self.subtree = np.array([np.minimum(own[0], content[0]), np.maximum(own[1], content[1])])
+        self.placed = placed_box(self.subtree, placements)
+        self.copies = len(placements)
+
+
+class BoundsEngine(object):
+    """Extents of the volumes of a tree, cached per volume (see the module doc)."""
+
+    def __init__(self):
+        self._entries = {}
+        self.computed = 0       # volumes measured so far (the cost of the queries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ---------------------- queries ----------------------
+    def extent(self, obj) -> Extent:
+        """obj's boxes, measuring the volumes below it that are not cached."""
+        entry = self._entries.get(obj)
+        if entry is not None:
+            return entry
+        stack = [(obj, False)]      # post-order without recursion: trees can be deep
+        while stack:
+            node, ready = stack.pop()
+            if node in self._entries:
+                continue
+            daughters = [d for d in node.daughters if getattr(d, "enabled", True)]
+            if ready:
+                self._entries[node] = self._measure(node, daughters)
+            else:
+                stack.append((node, True))
+                stack.extend((d, False) for d in daughters if d not in self._entries)
+        return self._entries[obj]
+
+    def _measure(self, obj, daughters) -> Extent:
+        rows = volume_rows(obj)     # read once for the shape and the placements
+        solid = solid_of(obj, rows)
+        own = _EMPTY if solid is None or solid.empty else np.array([solid.center - solid.half,
+                                                                    solid.center + solid.half])
+        content = _EMPTY
+        if daughters:
+            placed = np.array([self._entries[d].placed for d in daughters])
+            content = np.array([placed[:, 0].min(axis=0), placed[:, 1].max(axis=0)])
+        self.computed += 1
+        return Extent(own, content, volume_placements(obj, rows))
+
+    def own(self, obj) -> np.ndarray:
+        return self.extent(obj).own
+
+    def subtree(self, obj) -> np.ndarray:
+        return self.extent(obj).subtree
+
+    def placed(self, obj) -> np.ndarray:
+        return self.extent(obj).placed
+
+    # ---------------------- invalidation ----------------------
+    def invalidate(self, obj):
+        """obj (or what is below it) changed: drop its boxes and those of its ancestors."""
+        while obj is not None:
+            self._entries.pop(obj, None)
+            obj = obj.parent
+
+    def invalidate_subtree(self, obj):
+        """obj and everything below it changed (e.g. enabled): drop the boxes of the subtree and of the ancestors."""
+        stack = list(obj.daughters)
+        while stack:
+            node = stack.pop()
+            self._entries.pop(node, None)
+            stack.extend(node.daughters)
+        self.invalidate(obj)
+
+    def parameter_changed(self, obj, param):
+        if obj is not None and is_geometric(_command(param.path)):
+            self.invalidate(obj)
+
+    def clear(self):
+        self._entries = {}
+
+    # ---------------------- fitting ----------------------
+    def fit(self, obj, margin: float = 0.0) -> dict:
+        """
+        Sizes (row -> mm) of obj's shape, centred on its origin, that hold its
+        daughters' copies with margin (mm) to spare on every side; {} when obj has
+        no daughters or its shape is not a box, cylinder or sphere.
+        """
+        shape = shape_of(obj)
+        content = self.extent(obj).content
+        if shape not in FIT_ROWS or is_empty(content):
+            return {}
+        reach = np.maximum(np.abs(content[0]), np.abs(content[1]))      # the shape is symmetric about its origin
+        if shape == "box":
+            values = 2.0 * (reach + margin)
+        else:
+            # round shapes: the corners of every daughter copy's box, not the box around them all
+            points = self._corners(obj)
+            if shape == "cylinder":
+                values = (np.hypot(points[:, 0], points[:, 1]).max() + margin, 2.0 * (reach[2] + margin))
+            else:
+                values = (np.linalg.norm(points, axis=1).max() + margin,)
+        return {row: float(v) for row, v in zip(FIT_ROWS[shape], values)}
+
+    def _corners(self, obj) -> np.ndarray:
+        """(k, 3) corners of the subtree boxes of obj's daughters, at each of their copies."""
+        signs = np.array([[x, y, z] for x in (-1.0, 1.0) for y in (-1.0, 1.0) for z in (-1.0, 1.0)])
+        out = []
+        for d in obj.daughters:
+            box = self.subtree(d) if getattr(d, "enabled", True) else _EMPTY
+            if is_empty(box):
+                continue
+            corners = (box[0] + box[1]) / 2.0 + signs * (box[1] - box[0]) / 2.0
+            placements = volume_placements(d)
+            out.append((np.einsum("nij,kj->nki", placements[:, :3, :3], corners) + placements[:, None, :3, 3]).reshape(-1, 3))
+        return np.concatenate(out)
+
+
+def apply_sizes(obj, sizes: dict) -> list:
+    """
+    Write sizes (row -> mm, from BoundsEngine.fit) into obj's rows, each in its
+    own unit; returns [(param, old values, old unit)] of the rows that changed.
+    """
+    name = obj.get_name()
+    changed = []
+    for row, mm in sizes.items():
+        param = obj.get_parameter(f"/{name}/{row}")
+        if param is None:
+            continue
+        unit = param.default_unit if param.default_unit in LENGTH_UNIT_FACTORS else "mm"
+        value = mm / LENGTH_UNIT_FACTORS[unit]
+        value = math.ceil(value * 1e6) / 1e6        # never below the fitted size
+        if list(param.default_value_list or []) == [value] and param.default_unit == unit:
+            continue
+        changed.append((param, param.default_value_list, param.default_unit))
+        param.default_value_list = [value]
+        param.default_unit = unit
+    return changed
@@ -0,0 +1,327 @@
+# Classes/IO/edit_journal.py
+"""
+Append-only journal of edits made since the project file was last written.
+
+    <project>.journal      one compact JSON record per line, appended per edit
+    <project>.journal.old  records being folded into the project file (compaction)
+
+Recording an edit costs one short line, whatever the size of the project. The
+project file itself is only rewritten by compaction: compact() moves the
+journal aside, and a background thread folds its records into the project
+file (fold_records: the file as last written, loaded into a tree of its own,
+with the records replayed onto it), writes the result and drops the records
+it covers. The open tree is never read, so the UI thread pays for moving a
+file, not for the project. Replacing the project file is safe while the open
+tree still has unopened .ctproj sections: ProjectArchive keeps the chunks it
+read in memory. After a crash, replay() re-applies both files onto
+the project loaded from disk.
+
+Records name objects by the chain of names below the root (["world", "crystal"])
+and parameters by label and occurrence, like the "2.0" snapshots. They are
+numbered: a compacted snapshot stores the last number it covers (its
+"journal_seq"), so a crash between writing the project file and deleting the
+.old file does not replay those records a second time.
+"""
+from __future__ import annotations
+import json
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from Classes.GateObject import GateObject
+from Classes.GObjectCreator import GObjectCreator
+from Classes.IO.project_io import ProjectSnapshot, load_project_tree
+from Classes.IO.project_archive import ProjectArchive, is_project_archive
+from Classes.RepeaterParameterBuilder import RepeaterParameterBuilder
+
+SUFFIX = ".journal"
+COMPACTING_SUFFIX = ".journal.old"
+
+
+def object_key(obj: GateObject) -> List[str]:
+    names = []
+    while obj.parent is not None:
+        names.append(obj.get_name())
+        obj = obj.parent
+    return names[::-1]
+
+
+def resolve_object(root: GateObject, key: List[str]) -> Optional[GateObject]:
+    obj = root
+    for name in key:
+        obj = next((d for d in obj.daughters if d.get_name() == name), None)
+        if obj is None:
+            return None
+    return obj
+
+
+def _parameter_ref(obj: GateObject, param) -> Dict[str, Any]:
+    if param.displayed_name:
+        same = obj.peek_parameters_by_label(param.displayed_name)
+        return {"label": param.displayed_name, "n": next((i for i, p in enumerate(same) if p is param), 0)}
+    same = obj.get_parameters(param.path)
+    return {"param": param.path, "n": next((i for i, p in enumerate(same) if p is param), 0)}
+
+
+def _create_child(parent: GateObject, record: Dict[str, Any], material_db) -> GateObject:
+    name, kind, subtype = record["name"], record["kind"], record.get("type")
+    if kind == "source":
+        return GObjectCreator.create_source_child(name, subtype)
+    if kind == "distribution":
+        return GObjectCreator.create_distribution_child(name, subtype)
+    if kind == "volume":
+        obj = GObjectCreator.create_world_daughter(name, subtype, material_db)
+        if record.get("repeater"):
+            obj.parameters.extend(RepeaterParameterBuilder.get_parameters(name, record["repeater"]))
+        return obj
+    raise ValueError(f"unknown object kind '{kind}'")
+
+
+def apply_edit(root: GateObject, record: Dict[str, Any], material_db=None) -> bool:
+    """Apply one journal record to the tree; False when its target does not exist."""
+    op = record.get("op")
+    obj = resolve_object(root, record.get("obj") or [])
+    if op == "add":
+        if obj is None:
+            return False
+        if not any(d.get_name() == record["name"] for d in obj.daughters):
+            obj.add_daughter(_create_child(obj, record, material_db))
+        return True
+    if obj is None:
+        return False
+    if op == "insert":
+        node = record["node"]
+        if not any(d.get_name() == node["name"] for d in obj.daughters):
+            ProjectSnapshot(material_db).apply_node(obj, {"children": [node]})
+            child = next((d for d in obj.daughters if d.get_name() == node["name"]), None)
+            if child is None:
+                return False
+            obj.remove_daughter(child)
+            obj.insert_daughter(min(record.get("row", 0), len(obj.daughters)), child)
+        return True
+    if op == "set":
+        if "label" in record:
+            params = obj.get_parameters_by_label(record["label"])
+        else:
+            params = obj.get_parameters(record["param"])
+        n = record.get("n", 0)
+        if n >= len(params):
+            return False
+        params[n].default_value_list = list(record.get("values") or [])
+        if "unit" in record:
+            params[n].default_unit = record["unit"]
+        return True
+    if op == "rename":
+        obj.name = record["name"]
+        return True
+    if op == "remove":
+        if obj.parent is not None:
+            obj.parent.remove_daughter(obj)
+        return True
+    raise ValueError(f"unknown journal record '{op}'")
+
+
+def read_records(path: str, after: int = 0):
+    """Records of one journal file numbered above after; stops at a torn line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if record.get("seq", 0) > after:
+                yield record
+
+
+def fold_records(project_path: str, journal_path: str, material_db=None, material_db_paths=None,
+                 gate_version=(9, 2, 0)) -> Dict[str, Any]:
+    """
+    The document of project_path with the records of journal_path it does not
+    cover yet (by its "journal_seq") applied: what the project file should
+    hold after compaction. Works on a tree of its own, safe to run in a thread.
+    """
+    if is_project_archive(project_path):
+        data = ProjectArchive(project_path)
+        saved = data.head.get("journal_seq", 0)
+    else:
+        with open(project_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        saved = data.get("journal_seq", 0)
+    root = load_project_tree(data, material_db, gate_version)
+    for record in read_records(journal_path, saved):
+        apply_edit(root, record, material_db)
+    return ProjectSnapshot(material_db).build(root, material_db_paths)
+
+
+class EditJournal:
+    """
+    Journal of one project file; records are dropped while no file is attached
+    (an unsaved project has nowhere to be recovered from).
+    """
+    def __init__(self):
+        self.project_path: Optional[str] = None
+        self.seq = 0                # number of the last record
+        self.saved_seq = 0          # last record the project file covers
+        self.pending = 0            # records not yet folded into the project file
+        self._file = None
+        self._compaction: Optional[Future] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def path(self) -> Optional[str]:
+        return self.project_path + SUFFIX if self.project_path else None
+
+    @property
+    def compacting_path(self) -> Optional[str]:
+        return self.project_path + COMPACTING_SUFFIX if self.project_path else None
+
+    # ---------------------- files ----------------------
+    def attach(self, project_path: Optional[str], saved_seq: int = 0):
+        """
+        Journal edits of project_path from now on. saved_seq is the "journal_seq"
+        of the file as loaded; later records are kept for replay.
+        """
+        self.wait()
+        self._close()
+        self.project_path = os.path.abspath(project_path) if project_path else None
+        self.saved_seq = self.seq = saved_seq
+        self.pending = 0
+        for record in self._records():
+            self.seq = max(self.seq, record["seq"])
+            self.pending += 1
+
+    def discard(self):
+        """Forget the records of the attached file (it was just written in full)."""
+        self.wait()
+        self._close()
+        for path in (self.path, self.compacting_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+        self.seq = self.saved_seq = self.pending = 0
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _append(self, record: Dict[str, Any]):
+        if self.project_path is None:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self.seq += 1
+        record["seq"] = self.seq
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self.pending += 1
+
+    def _records(self):
+        """Records not in the project file, compacting file first; stops at a torn line."""
+        for path in (self.compacting_path, self.path):
+            if path and os.path.exists(path):
+                yield from read_records(path, self.saved_seq)
+
+    # ---------------------- edits ----------------------
+    def set_parameter(self, obj: GateObject, param):
+        record = {"op": "set", "obj": object_key(obj), **_parameter_ref(obj, param),
+                  "values": list(param.default_value_list or [])}
+        if param.default_unit is not None:
+            record["unit"] = param.default_unit
+        self._append(record)
+
+    def rename(self, obj: GateObject, old_name: str):
+        key = object_key(obj)
+        self._append({"op": "rename", "obj": key[:-1] + [old_name], "name": obj.get_name()})
+
+    def add(self, obj: GateObject, kind: str, subtype: str):
+        """obj was just added to its parent; kind is 'source', 'distribution' or 'volume'."""
+        record = {"op": "add", "obj": object_key(obj.parent), "name": obj.get_name(), "kind": kind, "type": subtype}
+        if kind == "volume":
+            # WorldObjectPopup appends the repeater rows, the first one is "/<name>/repeaters/insert <type>"
+            insert = next((p.path for p in obj.peek_parameters() if "/repeaters/insert " in p.path), None)
+            if insert:
+                record["repeater"] = insert.rsplit(" ", 1)[1]
+        self._append(record)
+
+    def insert(self, obj: GateObject):
+        """obj, with its subtree and values, was just put back under its parent (undo of a delete)."""
+        parent = obj.parent
+        self._append({"op": "insert", "obj": object_key(parent), "row": parent.daughters.index(obj),
+                      "node": ProjectSnapshot().build_node(obj)})
+
+    def remove(self, obj: GateObject):
+        """obj is about to be removed from its parent."""
+        self._append({"op": "remove", "obj": object_key(obj)})
+
+    # ---------------------- recovery / compaction ----------------------
+    def replay(self, root: GateObject, material_db=None) -> tuple[int, int]:
+        """Apply the attached file's records onto root; returns (applied, skipped)."""
+        applied = skipped = 0
+        for record in self._records():
+            if apply_edit(root, record, material_db):
+                applied += 1
+            else:
+                skipped += 1
+        return applied, skipped
+
+    def compacting(self) -> bool:
+        return self._compaction is not None and not self._compaction.done()
+
+    def check(self) -> Optional[BaseException]:
+        """Error of the last compaction once it finished (reported once), else None."""
+        future = self._compaction
+        if future is None or not future.done():
+            return None
+        self._compaction = None
+        return future.exception()
+
+    def compact(self, fold: Callable[[str, str], Dict[str, Any]],
+                write: Callable[[Dict[str, Any]], Any]) -> Optional[Future]:
+        """
+        Fold the records into the project file: the journal is moved aside now
+        (new edits go to a fresh one), then a background thread calls
+        fold(project path, moved journal path) for the new document (see
+        fold_records) and write(document) to save it. Returns the Future of
+        that work, None if there is nothing to do.
+        """
+        if self.project_path is None or self.compacting():
+            return None
+        if not self.pending and not os.path.exists(self.compacting_path):
+            return None     # nothing new, and no failed compaction to retry
+        seq = self.saved_seq = self.seq
+        self._close()
+        if os.path.exists(self.path):
+            if os.path.exists(self.compacting_path):
+                # an earlier compaction failed: its records stay until one succeeds
+                with open(self.path, "r", encoding="utf-8") as src, \
+                        open(self.compacting_path, "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.compacting_path)
+        self.pending = 0
+        project_path, compacting_path = self.project_path, self.compacting_path
+
+        def run():
+            document = fold(project_path, compacting_path)
+            document["journal_seq"] = seq
+            write(document)
+            if os.path.exists(compacting_path):
+                os.remove(compacting_path)
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1)
+        self._compaction = self._pool.submit(run)
+        return self._compaction
+
+    def wait(self) -> Optional[BaseException]:
+        """Block until a running compaction finished; returns its error, if any."""
+        future, self._compaction = self._compaction, None
+        return future.exception() if future is not None else None
+
+    def close(self):
+        self.wait()
+        self._close()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,123 @@
+# Classes/IO/json_stream.py
+"""
+Incremental reader of one JSON document, for files too large to json.load.
+
+    stream = JsonStream(f)                  # f opened in binary mode
+    for key in stream.items():              # walk an object key by key
+        if key == "children":
+            for _ in stream.elements():     # ... or an array element by element
+                handle(stream.value())
+        else:
+            head[key] = stream.value()      # decode one whole value
+
+The caller decides how deep to walk: everything it reads with value() is
+decoded by the C scanner of the json module, and only the file window being
+parsed is kept in memory. Each key or element yielded must be consumed (with
+value(), items() or elements()) before the iteration continues.
+"""
+from __future__ import annotations
+import codecs
+import json
+import re
+from typing import BinaryIO, Iterator
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_KEY = re.compile(r'"([^"\\]*)"[ \t\n\r]*:')     # a key without escapes, and its colon
+
+
+class JsonStream:
+    def __init__(self, f: BinaryIO, chunk_size: int = CHUNK_SIZE):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._scanner = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0         # progress: bytes taken from the file so far
+
+    def _fill(self) -> bool:
+        """Read more of the file into the window; False at the end of the file."""
+        if self._eof:
+            return False
+        # grow reads with the pending text so a long value is rescanned O(log n) times
+        chunk = self._file.read(max(self._chunk_size, len(self._buf) - self._pos))
+        self.bytes_read += len(chunk)
+        self._eof = not chunk
+        self._buf = self._buf[self._pos:] + self._decoder.decode(chunk, final=self._eof)
+        self._pos = 0
+        return not self._eof
+
+    def _offset(self, pos: int) -> int:
+        """File offset of position pos of the window."""
+        return self.bytes_read - len(self._buf[pos:].encode("utf-8"))
+
+    def _error(self, expected: str) -> ValueError:
+        found = self._buf[self._pos:self._pos + 20] or "end of file"
+        return ValueError(f"expected {expected} at byte {self._offset(self._pos)}, found {found!r}")
+
+    def peek(self) -> str:
+        """Next significant character ("" at the end of the file)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._fill():
+                return self._buf[self._pos:self._pos + 1]
+
+    def _expect(self, chars: str) -> str:
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise self._error(" or ".join(repr(c) for c in chars))
+        self._pos += 1
+        return ch
+
+    def value(self):
+        """Decode the next whole value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._scanner.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                # e's line and column count from the window, not the file
+                raise ValueError(f"{e.msg} at byte {self._offset(e.pos)}") from None
+            # a number (or anything) ending at the window's edge may go on in the next chunk
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+    def items(self) -> Iterator[str]:
+        """Walk the next value, which must be an object; yields its keys."""
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error("a key")
+            match = _KEY.match(self._buf, self._pos)
+            if match is not None and match.end() < len(self._buf):
+                key = match.group(1)
+                self._pos = match.end()
+            else:
+                key = self.value()      # escaped, or cut by the window's edge
+                self._expect(":")
+            yield key
+            if self._expect(",}") == "}":
+                return
+
+    def elements(self) -> Iterator[int]:
+        """Walk the next value, which must be an array; yields element indices."""
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        i = 0
+        while True:
+            yield i
+            i += 1
+            if self._expect(",]") == "]":
+                return
@@ -0,0 +1,390 @@
+# Classes/IO/macro_io.py
+from __future__ import annotations
+import os
+from typing import IO, Iterable, Iterator
+
+from Classes.GateObject import GateObject
+from Classes.GateParameter import GateParameter
+import Classes.StaticData as StaticData
+
+# Top-level nodes are rendered in the order GATE expects them, not in tree order.
+# "@initialize" / "@start" are run commands inserted between sections.
+SECTION_ORDER = (
+    "gate", "vis", "world", "physics", "@initialize",
+    "digitizer", "distributions", "source", "output", "acquisition", "verbose", "@start",
+)
+RUN_COMMANDS = {
+    "@initialize": "/gate/run/initialize",
+    "@start": "/gate/application/start",
+}
+
+# Prefix used when a parameter path is relative to its section rather than to /gate.
+_SECTION_PREFIX = {
+    "vis": "/vis",
+    "physics": "/gate/physics",
+}
+
+# Shape names of create_world_daughter -> GATE "daughters/insert" keyword
+_GATE_SHAPES = {
+    "elliptical tube": "eltub",
+    "hexagon": "hexagone",
+    "tet-mesh-box": "TetMeshBox",
+}
+
+# Only real physical units get appended after the values; other unit_list
+# contents (e.g. INC_EXC on /vis rows) are UI metadata.
+_UNIT_TOKENS = frozenset(
+    unit
+    for attr in dir(StaticData) if attr.endswith("_UNITS")
+    for unit in getattr(StaticData, attr)
+)
+
+# Unit names of StaticData that Geant4 spells differently (G4UnitsTable symbols)
+_GEANT4_UNITS = {"KeV": "keV", "j": "J", "mum": "um", "mus": "us"}
+
+# Values that mean "not set" in the builders
+_UNSET = frozenset({"", "-", "NaN", "(none)"})
+
+# Commands that take no argument: emitted bare when their CheckBox is checked
+_FLAG_COMMANDS = frozenset({"enableAutoRotation"})
+
+# Rows where 0 means "not used": spherical placement would override setTranslation,
+# and a zero-length slice would switch the acquisition to variable-slice mode
+_SKIP_WHEN_ZERO = frozenset({"setPhiOfTranslation", "setThetaOfTranslation", "setMagOfTranslation", "addSlice"})
+
+# Source rows that only apply to some choices of a sibling row (Geant4 rejects
+# /gps/ion unless the particle is "ion"): command -> (sibling command, values)
+_ION_PARTICLES = frozenset({"ion", "GenericIon"})
+_SOURCE_DEPENDS_ON = {
+    "ion": ("particle", _ION_PARTICLES),
+    "setIonProperties": ("setParticleType", _ION_PARTICLES),
+    "shape": ("type", frozenset({"Plane", "Surface", "Volume"})),   # Point and Beam have none
+}
+
+# (/gps/type, /gps/shape) -> the size commands that shape reads
+_GPS_SIZES = {
+    ("Plane", "Circle"): {"radius"},
+    ("Plane", "Annulus"): {"radius"},
+    ("Plane", "Ellipsoid"): {"halfx", "halfy"},
+    ("Plane", "Square"): {"halfx", "halfy"},
+    ("Plane", "Rectangle"): {"halfx", "halfy"},
+    **{(domain, shape): sizes
+       for domain in ("Surface", "Volume")
+       for shape, sizes in (("Sphere", {"radius"}), ("Ellipsoid", {"halfx", "halfy", "halfz"}),
+                            ("Cylinder", {"radius", "halfz"}), ("Para", {"halfx", "halfy", "halfz"}))},
+}
+_GPS_SIZE_COMMANDS = frozenset({"radius", "halfx", "halfy", "halfz"})
+
+
+def _is_unset(v) -> bool:
+    if v is None:
+        return True
+    if isinstance(v, str):
+        return v.strip() in _UNSET
+    return False
+
+
+def _fmt(v) -> str:
+    if isinstance(v, bool):
+        return "1" if v else "0"
+    return str(v).strip()
+
+
+def _unit(u: str) -> str:
+    return _GEANT4_UNITS.get(u, u)
+
+
+class MacroExporter:
+    """
+    Render a GateObject tree to GATE macro commands.
+
+    The tree is walked once and lines are produced lazily, so a macro is never
+    held in memory as a whole: write() streams them straight to the file handle.
+    """
+    def __init__(self, material_db_path: str | list[str] | None = None, include_run_commands: bool = True):
+        # one path or several (a setMaterialDatabase line each, in priority order)
+        self.material_db_paths = [material_db_path] if isinstance(material_db_path, str) else list(material_db_path or [])
+        self.include_run_commands = include_run_commands
+
+    # ---------------------- plan ----------------------
+    def _plan(self, root: GateObject) -> Iterator[tuple[str, GateObject | None]]:
+        """Yield (section, node) in macro order; node is None for run commands."""
+        by_name = {c.get_name(): c for c in root.get_daughters()}
+        yield "gate", root
+        for name in SECTION_ORDER[1:]:
+            if name in RUN_COMMANDS:
+                if self.include_run_commands:
+                    yield name, None
+                continue
+            if name in by_name:
+                yield name, by_name.pop(name)
+        # anything the order table doesn't know about goes last, in tree order
+        for name, node in by_name.items():
+            yield name, node
+
+    def iter_sections(self, root: GateObject) -> Iterator[tuple[str, Iterator[str]]]:
+        """Yield (section name, line iterator) pairs. Each section is walked once."""
+        for section, node in self._plan(root):
+            if node is None:
+                yield section, iter((RUN_COMMANDS[section],))
+            elif section == "gate":
+                yield section, self._root_lines(node)
+            else:
+                yield section, self._section_lines(section, node)
+
+    def iter_lines(self, root: GateObject) -> Iterator[str]:
+        yield "# GATE macro generated by CTCommander"
+        for section, lines in self.iter_sections(root):
+            first = True
+            for line in lines:
+                if first and section not in RUN_COMMANDS:
+                    yield ""
+                    yield f"# ---- {section} ----"
+                first = False
+                yield line
+
+    # ---------------------- writers ----------------------
+    def write(self, root: GateObject, target: str | os.PathLike | IO[str]) -> int:
+        """Stream the whole macro to a path or an open text handle. Returns the line count."""
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, "w", encoding="utf-8", newline="\n") as f:
+                return self._write_lines(f, self.iter_lines(root))
+        return self._write_lines(target, self.iter_lines(root))
+
+    def write_split(self, root: GateObject, out_dir: str | os.PathLike, main_name: str = "main.mac") -> list[str]:
+        """
+        Write one <section>.mac per top-level node plus a main macro that
+        /control/execute's them in order. Returns the written file paths.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        written = []
+        main_path = os.path.join(out_dir, main_name)
+        with open(main_path, "w", encoding="utf-8", newline="\n") as main:
+            main.write("# GATE macro generated by CTCommander\n")
+            for section, lines in self.iter_sections(root):
+                if section in RUN_COMMANDS:
+                    self._write_lines(main, lines)
+                    continue
+                file_name = f"{section}.mac"
+                path = os.path.join(out_dir, file_name)
+                with open(path, "w", encoding="utf-8", newline="\n") as f:
+                    count = self._write_lines(f, lines)
+                if count:
+                    main.write(f"/control/execute {file_name}\n")
+                    written.append(path)
+                else:
+                    os.remove(path)
+        written.insert(0, main_path)
+        return written
+
+    @staticmethod
+    def _write_lines(f: IO[str], lines: Iterable[str]) -> int:
+        count = 0
+        write = f.write
+        for line in lines:
+            write(line)
+            write("\n")
+            count += 1
+        return count
+
+    # ---------------------- sections ----------------------
+    def _root_lines(self, root: GateObject) -> Iterator[str]:
+        if self.material_db_paths:
+            for path in self.material_db_paths:
+                yield f"/gate/geometry/setMaterialDatabase {path}"
+            return
+        yield from self._param_lines(root, "gate")
+
+    def _section_lines(self, section: str, node: GateObject) -> Iterator[str]:
+        # iterative pre-order walk; deep geometry trees must not hit the recursion limit
+        stack = [node]
+        while stack:
+            obj = stack.pop()
+            if not getattr(obj, "enabled", True):
+                continue
+            yield from self._header_lines(obj)
+            yield from self._param_lines(obj, section)
+            yield from self._system_lines(obj)
+            stack.extend(reversed(obj.get_daughters()))
+
+    def _header_lines(self, obj: GateObject) -> Iterator[str]:
+        """Structural commands that must precede a dynamic node's parameters."""
+        node_type = obj.get_type()
+        name = obj.get_name()
+        if node_type == "world":
+            parent = obj.get_parent()
+            shape = getattr(obj, "shape", None) or obj.subtype or "box"
+            yield f"/gate/{parent.get_name() if parent else 'world'}/daughters/name {name}"
+            yield f"/gate/{parent.get_name() if parent else 'world'}/daughters/insert {_GATE_SHAPES.get(shape, shape)}"
+        elif node_type == "source":
+            yield f"/gate/source/addSource {name} {getattr(obj, 'source_type', None) or obj.subtype or 'gps'}"
+        elif node_type == "distributions":
+            dtype = getattr(obj, "distribution_type", None) or obj.subtype
+            yield f"/gate/distributions/name {name}"
+            if dtype:
+                yield f"/gate/distributions/insert {dtype}"
+
+    def _system_lines(self, obj: GateObject) -> Iterator[str]:
+        if obj.is_system_root() or obj.get_type() != "world":
+            return
+        if obj.system_name and obj.system_level:
+            yield f"/gate/systems/{obj.system_name}/{obj.system_level}/attach {obj.get_name()}"
+
+    # ---------------------- parameters ----------------------
+    def _rebase(self, obj: GateObject, params):
+        """
+        Return a function mapping a stored parameter path to the node's current
+        name. Builders bake the creation-time name into paths (template rows
+        the placeholder name), renames don't.
+        """
+        node_type = obj.get_type()
+        name = obj.get_name()
+        if node_type == "world" and params:
+            old = params[0].path.split("/", 2)[1]
+            if old != name:
+                head = f"/{old}/"
+                return lambda p: f"/{name}/{p[len(head):]}" if p.startswith(head) else p
+        elif node_type in ("source", "distributions") and obj.path:
+            old_base = obj.path
+            new_base = f"{old_base.rsplit('/', 1)[0]}/{name}"
+            if old_base != new_base:
+                head = f"{old_base}/"
+                return lambda p: f"{new_base}/{p[len(head):]}" if p.startswith(head) else p
+        return None
+
+    def _command(self, section: str, obj: GateObject, path: str) -> str:
+        if path.startswith("/gate/"):
+            return path
+        prefix = _SECTION_PREFIX.get(section)
+        if prefix and not path.startswith(f"/{obj.get_name()}/"):
+            return f"{prefix}{path}"
+        return f"/gate{path}"
+
+    def _param_lines(self, obj: GateObject, section: str) -> Iterator[str]:
+        params = obj.peek_parameters()     # template-backed volumes are not materialized
+        rebase = self._rebase(obj, params)
+        skipped_move = None     # kind of the /moves/insert block currently disabled
+        by_suffix = None        # lazily built for the few rows that reference a sibling
+
+        for i, p in enumerate(params):
+            path = p.path or ""
+            if "__" in path or " (" in path:
+                continue    # UI-only rows and annotated variants (resolved below)
+            types = p.input_type_list or []
+            if "Label" in types:
+                continue
+            if obj.get_type() == "distributions" and path in ("/distributions/name", "/distributions/insert"):
+                continue    # emitted by _header_lines
+            if rebase:
+                path = rebase(path)
+
+            # /moves/insert CheckBox rows switch the following block on/off
+            if path.endswith("/moves/insert"):
+                nxt = params[i + 1].path if i + 1 < len(params) else ""
+                kind = nxt.rsplit("/", 2)[-2] if nxt.count("/") >= 2 else ""
+                enabled = bool(p.default_value_list and p.default_value_list[0])
+                skipped_move = None if enabled else kind
+                if enabled and kind:
+                    yield f"{self._command(section, obj, path)} {kind}"
+                continue
+            if skipped_move and f"/{skipped_move}/" in path:
+                continue
+
+            if section == "physics" and path.startswith("/physics/"):
+                yield from self._physics_process_lines(path, p)
+                continue
+
+            if "<digitizerName>" in path:
+                if by_suffix is None:
+                    by_suffix = {q.path.rsplit("/", 1)[-1]: q for q in params}
+                holder = by_suffix.get("__digitizerName")
+                dname = holder.default_value_list[0] if holder and holder.default_value_list else ""
+                if _is_unset(dname):
+                    continue
+                path = path.replace("<digitizerName>", str(dname).strip())
+
+            values = self._values(p, types)
+            if values is None:
+                continue
+
+            command = path.rsplit("/", 1)[-1]
+            if obj.get_type() == "source":
+                if by_suffix is None:
+                    by_suffix = {q.path.rsplit("/", 1)[-1]: q for q in params}
+                if not self._source_row_applies(command, by_suffix):
+                    continue
+            if command in _SKIP_WHEN_ZERO and values and values[0] in ("0", "0.0"):
+                continue
+            if command in _FLAG_COMMANDS:
+                if values and values[0] == "1":
+                    yield self._command(section, obj, path)
+                continue
+            if command == "setEngineSeed" and values == ["manual"]:
+                if by_suffix is None:
+                    by_suffix = {q.path.rsplit("/", 1)[-1]: q for q in params}
+                manual = by_suffix.get("setEngineSeed (manual value)")
+                seed = manual.default_value_list[0] if manual and manual.default_value_list else None
+                if _is_unset(seed):
+                    continue
+                values = [_fmt(seed)]
+
+            line = self._command(section, obj, path)
+            if values:
+                line = f"{line} {' '.join(_unit(v) if v in _UNIT_TOKENS else v for v in values)}"
+            unit = p.default_unit
+            if unit in _UNIT_TOKENS and not any(v in _UNIT_TOKENS for v in values):
+                line = f"{line} {_unit(unit)}"
+            yield line
+
+    def _source_row_applies(self, command: str, by_suffix: dict) -> bool:
+        """Whether a source row is used with the particle, domain and shape chosen on its siblings."""
+        def chosen(sibling):
+            q = by_suffix.get(sibling)
+            values = self._values(q, q.input_type_list or []) if q is not None else None
+            return values[0] if values else None
+
+        depends = _SOURCE_DEPENDS_ON.get(command)
+        if depends is not None:
+            return chosen(depends[0]) in depends[1]
+        if command in _GPS_SIZE_COMMANDS:
+            return command in _GPS_SIZES.get((chosen("type"), chosen("shape")), ())
+        return True
+
+    def _values(self, p: GateParameter, types: list[str]) -> list[str] | None:
+        """Rendered values of a row, or None when the row should not be emitted."""
+        if not types:
+            return []   # the command is fully spelled in the path (e.g. "repeaters/insert ring")
+
+        defaults = p.default_value_list or []
+        options = p.value_list or []
+        out: list[str] = []
+        for i, t in enumerate(types):
+            v = defaults[i] if i < len(defaults) else None
+            if t == "DropDown":
+                opts = options[i] if i < len(options) and isinstance(options[i], list) else None
+                if isinstance(v, list):
+                    return None     # never chosen: the builder stored the option list itself
+                if opts and isinstance(v, int) and not isinstance(v, bool) and v not in opts and 0 <= v < len(opts):
+                    v = opts[v]     # index-style defaults (e.g. /vis/setColor)
+                if p.path.endswith("/insert") and opts == ["False", "True"]:
+                    if str(v) != "True":
+                        return None
+                    module = p.displayed_name.split(" ", 1)[-1]
+                    v = module[:1].lower() + module[1:]
+            elif t == "Select":
+                chosen = options[i] if i < len(options) else None
+                v = chosen if not _is_unset(chosen) else v
+            if _is_unset(v):
+                return None
+            out.append(_fmt(v))
+        return out
+
+    @staticmethod
+    def _physics_process_lines(path: str, p: GateParameter) -> Iterator[str]:
+        # Rows added by PhysicsProcessPopup: /physics/<process> with [particle, model]
+        process = path.rsplit("/", 1)[-1]
+        values = list(p.default_value_list or []) + [None, None]
+        particle, model = values[0], values[1]
+        yield f"/gate/physics/addProcess {process}" + ("" if _is_unset(particle) else f" {_fmt(particle)}")
+        if not _is_unset(model):
+            yield f"/gate/physics/processes/{process}/setModel {_fmt(model)}"
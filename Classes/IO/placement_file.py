@@ -0,0 +1,303 @@
+# Classes/IO/placement_file.py
+"""
+GATE placement files (genericRepeater, genericMove, genericRepeaterMove),
+read into NumPy structured arrays.
+
+    ###### comments
+    Time s                      only in timed files (genericMove, genericRepeaterMove)
+    NumberOfPlacements 4        only in genericRepeaterMove files (default 1)
+    Rotation deg
+    Translation mm
+    [time]  angle ax ay az  tx ty tz  [angle ax ay az  tx ty tz ...]
+
+A table holds one row per line and one column per placement of that line:
+
+    table = PlacementTable.load(path)       # reused while the file is unchanged
+    table.rows["translation"]               # (n, copies, 3) in mm
+    table.validate(start, stop, slice)      # problems against the acquisition time range
+    table.summary()                         # one line for the console
+
+Values are converted to Geant4's internal units (ns, rad, mm, see
+StaticData), whatever units the file's header names. Files of
+SIDECAR_MIN_BYTES or more are parsed once: the table is saved in a
+'<file>.cache' sidecar holding a raw .npy array, and later loads memory-map it,
+so a gantry file of millions of lines opens without parsing or reading it whole.
+"""
+from __future__ import annotations
+import json
+import os
+import warnings
+from typing import List, Optional
+
+import numpy as np
+
+from Classes.StaticData import LENGTH_UNIT_FACTORS, ANGLE_UNIT_FACTORS, TIME_UNIT_FACTORS
+
+PLACEMENT_DTYPE = np.dtype([
+    ("time", "<f8"),                # ns (0 in untimed files)
+    ("angle", "<f8"),               # rad
+    ("axis", "<f8", (3,)),
+    ("translation", "<f8", (3,)),   # mm
+])
+# Movement / repeater -> whether its file has a Time column
+TIMED_KINDS = {"genericRepeater": False, "genericMove": True, "genericRepeaterMove": True}
+
+SIDECAR_SUFFIX = ".cache"
+SIDECAR_VERSION = 1
+SIDECAR_MIN_BYTES = 1 << 20
+_SIDECAR_ALIGN = 64
+
+
+def _header_value(tokens, default: str) -> str:
+    return tokens[1] if len(tokens) > 1 else default
+
+
+def _is_number(token: str) -> bool:
+    try:
+        float(token)
+    except ValueError:
+        return False
+    return True
+
+
+def kind_of(path: str) -> Optional[str]:
+    """'genericMove' for '/<volume>/genericMove/setPlacementsFilename', ... (None for other rows)."""
+    parts = (path or "").rsplit("/", 2)
+    if len(parts) == 3 and parts[2] == "setPlacementsFilename" and parts[1] in TIMED_KINDS:
+        return parts[1]
+    return None
+
+
+def acquisition_window(root):
+    """(time start, time stop, time slice) of the /application rows of root's tree, in ns."""
+    window = []
+    for path, default in (("/application/setTimeStart", 0.0), ("/application/setTimeStop", None),
+                          ("/application/setTimeSlice", None)):
+        param = root.find_parameter(path) if root is not None else None
+        values = param.default_value_list if param is not None else None
+        try:
+            value = float(values[0]) * TIME_UNIT_FACTORS.get(param.default_unit, TIME_UNIT_FACTORS["s"])
+        except (TypeError, ValueError, IndexError):
+            value = default
+        window.append(value)
+    return tuple(window)
+
+
+class PlacementTable(object):
+    # Parsed files are reused while unchanged: abs path -> (mtime_ns, size, PlacementTable)
+    _LOADED: dict[str, tuple] = {}
+
+    def __init__(self, path: str, rows: np.ndarray, timed: bool):
+        self.path = path
+        self.rows = rows            # PLACEMENT_DTYPE, shape (lines, copies)
+        self.timed = timed
+        self.from_sidecar = False
+        self._summary = None
+
+    @property
+    def copies(self) -> int:
+        return self.rows.shape[1]
+
+    @property
+    def times(self) -> np.ndarray:
+        """(lines,) in ns."""
+        return self.rows["time"][:, 0]
+
+    # ---------------------- loading ----------------------
+    @classmethod
+    def load(cls, path: str) -> "PlacementTable":
+        """
+        Table of path, from the in-memory cache, the sidecar or the text file,
+        in that order. Raises OSError for an unreadable file and ValueError for
+        a malformed one; treat the result as read-only, it may be shared.
+        """
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = cls._LOADED.get(key)
+        if cached is not None and cached[:2] == stamp:
+            return cached[2]
+
+        table = cls._read_sidecar(path, stamp) if st.st_size >= SIDECAR_MIN_BYTES else None
+        if table is None:
+            table = cls.read(path)
+            if st.st_size >= SIDECAR_MIN_BYTES:
+                table._write_sidecar(stamp)
+        cls._LOADED[key] = (*stamp, table)
+        return table
+
+    @classmethod
+    def read(cls, path: str) -> "PlacementTable":
+        """Parse the text file (no caching)."""
+        units = {"Time": "s", "Rotation": "deg", "Translation": "mm"}
+        timed, copies = False, 1
+        with open(path, "rb") as f:
+            while True:
+                start = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                tokens = line.split(b"#", 1)[0].decode("utf-8", "replace").split()
+                if not tokens:
+                    continue
+                if _is_number(tokens[0]):
+                    f.seek(start)       # first line of numbers: the rest goes to the C parser
+                    break
+                if tokens[0] in units:
+                    units[tokens[0]] = _header_value(tokens, units[tokens[0]])
+                    timed = timed or tokens[0] == "Time"
+                elif tokens[0] == "NumberOfPlacements":
+                    try:
+                        copies = int(_header_value(tokens, "1"))
+                    except ValueError:
+                        copies = 0
+                    if copies < 1:
+                        raise ValueError(f"{path}: bad NumberOfPlacements '{line.decode(errors='replace').strip()}'")
+                else:
+                    raise ValueError(f"{path}: unknown header line '{line.decode(errors='replace').strip()}'")
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", UserWarning)    # a file without lines is checked below
+                    data = np.loadtxt(f, comments="#", ndmin=2, dtype=np.float64)
+            except ValueError as e:
+                # numpy counts rows from the first line of numbers, and its usecols hint does not apply
+                raise ValueError(f"{path}: {str(e).split('; use `usecols`', 1)[0]} of the data") from None
+
+        for name, factors in (("Time", TIME_UNIT_FACTORS), ("Rotation", ANGLE_UNIT_FACTORS),
+                              ("Translation", LENGTH_UNIT_FACTORS)):
+            if units[name] not in factors:
+                raise ValueError(f"{path}: unknown unit '{units[name]}' for {name}")
+        columns = int(timed) + 7 * copies
+        if data.size == 0:
+            data = data.reshape(0, columns)
+        if data.shape[1] != columns:
+            raise ValueError(f"{path}: {data.shape[1]} columns per line, expected {columns}"
+                             f" ({'time, ' if timed else ''}{copies} x angle, axis, translation)")
+
+        n = len(data)
+        if timed and copies == 1:
+            rows = np.ascontiguousarray(data).view(PLACEMENT_DTYPE)     # the columns are the fields
+        else:
+            rows = np.empty((n, copies), dtype=PLACEMENT_DTYPE)
+            rows["time"] = data[:, :1] if timed else 0.0
+            body = data[:, int(timed):].reshape(n, copies, 7)
+            rows["angle"] = body[..., 0]
+            rows["axis"] = body[..., 1:4]
+            rows["translation"] = body[..., 4:7]
+        for field, name, factors in (("time", "Time", TIME_UNIT_FACTORS), ("angle", "Rotation", ANGLE_UNIT_FACTORS),
+                                     ("translation", "Translation", LENGTH_UNIT_FACTORS)):
+            if factors[units[name]] != 1.0:
+                rows[field] *= factors[units[name]]
+        return cls(path, rows, timed)
+
+    # ---------------------- sidecar ----------------------
+    def _write_sidecar(self, stamp):
+        """Save the table next to its file; skipped if the folder is read-only."""
+        meta = json.dumps({"version": SIDECAR_VERSION, "stamp": list(stamp), "timed": self.timed}).encode("utf-8")
+        # pad the meta line so the array data keeps the .npy alignment when memory-mapped
+        meta += b" " * (-(len(meta) + 1) % _SIDECAR_ALIGN) + b"\n"
+        try:
+            with open(self.path + SIDECAR_SUFFIX, "wb") as f:
+                f.write(meta)
+                np.lib.format.write_array(f, np.ascontiguousarray(self.rows), allow_pickle=False)
+        except OSError:
+            pass
+
+    @classmethod
+    def _read_sidecar(cls, path: str, stamp) -> Optional["PlacementTable"]:
+        sidecar = path + SIDECAR_SUFFIX
+        try:
+            with open(sidecar, "rb") as f:
+                meta = json.loads(f.readline())
+                if meta.get("version") != SIDECAR_VERSION or tuple(meta.get("stamp", ())) != stamp:
+                    return None
+                if np.lib.format.read_magic(f) == (1, 0):
+                    shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+                offset = f.tell()
+            if dtype != PLACEMENT_DTYPE or fortran or len(shape) != 2:
+                return None
+            rows = np.memmap(sidecar, dtype=dtype, mode="r", offset=offset, shape=shape)
+        except (OSError, ValueError, KeyError):
+            return None
+        table = cls(path, rows, bool(meta.get("timed")))
+        table.from_sidecar = True
+        return table
+
+    # ---------------------- checks ----------------------
+    def validate(self, time_start: Optional[float] = None, time_stop: Optional[float] = None,
+                 time_slice: Optional[float] = None, kind: Optional[str] = None) -> List[str]:
+        """
+        Problems of the table, as console messages (empty when it is fine). kind
+        ('genericMove', ...) checks the layout; the times (ns) check a timed
+        table against the acquisition: GATE places the volume, at the start of
+        each time slice, at the last line whose time is not later.
+        """
+        problems = []
+        rows = self.rows
+        n = len(rows)
+        if kind in TIMED_KINDS:
+            if TIMED_KINDS[kind] != self.timed:
+                problems.append(f"a {kind} file {'needs a' if TIMED_KINDS[kind] else 'has no'} 'Time' column")
+            if kind != "genericRepeaterMove" and self.copies > 1:
+                problems.append(f"a {kind} file has one placement per line, this one has {self.copies}")
+        if n == 0:
+            return problems + ["the file holds no placements"]
+
+        values = np.ascontiguousarray(rows).reshape(-1).view(np.float64).reshape(rows.size, -1)
+        bad = np.count_nonzero(~np.isfinite(values).all(axis=1))
+        if bad:
+            problems.append(f"{bad} placement(s) hold values that are not finite numbers")
+        stuck = np.count_nonzero((rows["angle"] != 0) & ~rows["axis"].any(-1))
+        if stuck:
+            problems.append(f"{stuck} placement(s) have an angle but a zero rotation axis (not rotated)")
+        if not self.timed or not TIMED_KINDS.get(kind, True):
+            return problems
+
+        times = self.times
+        backwards = np.flatnonzero(np.diff(times) < 0)
+        if len(backwards):
+            problems.append(f"times decrease at row {backwards[0] + 2} of the data "
+                            f"({len(backwards)} place(s)); they must be sorted")
+            return problems
+        s = TIME_UNIT_FACTORS["s"]
+        if time_start is not None and times[0] > time_start:
+            problems.append(f"no placement at the acquisition start: the first time is {times[0] / s:g} s, "
+                            f"the start {time_start / s:g} s")
+        if time_stop is not None and times[-1] < time_stop:
+            problems.append(f"the last placement ({times[-1] / s:g} s) is held until the acquisition stop "
+                            f"({time_stop / s:g} s)")
+        if None not in (time_start, time_stop, time_slice) and time_slice > 0 and time_stop > time_start:
+            slices = int(np.ceil((time_stop - time_start) / time_slice))
+            if slices <= 10_000_000:
+                starts = time_start + time_slice * np.arange(slices)
+                used = np.unique(np.searchsorted(times, starts, side="right") - 1)
+                inside = np.count_nonzero((times >= time_start) & (times < time_stop))
+                unused = inside - np.count_nonzero(times[used[used >= 0]] >= time_start)
+                if unused > 0:
+                    problems.append(f"{unused} line(s) fall between the starts of the {time_slice / s:g} s "
+                                    f"time slices and are never used")
+        return problems
+
+    def summary(self) -> str:
+        """Line count, time span and value ranges, for the console."""
+        if self._summary is not None:
+            return self._summary
+        rows = self.rows
+        n = len(rows)
+        parts = [f"{n:,} line(s)" + (f" x {self.copies} placements" if self.copies > 1 else "")]
+        if n:
+            if self.timed:
+                s = TIME_UNIT_FACTORS["s"]
+                times = self.times
+                span = f"time {times[0] / s:g} .. {times[-1] / s:g} s"
+                if n > 1:
+                    span += f" (mean step {(times[-1] - times[0]) / (n - 1) / s:g} s)"
+                parts.append(span)
+            angles = np.degrees(rows["angle"])
+            parts.append(f"angle {angles.min():g} .. {angles.max():g} deg")
+            lo, hi = rows["translation"].min(axis=(0, 1)), rows["translation"].max(axis=(0, 1))
+            parts.append("translation " + ", ".join(f"{c} {a:g} .. {b:g}" for c, a, b in zip("xyz", lo, hi)) + " mm")
+        self._summary = "; ".join(parts)
+        return self._summary
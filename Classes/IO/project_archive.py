@@ -0,0 +1,159 @@
+# Classes/IO/project_archive.py
+"""
+Binary project archive (.ctproj): the same documents as the JSON project
+files (schema "2.0" snapshots and schema "1.0" path-based trees), stored as
+one chunk per top-level section plus a table of contents.
+
+    [header]  magic "CTPJ", format version, TOC offset and length
+    [chunks]  per top-level section: u32 length, u32 crc32, zlib(compact JSON)
+    [TOC]     zlib(compact JSON): the document without its sections, and
+              name / offset / stub / child count of every section
+
+Opening reads the file into memory but decodes the TOC only; a section is
+decoded when asked for, so a loader can build the tree skeleton and materialize
+'world' or 'digitizer' once they are opened (see ProjectSnapshot.apply_archive).
+The chunks are kept in memory rather than read from the path later: autosave
+and export replace that file while unopened sections still refer to it.
+"""
+from __future__ import annotations
+import json
+import os
+import struct
+import zlib
+from typing import Any, Dict, List
+
+MAGIC = b"CTPJ"
+FORMAT_VERSION = 1
+EXTENSION = ".ctproj"
+
+_HEADER = struct.Struct("<4sHHQI")     # magic, version, flags, toc offset, toc length
+_CHUNK = struct.Struct("<II")          # payload length, crc32
+_COMPRESSION = 6
+
+
+def _encode(obj) -> bytes:
+    return zlib.compress(json.dumps(obj, separators=(",", ":")).encode("utf-8"), _COMPRESSION)
+
+
+def _decode(payload: bytes):
+    return json.loads(zlib.decompress(payload))
+
+
+def _tree_node(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Node holding the top-level sections: 'root' of a snapshot, the document itself for schema 1.0."""
+    return document["root"] if isinstance(document.get("root"), dict) else document
+
+
+def is_project_archive(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def write_project_archive(path: str, document: Dict[str, Any]) -> int:
+    """Write a JSON project document as an archive; returns the number of sections."""
+    node = _tree_node(document)
+    sections = node.get("children") or []
+    # the document without its sections, "children" keeps its place for the round trip
+    skeleton = {k: ([] if k == "children" else v) for k, v in node.items()}
+    head = dict(document, root=skeleton) if node is not document else skeleton
+
+    entries = []
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0, 0))
+        for section in sections:
+            payload = _encode(section)
+            offset = f.tell()
+            f.write(_CHUNK.pack(len(payload), zlib.crc32(payload)))
+            f.write(payload)
+            entries.append({
+                "name": section.get("name"),
+                "offset": offset,
+                # what a loader needs to create the section object before decoding it
+                "stub": {k: v for k, v in section.items() if k not in ("parameters", "children")},
+                "children": len(section.get("children") or []),
+            })
+        toc = _encode({"document": head, "sections": entries})
+        toc_offset = f.tell()
+        f.write(toc)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, toc_offset, len(toc)))
+    return len(entries)
+
+
+class ProjectArchive:
+    """
+    Read side of a .ctproj file. The file is read on open (the compressed
+    chunks stay in memory, the path may be overwritten afterwards), sections
+    are decoded on demand (each once). document() rebuilds the full JSON document.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._data = f.read()
+        if len(self._data) < _HEADER.size:
+            raise ValueError(f"'{path}' is not a project archive")
+        magic, version, _flags, toc_offset, toc_length = _HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a project archive")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"'{path}' uses archive format {version}, this version reads up to {FORMAT_VERSION}")
+        toc = _decode(self._data[toc_offset:toc_offset + toc_length])
+        self.head: Dict[str, Any] = toc["document"]
+        self.sections: List[Dict[str, Any]] = toc["sections"]
+        self._decoded: Dict[int, Dict[str, Any]] = {}
+
+    @property
+    def node(self) -> Dict[str, Any]:
+        """Top node of the document (without its sections)."""
+        return _tree_node(self.head)
+
+    def section_index(self, name: str) -> int:
+        for i, entry in enumerate(self.sections):
+            if entry["name"] == name:
+                return i
+        raise KeyError(name)
+
+    def section(self, i: int) -> Dict[str, Any]:
+        """Decoded node of the i-th top-level section."""
+        node = self._decoded.get(i)
+        if node is None:
+            offset = self.sections[i]["offset"]
+            length, crc = _CHUNK.unpack_from(self._data, offset)
+            payload = self._data[offset + _CHUNK.size:offset + _CHUNK.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                raise ValueError(f"section '{self.sections[i]['name']}' of '{self.path}' is damaged")
+            node = self._decoded[i] = _decode(payload)
+        return node
+
+    def document(self) -> Dict[str, Any]:
+        """The whole project as the JSON document it was written from."""
+        document = json.loads(json.dumps(self.head))
+        node = _tree_node(document)
+        if "children" in node:
+            node["children"] = [self.section(i) for i in range(len(self.sections))]
+        return document
+
+
+def save_project_document(path: str, document: Dict[str, Any]) -> None:
+    """Write a project document as JSON, or as an archive for a .ctproj name.
+    The file is replaced in one step, so an interrupted save leaves the old one."""
+    tmp = path + ".tmp"
+    if path.lower().endswith(EXTENSION):
+        write_project_archive(tmp, document)
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_project_document(path: str) -> Dict[str, Any]:
+    """Project document from a JSON file or an archive."""
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(path)
+    if is_project_archive(path):
+        return ProjectArchive(path).document()
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -6,6 +6,9 @@ from typing import Any, Callable, Dict, List, Optional
 from Classes.GateObject import GateObject
 from Classes.GateParameter import GateParameter
 from Classes.GObjectCreator import GObjectCreator
+from Classes.RepeaterParameterBuilder import RepeaterParameterBuilder
+from Classes.IO.project_archive import ProjectArchive
+from Classes.IO.json_stream import JsonStream
 
 SCHEMA_VERSION = "1.0"
 
@@ -25,6 +28,33 @@ def _clean_list(lst):
             out.append(x)
     return out
 
+def material_db_paths(data) -> list[str]:
+    """Material databases of a project document, in priority order (older files store one path)."""
+    data = data or {}
+    return list(data.get("material_db_paths") or _as_list(data.get("material_db_path")))
+
+def is_changed_only(data) -> bool:
+    """True for documents holding only the values that differ from the factory defaults."""
+    return bool((data or {}).get("changed_only"))
+
+def check_factory_version(data) -> None:
+    """
+    Refuse a changed_only document saved against other factory defaults
+    (GObjectCreator.FACTORY_VERSION): the values it leaves out would silently
+    become this version's defaults.
+    """
+    if not is_changed_only(data):
+        return
+    saved = data.get("factory_version", GObjectCreator.FACTORY_VERSION)
+    if saved != GObjectCreator.FACTORY_VERSION:
+        raise ValueError(f"the project stores only changes against factory defaults version {saved}, "
+                         f"this version builds version {GObjectCreator.FACTORY_VERSION}")
+
+def _same_values(a, b) -> bool:
+    # Typed comparison: 0, 0.0 and False are equal in Python but export differently.
+    a, b = a or [], b or []
+    return len(a) == len(b) and all(type(x) is type(y) and x == y for x, y in zip(a, b))
+
 def _is_ui_only_param(p: GateParameter) -> bool:
     name = getattr(p, "displayed_name", "") or ""
     path = getattr(p, "path", "") or ""
@@ -39,6 +69,9 @@ def _is_ui_only_param(p: GateParameter) -> bool:
 class ProjectSerializer:
     """
     Convert GateObject -> dict (-> JSON).
+    With include_only_changed, parameters still at their factory value are left
+    out and the document is marked "changed_only" (ProjectDeserializer then
+    starts from the factory tree).
     """
     def __init__(self,
                  param_filter: Optional[Callable[[GateParameter], bool]] = None,
@@ -46,14 +79,23 @@ class ProjectSerializer:
         self.param_filter = param_filter
         self.include_only_changed = include_only_changed
 
-    # You can later add "is_changed" logic if you track pristine values.
     def _should_keep_param(self, p: GateParameter) -> bool:
         if _is_ui_only_param(p):
             return False
+        if self.include_only_changed and not p.is_changed():
+            return False
         if self.param_filter and not self.param_filter(p):
             return False
         return True
 
+    def to_document(self, root: GateObject) -> Dict[str, Any]:
+        data = self.object_to_dict(root)
+        data["_schema"] = SCHEMA_VERSION
+        if self.include_only_changed:
+            data["changed_only"] = True
+            data["factory_version"] = GObjectCreator.FACTORY_VERSION
+        return data
+
     def parameter_to_dict(self, p: GateParameter) -> Dict[str, Any]:
         return {
             "path": getattr(p, "path", ""),
@@ -81,7 +123,7 @@ class ProjectSerializer:
             "shape": getattr(obj, "shape", getattr(obj, "subtype", None)),  # if you stash it
             # parameters
             "parameters": [self.parameter_to_dict(p)
-                           for p in (obj.parameters or [])
+                           for p in (obj.peek_parameters() or [])
                            if self._should_keep_param(p)],
             "children": []
         }
@@ -114,6 +156,7 @@ class ProjectDeserializer:
         )
         if "default_unit" in d:
             p.default_unit = d.get("default_unit")
+        p.untrack()     # no factory default to compare with, always saved
         return p
 
     def _apply_params(self, obj: GateObject, p_list: List[Dict[str, Any]]) -> None:
@@ -121,10 +164,13 @@ class ProjectDeserializer:
             return
         # We try to *merge* onto the existing parameter layout (created by factory),
         # else append params that didn't exist.
-        existing_by_path = {p.path: p for p in (obj.parameters or [])}
+        seen: Dict[str, int] = {}
         for pd in p_list:
-            if pd.get("path") in existing_by_path:
-                tgt = existing_by_path[pd["path"]]
+            path = pd.get("path")
+            nth = seen[path] = seen.get(path, -1) + 1   # repeated paths match in order
+            same_path = obj.get_parameters(path)
+            tgt = same_path[nth] if nth < len(same_path) else None
+            if tgt is not None:
                 tgt.input_type_list = list(pd.get("input_types", []) or [])
                 vals = pd.get("values", [])
                 tgt.default_value_list = list(vals or [])
@@ -161,13 +207,19 @@ class ProjectDeserializer:
         # Fallback: generic object
         return GateObject(name, data.get("path", ""), node_type, [])
 
-    def dict_to_object(self, data: Dict[str, Any], parent: GateObject | None = None) -> GateObject:
+    def dict_to_object(self, data: Dict[str, Any], parent: GateObject | None = None,
+                       obj: GateObject | None = None) -> GateObject:
         name = data.get("name", "noname")
-        # Root “gate” node? If you prefer to rebuild with your factory:
-        if name == "gate" and not parent:
-            # Rebuild the whole static skeleton if you want — or accept as-is
-            root = GateObject("gate", "/gate", "root", [])
-            obj = root
+        if obj is not None:
+            pass    # existing factory object (changed_only documents)
+        elif name == "gate" and not parent:
+            if is_changed_only(data):
+                # only the changes are stored: rebuild the static skeleton they apply to
+                check_factory_version(data)
+                obj = GObjectCreator.create_static_objects(GObjectCreator.create_gate_root(), self.material_db or [],
+                                                           gate_version=self.gate_version, sd_names=[])
+            else:
+                obj = GateObject("gate", "/gate", "root", [])
         else:
             parent_name = parent.get_name() if parent else ""
             obj = self._new_child(parent_name, data)
@@ -180,9 +232,310 @@ class ProjectDeserializer:
         # parameters
         self._apply_params(obj, data.get("parameters", []))
 
-        # children
+        # children (merged into the factory ones of the same name, if any)
+        existing = {}
+        for c in obj.daughters:
+            existing.setdefault(c.get_name(), c)
         for cd in data.get("children", []):
-            child = self.dict_to_object(cd, parent=obj)
-            obj.add_daughter(child)
+            current = existing.get(cd.get("name", "noname"))
+            if current is not None:
+                self.dict_to_object(cd, parent=obj, obj=current)
+            else:
+                obj.add_daughter(self.dict_to_object(cd, parent=obj))
+
+        return obj
+
+
+class ProjectSnapshot:
+    """
+    Label-based value snapshot (schema "2.0") of a GateObject tree.
+    Shared by CTCommanderManager and the headless command line, so it must stay Qt-free.
+
+    By default only changes are stored: parameters still at their factory value
+    (GateParameter.is_changed) and nodes with nothing to restore are left out,
+    and the document records "changed_only" and the factory version. Such a
+    snapshot describes a whole project only when applied to a fresh factory tree.
+    """
+    SCHEMA = "2.0"
+
+    def __init__(self, material_db=None, changed_only: bool = True):
+        # material names offered by re-created setMaterial dropdowns
+        self.material_db = material_db or []
+        self.changed_only = changed_only
+
+    def build(self, root: GateObject | None, material_db_paths: List[str] | None = None) -> Dict[str, Any]:
+        paths = list(material_db_paths or [])
+        data = {
+            "schema": self.SCHEMA,
+            "material_db_path": paths[0] if paths else None,    # read by older versions
+            "material_db_paths": paths,
+        }
+        if self.changed_only:
+            data["changed_only"] = True
+            data["factory_version"] = GObjectCreator.FACTORY_VERSION
+        data["root"] = self.build_node(root) if root else None
+        return data
+
+    def apply(self, root: GateObject, data: Dict[str, Any]) -> None:
+        check_factory_version(data)
+        root_snap = (data or {}).get("root") or {}
+        if root_snap:
+            self.apply_node(root, root_snap)
+
+    def apply_archive(self, root: GateObject, archive: ProjectArchive) -> None:
+        """
+        Apply an archived snapshot lazily: the root values now, each top-level
+        section (decoded from the archive) when its object is first used.
+        """
+        check_factory_version(archive.head)
+        self.apply_node(root, dict(archive.node, children=[]))
+        for i, entry in enumerate(archive.sections):
+            stub = entry["stub"]
+            child = self._find_child_by_name(root, stub.get("name"))
+            if child is None:
+                child = self._maybe_create_child_from_meta(root, stub)
+            if child is not None:
+                child.defer(lambda obj, i=i: self.apply_node(obj, archive.section(i)),
+                            has_daughters=entry["children"] > 0)
+
+    def apply_stream(self, root: GateObject, stream: JsonStream,
+                     on_node: Optional[Callable[[GateObject], None]] = None,
+                     head: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Apply the node being read from stream (a "root" value) onto root, each
+        child as soon as it is parsed: only one node's values are decoded at a
+        time. on_node(obj) is called once obj got its own values, before its children.
+        head is the document read so far (see read_project_stream), checked like apply's.
+        """
+        check_factory_version(head)
+        self._apply_node_stream(stream, lambda snap: root, on_node)
+
+    def _apply_node_stream(self, stream, resolve, on_node):
+        # resolve(fields read so far) -> object the node applies to (None: skip it)
+        snap, obj, streamed = {}, None, False
+        for key in stream.items():
+            if key != "children" or streamed or "name" not in snap:
+                snap[key] = stream.value()
+                continue
+            # build_node writes "children" last: the node's own fields are known
+            streamed = True
+            obj = resolve(snap)
+            if obj is None:
+                stream.value()
+                continue
+            self.apply_node(obj, snap)
+            snap = {}               # fields after "children" (hand-edited files) are applied at the end
+            if on_node:
+                on_node(obj)
+            by_name = {}
+            for c in obj.daughters:
+                by_name.setdefault(c.get_name(), c)
+            for _ in stream.elements():
+                self._apply_node_stream(stream, lambda s, parent=obj: self._child_for(parent, by_name, s), on_node)
+        if not streamed:
+            obj = resolve(snap)
+            if obj is not None:
+                self.apply_node(obj, snap)
+                if on_node:
+                    on_node(obj)
+        elif obj is not None and snap:
+            self.apply_node(obj, snap)
+
+    def _child_for(self, parent_obj, by_name: dict, child_snap: dict):
+        name = child_snap.get("name")
+        child_obj = by_name.get(name)
+        if child_obj is None:
+            child_obj = self._maybe_create_child_from_meta(parent_obj, child_snap)
+            if child_obj is not None:
+                by_name[name] = child_obj
+        return child_obj
+
+    def _param_to_value_snapshot(self, p) -> dict:
+        # Store just what's needed to recreate UI state
+        snap = {
+            "label": getattr(p, "displayed_name", None) or getattr(p, "name", None),
+            "values": list(p.default_value_list or []),
+        }
+        du = getattr(p, "default_unit", None)
+        if du is not None:
+            snap["unit"] = du
+        return snap
 
-        return obj
\ No newline at end of file
+    def _object_meta(self, obj) -> dict:
+        """Small hints that help re-create missing children (no paths)."""
+        meta = {}
+        # commonly used on your objects
+        if getattr(obj, "role", None):
+            meta["role"] = obj.role
+        if getattr(obj, "system_type", None):
+            meta["system_type"] = obj.system_type
+        if getattr(obj, "system_level", None):
+            meta["system_level"] = obj.system_level
+        # sources / distributions
+        if getattr(obj, "source_type", None):
+            meta["source_type"] = obj.source_type
+        if getattr(obj, "subtype", None):
+            meta["distribution_type"] = obj.subtype  # you stored type in create_distribution_child
+        # for world daughters you can add "shape" if you attach it on creation
+        if obj.get_type() == "world" or (getattr(obj, "parent", None) and obj.parent.get_name() == "world"):
+            if getattr(obj, "subtype", None):
+                meta["shape"] = obj.subtype
+        if obj.template is None:    # repeater rows are added to a volume's own parameters
+            repeaters = [p.path.rsplit(" ", 1)[1] for p in obj.peek_parameters() if "/repeaters/insert " in p.path]
+            if repeaters:
+                meta["repeaters"] = repeaters
+        return meta
+
+    def build_node(self, obj) -> dict:
+        params = obj.peek_parameters()
+        children = [self.build_node(c) for c in getattr(obj, "daughters", [])]
+        if self.changed_only:
+            params = [p for p in params if p.is_changed()]
+            # a node without changes, children or meta would be neither updated nor re-created
+            children = [c for c in children if c["parameters"] or c["children"] or c["meta"]]
+        return {
+            "name": obj.get_name(),
+            "node_type": obj.get_type(),
+            "meta": self._object_meta(obj),
+            "parameters": [self._param_to_value_snapshot(p) for p in params],
+            "children": children
+        }
+
+    def _find_child_by_name(self, parent_obj, name):
+        for c in getattr(parent_obj, "daughters", []):
+            if c.get_name() == name:
+                return c
+        return None
+
+    def _apply_param_values(self, obj, param_snapshots: list):
+        # Match by label (displayed_name). This avoids persisting path strings.
+        for ps in (param_snapshots or []):
+            label = ps.get("label")
+            if not label:
+                continue
+            values = ps.get("values", [])
+            current = obj.peek_parameters_by_label(label)
+            if not current:
+                continue
+            if all(_same_values(p.default_value_list, values)
+                   and ("unit" not in ps or p.default_unit == ps["unit"]) for p in current):
+                continue    # unchanged defaults: template-backed volumes stay shared
+            # apply to all candidates sharing the label
+            for p in obj.get_parameters_by_label(label):
+                p.default_value_list = list(ps.get("values", []))
+                if "unit" in ps:
+                    p.default_unit = ps["unit"]
+
+    def _maybe_create_child_from_meta(self, parent_obj, child_snap: dict):
+        """
+        Create dynamic children (e.g. /source/<name>, /distributions/<name>) if they don't exist yet.
+        We use the parent's name + child meta to decide what factory to call.
+        """
+        name = child_snap.get("name")
+        meta = child_snap.get("meta", {}) or {}
+
+        parent_name = (getattr(parent_obj, "name", None) or parent_obj.get_name() or "").lower()
+
+        # ---- Distributions ----
+        dist_type = meta.get("distribution_type")
+        if parent_name == "distributions" and dist_type:
+            new_obj = GObjectCreator.create_distribution_child(name, dist_type)
+            parent_obj.add_daughter(new_obj)
+            return new_obj
+
+        # ---- Source ----
+        src_type = meta.get("source_type")
+        if parent_name == "source" and src_type:
+            new_obj = GObjectCreator.create_source_child(name, src_type)
+            parent_obj.add_daughter(new_obj)
+            return new_obj
+
+        # ---- Geometry (anywhere under world): use 'shape' ----
+        shape = meta.get("shape")
+        if shape:
+            # Check if parent is under world (at any depth)
+            anc = parent_obj
+            under_world = False
+            while anc is not None:
+                if getattr(anc, "name", "").lower() == "world":
+                    under_world = True
+                    break
+                anc = anc.get_parent()
+
+            if under_world:
+                # If your factory can create a child under ANY parent, use it.
+                # Most implementations of create_world_daughter are happy as long as you add_daughter(new_obj).
+                new_obj = GObjectCreator.create_world_daughter(name, shape, self.material_db)
+                for kind in meta.get("repeaters") or []:
+                    new_obj.parameters.extend(RepeaterParameterBuilder.get_parameters(name, kind))
+                parent_obj.add_daughter(new_obj)
+                return new_obj
+
+        # Nothing to create
+        return None
+
+    def apply_node(self, obj, snap: dict):
+        # apply meta
+        meta = snap.get("meta", {}) or {}
+        if "role" in meta:
+            obj.role = meta["role"]
+        if "system_type" in meta:
+            obj.system_type = meta["system_type"]
+        if "system_level" in meta:
+            obj.system_level = meta["system_level"]
+
+        # apply parameter values by label
+        self._apply_param_values(obj, snap.get("parameters", []))
+
+        # recurse for children (create missing dynamic ones when we can)
+        child_snaps = snap.get("children") or []
+        if not child_snaps:
+            return
+        by_name = {}            # first daughter per name, like _find_child_by_name
+        for c in obj.daughters:
+            by_name.setdefault(c.get_name(), c)
+        for child_snap in child_snaps:
+            child_obj = self._child_for(obj, by_name, child_snap)
+            if child_obj is not None:
+                self.apply_node(child_obj, child_snap)
+
+
+def read_project_stream(stream: JsonStream, on_root: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    """
+    Read a project document from stream without materializing its tree: when
+    the "root" node is reached, on_root(head) is called with the keys read so
+    far (schema, material databases, ...) and must consume the node, e.g. with
+    ProjectSnapshot.apply_stream. Returns the document without "root"; a
+    document without a root node (schema "1.0") is returned whole.
+    """
+    head: Dict[str, Any] = {}
+    for key in stream.items():
+        if key == "root" and stream.peek() == "{":
+            on_root(head)
+        else:
+            head[key] = stream.value()
+    return head
+
+
+def load_project_tree(data: Dict[str, Any] | ProjectArchive, material_db=None, gate_version=(9, 2, 0)) -> GateObject:
+    """
+    Rebuild a GateObject tree from either JSON format:
+    - schema "2.0" value snapshots (CTCommanderManager.export_json)
+    - schema "1.0" path-based documents (ProjectSerializer)
+    or from a ProjectArchive of one (snapshot sections are applied on first use).
+    """
+    if isinstance(data, ProjectArchive):
+        if "root" not in data.head:
+            data = data.document()
+        else:
+            root = GObjectCreator.create_gate_root()
+            root = GObjectCreator.create_static_objects(root, material_db or [], gate_version=gate_version, sd_names=[])
+            ProjectSnapshot(material_db).apply_archive(root, data)
+            return root
+    data = data or {}
+    if "root" in data or data.get("schema") == ProjectSnapshot.SCHEMA:
+        root = GObjectCreator.create_gate_root()
+        root = GObjectCreator.create_static_objects(root, material_db or [], gate_version=gate_version, sd_names=[])
+        ProjectSnapshot(material_db).apply(root, data)
+        return root
+    return ProjectDeserializer(material_db=material_db, gate_version=gate_version).dict_to_object(data, parent=None)
@@ -0,0 +1,122 @@
+"""
+Several material databases active at once, merged into one namespace.
+
+    registry = MaterialRegistry()
+    registry.load(["MaterialDB/GateMaterials.db", "MaterialDB/MCRP_AF.db"])
+    registry.names              # merged material names (setMaterial dropdowns)
+    registry.material("Water")  # (GMaterialDB, row in its store)
+
+Databases are parsed concurrently in a thread pool (GMaterialDB.load, so
+unchanged files come from its cache). Override rule: a name belongs to the
+first database in load order that defines it, like Gate's lookup over several
+/gate/geometry/setMaterialDatabase files. Later definitions are kept in
+duplicates (name -> every path defining it, winner first) and otherwise ignored.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from Classes.GMaterialDB import GMaterialDB
+
+
+class MaterialRegistry(object):
+    def __init__(self):
+        self.paths: list[str] = []              # load order = priority
+        self.databases: dict[str, GMaterialDB] = {}
+        self.names: list[str] = []              # merged namespace, new list on every change
+        self.index: dict[str, str] = {}         # material name -> path of the database providing it
+        self.duplicates: dict[str, list[str]] = {}
+
+    def __len__(self):
+        return len(self.paths)
+
+    def load(self, paths, workers: int | None = None) -> list[GMaterialDB]:
+        """
+        Add databases after the ones already loaded (paths loaded before keep
+        their place). Returns the GMaterialDB of every requested path, in order;
+        the ones whose store is None failed and were not added (see their status).
+        """
+        paths = list(dict.fromkeys(paths))
+        todo = [p for p in paths if p not in self.databases]
+        loaded = {}
+        if todo:
+            workers = workers or min(len(todo), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                loaded = dict(zip(todo, pool.map(GMaterialDB.load, todo)))
+            for path in todo:
+                if loaded[path].store is not None:
+                    self.paths.append(path)
+                    self.databases[path] = loaded[path]
+            self._merge()
+        return [loaded.get(p) or self.databases[p] for p in paths]
+
+    def remove(self, path):
+        if path in self.databases:
+            self.paths.remove(path)
+            del self.databases[path]
+            self._merge()
+
+    def clear(self):
+        self.paths, self.databases = [], {}
+        self._merge()
+
+    def state(self) -> tuple:
+        """The loaded databases, to put back with restore (e.g. when a project import fails)."""
+        return list(self.paths), dict(self.databases)
+
+    def restore(self, state: tuple):
+        paths, databases = state
+        self.paths, self.databases = list(paths), dict(databases)
+        self._merge()
+
+    def _merge(self):
+        names, index, seen = [], {}, {}
+        for path in self.paths:
+            for name in self.databases[path].store.names:
+                seen.setdefault(name, []).append(path)
+                if name not in index:
+                    index[name] = path
+                    names.append(name)
+        self.names, self.index = names, index
+        self.duplicates = {name: where for name, where in seen.items() if len(where) > 1}
+
+    # ---------------------- lookups ----------------------
+    def material(self, name) -> tuple[GMaterialDB, int]:
+        """Database providing name and the material's row in its store (KeyError if unknown)."""
+        db = self.databases[self.index[name]]
+        return db, db.store.row(name)
+
+    def composition(self, name, path=None) -> dict[str, float]:
+        """Element mass fractions of name, as defined by path (default: the winning database)."""
+        db = self.databases[path or self.index[name]]
+        return db.store.composition(name)
+
+    def conflicts(self) -> list[str]:
+        """Duplicated names whose definitions differ in density or composition."""
+        out = []
+        for name, where in self.duplicates.items():
+            first = self._definition(name, where[0])
+            for path in where[1:]:
+                other = self._definition(name, path)
+                if not (np.isclose(first[0], other[0], equal_nan=True) and first[1].keys() == other[1].keys()
+                        and all(np.isclose(first[1][e], other[1][e], atol=1e-6) for e in first[1])):
+                    out.append(name)
+                    break
+        return out
+
+    def _definition(self, name, path):
+        store = self.databases[path].store
+        return store.density[store.row(name)], self.composition(name, path)
+
+    def duplicate_report(self, limit: int = 10) -> str | None:
+        """One console line about duplicated names, or None when there are none."""
+        if not self.duplicates:
+            return None
+        conflicts = self.conflicts()
+        listed = conflicts or list(self.duplicates)
+        more = f", ... ({len(listed) - limit} more)" if len(listed) > limit else ""
+        shown = ", ".join(f"{n} ({os.path.basename(self.index[n])})" for n in listed[:limit])
+        what = f"{len(conflicts)} with different definitions" if conflicts else "all identical"
+        return (f"{len(self.duplicates)} materials are defined in several databases ({what}); "
+                f"the first database loaded wins: {shown}{more}")
@@ -0,0 +1,388 @@
+"""
+Pre-flight overlap check of the world tree, before GATE is launched.
+
+    report = check_overlaps(world_obj)
+    for line in report.lines():
+        print(line)
+
+Like Geant4's checkOverlaps, every mother is checked once in its own frame
+(all its copies hold the same daughters), with each daughter's copies from
+its placement and repeaters (RepeaterExpansion.volume_placements):
+
+  siblings  every pair of placed copies of the mother's daughters (copies of
+            one volume included). A bounding-volume hierarchy over the copies'
+            boxes gives the candidate pairs, the separating axis test of their
+            oriented bounding boxes keeps the pairs that intersect by more than
+            the tolerance; that test is exact for two boxes, and other shapes
+            are confirmed by sample points of one solid inside the other.
+  outside   sample points of each daughter copy (corners of boxes, wedges and
+            hexagons, grids on curved surfaces) outside the mother's solid.
+
+Solids are read from the shape rows of GObjectCreator.build_world_daughter_parameters,
+in mm and rad. Volumes of unknown shape (tet-mesh-box) or with a zero size
+(rows still at their defaults) are listed as skipped.
+"""
+import math
+
+import numpy as np
+
+from Classes.RepeaterExpansion import volume_rows, volume_placements
+
+TOLERANCE = 1e-6        # mm: solids sharing a face are not overlapping
+_FULL = 2.0 * math.pi
+_SAMPLES = 24           # sample points around a curved surface
+
+
+def _full_span(start, delta, full):
+    """(start, delta) with a zero (default) or too wide delta meaning the whole turn."""
+    return (start, full) if delta <= 0 or delta >= full else (start, delta)
+
+
+def _ring(radius_x, radius_y, z, phi) -> np.ndarray:
+    return np.column_stack([radius_x * np.cos(phi), radius_y * np.sin(phi), np.full(len(phi), z)])
+
+
+class Solid(object):
+    """A volume's shape in its own frame: bounding box, sample points and inside test."""
+    __slots__ = ("shape", "dims", "center", "half", "points")
+
+    def __init__(self, shape, dims, center, half, points):
+        self.shape = shape
+        self.dims = dims            # shape rows in mm / rad
+        self.center = np.asarray(center, dtype=np.float64)      # bounding box
+        self.half = np.asarray(half, dtype=np.float64)
+        self.points = points        # (k, 3) on the surface
+
+    @property
+    def empty(self) -> bool:
+        return not np.all(self.half > 0)
+
+    def _phi_ok(self, p, start, delta):
+        if delta >= _FULL:
+            return True
+        return np.mod(np.arctan2(p[..., 1], p[..., 0]) - start, _FULL) <= delta
+
+    def inside(self, p, margin=0.0) -> np.ndarray:
+        """Points p (..., 3) deeper than margin inside the solid (a negative margin: at most -margin outside)."""
+        d, s = self.dims, self.shape
+        x, y, z = p[..., 0], p[..., 1], p[..., 2]
+        if s == "box":
+            return np.all(np.abs(p) < self.half - margin, axis=-1)
+        if s == "sphere":
+            r = np.linalg.norm(p, axis=-1)
+            ok = (r < d["rmax"] - margin) & ((r > d["rmin"] + margin) if d["rmin"] > 0 else True)
+            ok &= self._phi_ok(p, d["phi"], d["dphi"])
+            if d["dtheta"] < math.pi:
+                theta = np.arccos(np.clip(z / np.where(r > 0, r, 1.0), -1.0, 1.0))
+                ok &= (theta >= d["theta"]) & (theta <= d["theta"] + d["dtheta"])
+            return ok
+        if s in ("cylinder", "cone"):
+            rho = np.hypot(x, y)
+            t = np.clip((z + d["dz"]) / (2.0 * d["dz"]), 0.0, 1.0)
+            rmin = d["rmin1"] + t * (d["rmin2"] - d["rmin1"])
+            rmax = d["rmax1"] + t * (d["rmax2"] - d["rmax1"])
+            ok = (rho < rmax - margin) & (np.abs(z) < d["dz"] - margin)
+            ok &= np.where(rmin > 0, rho > rmin + margin, True)
+            return ok & self._phi_ok(p, d["phi"], d["dphi"])
+        if s == "ellipsoid":
+            a, b, c = (max(v - margin, 1e-12) for v in (d["a"], d["b"], d["c"]))
+            ok = (x / a) ** 2 + (y / b) ** 2 + (z / c) ** 2 < 1.0
+            return ok & (z > d["zmin"] + margin) & (z < d["zmax"] - margin)
+        if s == "elliptical tube":
+            a, b = (max(v - margin, 1e-12) for v in (d["a"], d["b"]))
+            return ((x / a) ** 2 + (y / b) ** 2 < 1.0) & (np.abs(z) < d["dz"] - margin)
+        if s == "hexagon":
+            # G4Polyhedra: corners at 0, 60, ... deg, radius = distance of the sides
+            normals = np.radians(30.0 + 60.0 * np.arange(6))
+            ok = np.abs(z) < d["dz"] - margin
+            for angle in normals:
+                ok &= x * math.cos(angle) + y * math.sin(angle) < d["r"] - margin
+            return ok
+        if s == "wedge":
+            ok = (np.abs(z) < d["dz"] - margin) & (np.abs(y) < d["dy"] - margin)
+            return ok & (x > d["left"] + margin) & (x < d["right0"] + d["slope"] * (y + d["dy"]) - margin)
+        return np.zeros(p.shape[:-1], dtype=bool)
+
+
+_BOX_GRID = np.stack(np.meshgrid([-1.0, 0.0, 1.0], [-1.0, 0.0, 1.0], [-1.0, 0.0, 1.0], indexing="ij"), -1).reshape(-1, 3)
+_BOX_GRID = _BOX_GRID[np.any(_BOX_GRID != 0, axis=1)]      # corners, edge and face middles
+
+
+def _box_points(half) -> np.ndarray:
+    return _BOX_GRID * half
+
+
+def shape_of(obj):
+    """A volume's shape name ("box", "sphere", ...); the world is a box."""
+    return getattr(obj, "subtype", None) or ("box" if obj.get_name() == "world" else None)
+
+
+def solid_of(obj, rows=None):
+    """Solid of a volume, or None for an unknown shape (rows: its volume_rows, if already read)."""
+    own, _ = rows or volume_rows(obj)
+    shape = shape_of(obj)
+    g = lambda sub: own.length("geometry/" + sub)       # noqa: E731
+    a = lambda sub: own.angle("geometry/" + sub)        # noqa: E731
+
+    if shape == "box":
+        half = np.array([g("setXLength"), g("setYLength"), g("setZLength")]) / 2.0
+        return Solid(shape, {}, (0, 0, 0), half, _box_points(half))
+
+    if shape == "sphere":
+        phi, dphi = _full_span(a("setPhiStart"), a("setDeltaPhi"), _FULL)
+        theta, dtheta = _full_span(a("setThetaStart"), a("setDeltaTheta"), math.pi)
+        dims = {"rmin": g("setRmin"), "rmax": g("setRmax"), "phi": phi, "dphi": dphi, "theta": theta, "dtheta": dtheta}
+        th = np.linspace(theta, theta + dtheta, _SAMPLES // 2 + 1)
+        ph = np.linspace(phi, phi + dphi, _SAMPLES, endpoint=dphi < _FULL)
+        th, ph = (v.ravel() for v in np.meshgrid(th, ph, indexing="ij"))
+        points = dims["rmax"] * np.column_stack([np.sin(th) * np.cos(ph), np.sin(th) * np.sin(ph), np.cos(th)])
+        return Solid(shape, dims, (0, 0, 0), [dims["rmax"]] * 3, points)
+
+    if shape in ("cylinder", "cone"):
+        if shape == "cylinder":
+            rmin1 = rmin2 = g("setRmin")
+            rmax1 = rmax2 = g("setRmax")
+        else:
+            rmin1, rmax1, rmin2, rmax2 = g("setRmin1"), g("setRmax1"), g("setRmin2"), g("setRmax2")
+        phi, dphi = _full_span(a("setPhiStart"), a("setDeltaPhi"), _FULL)
+        dz = g("setHeight") / 2.0
+        dims = {"rmin1": rmin1, "rmax1": rmax1, "rmin2": rmin2, "rmax2": rmax2, "dz": dz, "phi": phi, "dphi": dphi}
+        ph = np.linspace(phi, phi + dphi, _SAMPLES, endpoint=dphi < _FULL)
+        points = [_ring(r, r, z, ph) for z, r in ((-dz, rmax1), (0.0, (rmax1 + rmax2) / 2.0), (dz, rmax2))]
+        points.append([[0.0, 0.0, -dz], [0.0, 0.0, dz]] if max(rmin1, rmin2) <= 0 else np.zeros((0, 3)))
+        rmax = max(rmax1, rmax2)
+        return Solid(shape, dims, (0, 0, 0), (rmax, rmax, dz), np.vstack(points))
+
+    if shape == "ellipsoid":
+        ax, by, cz = g("setXLength"), g("setYLength"), g("setZLength")
+        bottom, top = g("setZBottomCut"), g("setZTopCut")
+        zmin = max(-cz, bottom) if bottom else -cz      # a cut of 0 is no cut
+        zmax = min(cz, top) if top else cz
+        dims = {"a": ax, "b": by, "c": cz, "zmin": zmin, "zmax": zmax}
+        ph = np.linspace(0.0, _FULL, _SAMPLES, endpoint=False)
+        points = []
+        for z in np.linspace(zmin, zmax, 7):
+            scale = math.sqrt(max(0.0, 1.0 - (z / cz) ** 2)) if cz > 0 else 0.0
+            points.append(_ring(ax * scale, by * scale, z, ph))
+        return Solid(shape, dims, (0, 0, (zmin + zmax) / 2.0), (ax, by, (zmax - zmin) / 2.0), np.vstack(points))
+
+    if shape == "elliptical tube":
+        ax, by, dz = g("setLong"), g("setShort"), g("setHeight") / 2.0
+        ph = np.linspace(0.0, _FULL, _SAMPLES, endpoint=False)
+        points = np.vstack([_ring(ax, by, z, ph) for z in (-dz, 0.0, dz)] + [[[0.0, 0.0, -dz], [0.0, 0.0, dz]]])
+        return Solid(shape, {"a": ax, "b": by, "dz": dz}, (0, 0, 0), (ax, by, dz), points)
+
+    if shape == "hexagon":
+        r, dz = g("setRadius"), g("setHeight") / 2.0
+        corner = r / math.cos(math.pi / 6.0)
+        ph = np.radians(60.0 * np.arange(6))
+        points = np.vstack([_ring(corner, corner, z, ph) for z in (-dz, 0.0, dz)] + [[[0.0, 0.0, -dz], [0.0, 0.0, dz]]])
+        return Solid(shape, {"r": r, "dz": dz}, (0, 0, 0), (corner, r, dz), points)
+
+    if shape == "wedge":
+        # G4Trap(z, y, x, narrow x) as GateWedge builds it: a straight side at -x,
+        # x long at y = -dy and narrow at y = +dy
+        wide, narrow = g("setXLength"), g("setNarrowerXLength")
+        dy, dz = g("setYLength") / 2.0, g("setZLength") / 2.0
+        left = -(wide + narrow) / 4.0
+        right0 = left + wide
+        slope = (narrow - wide) / (2.0 * dy) if dy > 0 else 0.0
+        dims = {"dy": dy, "dz": dz, "left": left, "right0": right0, "slope": slope}
+        xmax = max(right0, left + narrow)
+        # like a box: corners, edge and face middles, across the slanted side
+        u, v, w = (m.ravel() for m in np.meshgrid([0.0, 0.5, 1.0], [-1.0, 0.0, 1.0], [-1.0, 0.0, 1.0], indexing="ij"))
+        y = v * dy
+        points = np.column_stack([left + u * (right0 + slope * (y + dy) - left), y, w * dz])
+        points = points[(u != 0.5) | (v != 0) | (w != 0)]
+        return Solid(shape, dims, ((left + xmax) / 2.0, 0, 0), ((xmax - left) / 2.0, dy, dz), points)
+
+    return None
+
+
+# ---------------------- broad phase ----------------------
+def _morton(centers) -> np.ndarray:
+    """Z-order codes of points (n, 3), 10 bits per axis."""
+    lo, hi = centers.min(axis=0), centers.max(axis=0)
+    q = ((centers - lo) / np.where(hi > lo, hi - lo, 1.0) * 1023.0).astype(np.uint64)
+    code = np.zeros(len(centers), dtype=np.uint64)
+    for bit in range(10):
+        for axis in range(3):
+            code |= ((q[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return code
+
+
+def candidate_pairs(lo, hi, tolerance=TOLERANCE):
+    """
+    Pairs (i, j), i < j, of boxes [lo, hi] (n, 3) intersecting by more than
+    tolerance. The boxes are sorted along a Z-order curve into the leaves of a
+    complete binary tree, whose nodes bound their two children; the tree is
+    walked against itself one level at a time, for all node pairs at once.
+    """
+    n = len(lo)
+    if n < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    order = np.argsort(_morton((lo + hi) / 2.0), kind="stable")
+    size = 1 << (n - 1).bit_length()
+    levels_lo = [np.full((size, 3), np.inf)]
+    levels_hi = [np.full((size, 3), -np.inf)]        # padding leaves bound nothing
+    levels_lo[0][:n], levels_hi[0][:n] = lo[order], hi[order]
+    while len(levels_lo[-1]) > 1:
+        levels_lo.append(np.minimum(levels_lo[-1][0::2], levels_lo[-1][1::2]))
+        levels_hi.append(np.maximum(levels_hi[-1][0::2], levels_hi[-1][1::2]))
+
+    i = j = np.zeros(1, dtype=np.int64)
+    for level_lo, level_hi in zip(levels_lo[-2::-1], levels_hi[-2::-1]):
+        same = i == j
+        a, b = i[same], j[~same]
+        i = np.concatenate([2 * a, 2 * a, 2 * a + 1, np.repeat(2 * i[~same], 2), np.repeat(2 * i[~same] + 1, 2)])
+        j = np.concatenate([2 * a, 2 * a + 1, 2 * a + 1, np.tile(np.stack([2 * b, 2 * b + 1], 1).ravel(), 2)])
+        depth = np.minimum(level_hi[i], level_hi[j]) - np.maximum(level_lo[i], level_lo[j])
+        keep = np.all(depth > tolerance, axis=1) | ((i == j) & np.all(level_hi[i] >= level_lo[i], axis=1))
+        i, j = i[keep], j[keep]
+    keep = i != j
+    i, j = order[i[keep]], order[j[keep]]
+    return np.minimum(i, j), np.maximum(i, j)
+
+
+# ---------------------- narrow phase ----------------------
+def obb_depth(ca, ra, ea, cb, rb, eb) -> np.ndarray:
+    """
+    Separating axis test of oriented boxes (centres (p, 3), rotations (p, 3, 3)
+    whose columns are the box axes, half sizes (p, 3)): the smallest overlap
+    along the 15 candidate axes, in mm; <= 0 when the boxes are apart.
+    """
+    r = np.einsum("pki,pkj->pij", ra, rb)
+    t = np.einsum("pki,pk->pi", ra, cb - ca)
+    absr = np.abs(r)
+    depth = ea + np.einsum("pij,pj->pi", absr, eb) - np.abs(t)                 # axes of a
+    depth = np.minimum(depth.min(1), (np.einsum("pi,pij->pj", ea, absr) + eb
+                                      - np.abs(np.einsum("pi,pij->pj", t, r))).min(1))   # axes of b
+    for i in range(3):
+        i1, i2 = (i + 1) % 3, (i + 2) % 3
+        for j in range(3):
+            j1, j2 = (j + 1) % 3, (j + 2) % 3
+            length = np.sqrt(np.maximum(0.0, 1.0 - r[:, i, j] ** 2))      # |a_i x b_j|
+            proj = np.abs(t[:, i2] * r[:, i1, j] - t[:, i1] * r[:, i2, j])
+            reach = (ea[:, i1] * absr[:, i2, j] + ea[:, i2] * absr[:, i1, j]
+                     + eb[:, j1] * absr[:, i, j2] + eb[:, j2] * absr[:, i, j1])
+            valid = length > 1e-6        # (nearly) parallel edges: rounding noise, the face axes decide
+            depth = np.where(valid, np.minimum(depth, (reach - proj) / np.where(valid, length, 1.0)), depth)
+    return depth
+
+
+def _boxes(solid, placements):
+    """World-side centres (n, 3), rotations (n, 3, 3) and half sizes (n, 3) of a solid's placed copies."""
+    rot = placements[:, :3, :3]
+    centers = rot @ solid.center + placements[:, :3, 3]
+    return centers, rot, np.broadcast_to(solid.half, centers.shape)
+
+
+def _points_inside(points_solid, pa, inside_solid, pb, margin) -> np.ndarray:
+    """For each pair, whether a sample point of the first solid (placed at pa) lies inside the second (placed at pb)."""
+    pts = np.einsum("pij,kj->pki", pa[:, :3, :3], points_solid.points) + pa[:, None, :3, 3]
+    rel = pts - pb[:, None, :3, 3]
+    local = np.einsum("pji,pkj->pki", pb[:, :3, :3], rel)       # rotations are orthonormal
+    return inside_solid.inside(local, margin).any(axis=1)
+
+
+# ---------------------- report ----------------------
+class OverlapReport(object):
+    __slots__ = ("overlaps", "outside", "skipped", "placements")
+
+    def __init__(self):
+        self.overlaps = []      # (mother, volume, copy, other volume, other copy, depth in mm or None)
+        self.outside = []       # (mother, volume, copy)
+        self.skipped = []       # (volume, reason)
+        self.placements = 0     # copies checked
+
+    @property
+    def ok(self) -> bool:
+        return not self.overlaps and not self.outside
+
+    def lines(self, limit: int = 50) -> list:
+        """Console lines: one per problem (up to limit of each kind), then a summary."""
+        out = []
+        for mother, a, ca, b, cb, depth in self.overlaps[:limit]:
+            by = f" by {depth:.4g} mm" if depth is not None else ""
+            out.append(f"Overlap in '{mother.get_name()}': '{a.get_name()}'[{ca}] and '{b.get_name()}'[{cb}]{by}")
+        if len(self.overlaps) > limit:
+            out.append(f"... and {len(self.overlaps) - limit} more overlaps")
+        for mother, d, c in self.outside[:limit]:
+            out.append(f"Outside its mother '{mother.get_name()}': '{d.get_name()}'[{c}]")
+        if len(self.outside) > limit:
+            out.append(f"... and {len(self.outside) - limit} more volumes outside their mother")
+        for obj, reason in self.skipped:
+            out.append(f"Not checked: '{obj.get_name()}' ({reason})")
+        out.append(f"Checked {self.placements} placements: {len(self.overlaps)} overlaps, "
+                   f"{len(self.outside)} outside their mother")
+        return out
+
+
+def check_overlaps(root, tolerance: float = TOLERANCE) -> OverlapReport:
+    """Check every enabled mother of root's volume tree (root is the world volume)."""
+    report = OverlapReport()
+    solids = {}
+
+    def solid(obj):
+        if obj not in solids:
+            s = solid_of(obj)
+            if s is None:
+                report.skipped.append((obj, f"shape '{getattr(obj, 'subtype', None)}' is not supported"))
+            elif s.empty:
+                report.skipped.append((obj, "no size"))
+                s = None
+            solids[obj] = s
+        return solids[obj]
+
+    stack = [root]
+    while stack:
+        mother = stack.pop()
+        daughters = [d for d in mother.daughters if getattr(d, "enabled", True)]
+        stack.extend(daughters)
+        mother_solid = solid(mother)
+        placed = []         # (daughter, solid, placements) in mother's frame
+        for d in daughters:
+            s = solid(d)
+            if s is not None:
+                placed.append((d, s, volume_placements(d)))
+        if not placed:
+            continue
+        report.placements += sum(len(p) for _, _, p in placed)
+
+        if mother_solid is not None:
+            for d, s, placements in placed:
+                pts = np.einsum("nij,kj->nki", placements[:, :3, :3], s.points) + placements[:, None, :3, 3]
+                out = ~mother_solid.inside(pts, -tolerance).all(axis=1)
+                report.outside.extend((mother, d, int(c)) for c in np.flatnonzero(out))
+
+        # every copy of every daughter as one list of oriented boxes
+        owner = np.concatenate([np.full(len(p), k) for k, (_, _, p) in enumerate(placed)])
+        copy = np.concatenate([np.arange(len(p)) for _, _, p in placed])
+        frames = np.concatenate([p for _, _, p in placed])
+        centers, rots, halves = (np.concatenate(parts) for parts in zip(*(_boxes(s, p) for _, s, p in placed)))
+        reach = np.einsum("nij,nj->ni", np.abs(rots), halves)
+        i, j = candidate_pairs(centers - reach, centers + reach, tolerance)
+        if not len(i):
+            continue
+        depth = obb_depth(centers[i], rots[i], halves[i], centers[j], rots[j], halves[j])
+        hit = depth > tolerance
+        i, j, depth = i[hit], j[hit], depth[hit]
+        is_box = np.array([s.shape == "box" for _, s, _ in placed])
+        exact = is_box[owner[i]] & is_box[owner[j]]
+        confirmed = exact.copy()
+        # other shapes: their boxes meet, confirm with sample points, one (owner, owner) group at a time
+        rest = np.flatnonzero(~exact)
+        if len(rest):
+            groups = owner[i[rest]] * len(placed) + owner[j[rest]]
+            for g in np.unique(groups):
+                sel = rest[groups == g]
+                sa, sb = placed[owner[i[sel[0]]]][1], placed[owner[j[sel[0]]]][1]
+                fa, fb = frames[i[sel]], frames[j[sel]]
+                confirmed[sel] = (_points_inside(sa, fa, sb, fb, tolerance)
+                                  | _points_inside(sb, fb, sa, fa, tolerance))
+        i, j, depth, exact = i[confirmed], j[confirmed], depth[confirmed], exact[confirmed]
+        order = np.lexsort((j, i))
+        for a, b, dep, ex in zip(i[order], j[order], depth[order], exact[order]):
+            report.overlaps.append((mother, placed[owner[a]][0], int(copy[a]), placed[owner[b]][0], int(copy[b]),
+                                    float(dep) if ex else None))
+    return report
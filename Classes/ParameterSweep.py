@@ -0,0 +1,209 @@
+"""
+Parameter sweeps: one base project + a sweep spec -> one macro folder per variant.
+
+Spec (JSON):
+{
+  "mode": "grid",                         # "grid" (cartesian product) or "zip"
+  "parameters": {
+    "/source/src/setActivity": [1000, 2000, 4000],
+    "Energy FWHM": {"node": "digitizer", "index": 0, "start": 0.1, "stop": 0.3, "num": 5}
+  }
+}
+
+Keys starting with "/" are parameter paths, anything else is a label
+(GateParameter.displayed_name). "node" restricts the match to one object name,
+"index" selects which value of a multi-value row is replaced (default 0).
+"""
+import copy
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from Classes.GateObject import GateObject
+from Classes.IO.JsonHandler import JsonHandler
+from Classes.IO.macro_io import MacroExporter
+from Classes.IO.project_io import load_project_tree, material_db_paths
+from Classes.IO.project_archive import load_project_document
+
+
+def _expand_values(spec) -> list:
+    """A list of values, or a {start, stop, step|num} range (stop inclusive)."""
+    if isinstance(spec, list):
+        return list(spec)
+    if not isinstance(spec, dict):
+        return [spec]
+    if "values" in spec:
+        return list(spec["values"])
+    start, stop = spec["start"], spec["stop"]
+    if "num" in spec:
+        num = int(spec["num"])
+        if num < 2:
+            return [start]
+        delta = (stop - start) / (num - 1)
+        return [round(start + i * delta, 12) for i in range(num)]
+    step = spec.get("step", 1)
+    if step == 0:
+        raise ValueError("Sweep step must not be 0")
+    count = int((stop - start) / step + 1e-9) + 1
+    values = [round(start + i * step, 12) for i in range(max(0, count))]
+    if all(isinstance(x, int) for x in (start, stop, step)):
+        values = [int(v) for v in values]
+    return values
+
+
+class ParameterSweep:
+    def __init__(self, project_data: dict, spec: dict, gate_version=(9, 2, 0), material_db_path=None):
+        self.project_data = project_data
+        self.spec = spec or {}
+        self.gate_version = gate_version
+        self.material_db_path = material_db_path or material_db_paths(project_data)
+
+        self.mode = self.spec.get("mode", "grid")
+        if self.mode not in ("grid", "zip"):
+            raise ValueError(f"Unknown sweep mode '{self.mode}' (expected 'grid' or 'zip')")
+        self.axes = []  # [(key, node filter, value index, values)]
+        for key, entry in (self.spec.get("parameters") or {}).items():
+            opts = entry if isinstance(entry, dict) else {}
+            values = _expand_values(entry)
+            if not values:
+                raise ValueError(f"Sweep axis '{key}' has no values")
+            self.axes.append((key, opts.get("node"), int(opts.get("index", 0)), values))
+        if not self.axes:
+            raise ValueError("Sweep spec has no parameters")
+
+    @classmethod
+    def from_files(cls, project_path: str, spec_path: str, **kwargs) -> "ParameterSweep":
+        return cls(load_project_document(project_path), JsonHandler().load(spec_path), **kwargs)
+
+    # ---------------------- variants ----------------------
+    def variants(self) -> list[tuple]:
+        value_lists = [axis[3] for axis in self.axes]
+        if self.mode == "zip":
+            lengths = {len(v) for v in value_lists}
+            if len(lengths) != 1:
+                raise ValueError("All axes of a 'zip' sweep must have the same number of values")
+            return list(zip(*value_lists))
+        return list(itertools.product(*value_lists))
+
+    # ---------------------- tree access ----------------------
+    @staticmethod
+    def resolve(root: GateObject, axes) -> list[list[tuple[list[GateObject], int]]]:
+        """
+        For each axis, the parameters it drives as (ancestor chain root->owner, param index).
+        Resolved once per worker; variants only copy what they touch.
+        """
+        def chain_to(obj):
+            chain = [obj]
+            while chain[-1] is not root and chain[-1].get_parent() is not None:
+                chain.append(chain[-1].get_parent())
+            return chain[::-1]
+
+        resolved = []
+        for key, node_filter, _idx, _values in axes:
+            owned = root.find_parameters(key) if key.startswith("/") else root.find_parameters_by_label(key)
+            hits = [(chain_to(obj), next(i for i, q in enumerate(obj.parameters) if q is p))
+                    for obj, p in owned
+                    if not node_filter or obj.get_name() == node_filter]
+            if not hits:
+                raise ValueError(f"No parameter matches sweep key '{key}'")
+            resolved.append(hits)
+        return resolved
+
+    @staticmethod
+    def cow_clone(root: GateObject, edits: list[tuple[list[GateObject], int, int, object]]) -> GateObject:
+        """
+        Copy-on-write clone: only the objects on the path to an edited parameter
+        and the edited parameters themselves are copied; everything else is
+        shared with the base tree.
+        edits: [(ancestor chain, param index, value index, value)]
+        """
+        copies: dict[int, GateObject] = {}
+
+        def copied(obj: GateObject) -> GateObject:
+            c = copies.get(id(obj))
+            if c is None:
+                c = copy.copy(obj)     # detached copy with its own parameter list
+                c.daughters = list(obj.daughters)
+                copies[id(obj)] = c
+            return c
+
+        for chain, p_index, v_index, value in edits:
+            parent_copy = None
+            for obj in chain:
+                c = copied(obj)
+                if parent_copy is not None:
+                    pos = next(i for i, d in enumerate(parent_copy.daughters) if d is obj or d is c)
+                    parent_copy.daughters[pos] = c
+                    c.parent = parent_copy
+                parent_copy = c
+            owner = parent_copy
+            p = copy.copy(owner.parameters[p_index])
+            p.set_value(v_index, value)
+            owner.parameters[p_index] = p
+        return copies.get(id(root), root)
+
+    # ---------------------- run ----------------------
+    def run(self, out_dir: str, workers: int | None = None, split: bool = False) -> dict:
+        """Write every variant under out_dir/variant_NNNN and a top-level manifest.json."""
+        os.makedirs(out_dir, exist_ok=True)
+        variants = self.variants()
+        width = max(4, len(str(len(variants) - 1)))
+        tasks = [(i, values, os.path.join(out_dir, f"variant_{i:0{width}d}"), split)
+                 for i, values in enumerate(variants)]
+        init_args = (self.project_data, self.gate_version, self.material_db_path, self.axes)
+
+        if workers == 1 or len(tasks) == 1:
+            _init_worker(*init_args)
+            entries = [_run_variant(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+                chunk = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+                entries = list(pool.map(_run_variant, tasks, chunksize=chunk))
+
+        manifest = {
+            "mode": self.mode,
+            "axes": [{"key": k, "node": n, "index": i, "values": v} for k, n, i, v in self.axes],
+            "material_db_path": self.material_db_path,
+            "variants": entries,
+        }
+        JsonHandler().save(os.path.join(out_dir, "manifest.json"), manifest)
+        return manifest
+
+
+# ---------------------- worker side ----------------------
+# Each worker process rebuilds the base tree once, then only clones per variant.
+_worker = {}
+
+
+def _init_worker(project_data, gate_version, material_db_path, axes):
+    root = load_project_tree(project_data, gate_version=gate_version)
+    _worker["root"] = root
+    _worker["axes"] = axes
+    _worker["targets"] = ParameterSweep.resolve(root, axes)
+    _worker["exporter"] = MacroExporter(material_db_path=material_db_path)
+
+
+def _run_variant(task) -> dict:
+    index, values, variant_dir, split = task
+    axes, targets = _worker["axes"], _worker["targets"]
+    edits = []
+    for (key, _node, v_index, _vals), hits, value in zip(axes, targets, values):
+        edits += [(chain, p_index, v_index, value) for chain, p_index in hits]
+    tree = ParameterSweep.cow_clone(_worker["root"], edits)
+
+    os.makedirs(variant_dir, exist_ok=True)
+    exporter = _worker["exporter"]
+    if split:
+        files = exporter.write_split(tree, variant_dir)
+    else:
+        files = [os.path.join(variant_dir, "main.mac")]
+        exporter.write(tree, files[0])
+
+    entry = {
+        "index": index,
+        "dir": os.path.basename(variant_dir),
+        "values": {axis[0]: v for axis, v in zip(axes, values)},
+        "files": [os.path.basename(f) for f in files],
+    }
+    JsonHandler().save(os.path.join(variant_dir, "manifest.json"), entry)
+    return entry
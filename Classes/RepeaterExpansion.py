@@ -0,0 +1,320 @@
+"""
+Where the copies of repeated volumes end up.
+
+    placements = volume_placements(obj)     # (N, 4, 4): obj's copies in its mother's frame
+    world = expand_tree(world_obj)          # obj -> (N, 4, 4) in the world frame
+    counts = copy_counts(world_obj)         # obj -> number of copies in the world
+
+A placement is a 4x4 homogeneous matrix acting on column vectors (active
+rotation, then translation), in mm and rad, Geant4's internal units (see
+StaticData.LENGTH_UNIT_FACTORS). A volume starts from its own placement
+(placement/setTranslation, setRotationAxis/Angle, ...). Each
+"repeaters/insert <type>" row then maps the whole list of placements so far,
+in one array step per repeater (REPEATERS), in the order GATE applies them:
+
+  linear        copy i moved by i * vector (centred on the original with autoCenter)
+  cubicArray    the same on an X x Y x Z grid, X varying fastest
+  ring          turned by first + i * step about the Point1 -> Point2 axis, with
+                step = span / N for a full turn, else span / (N - 1); the copies
+                keep their orientation when enableAutoRotation is off
+  quadrant      copy (i, j), j <= i < lines, moved by spacing * ((i - j) u + j v),
+                u at the orientation angle in the XY plane and v 90 deg further;
+                copies beyond the max range (when > 0) are dropped
+  sphere        copy (i, j) turned by theta = i * theta angle about Z and
+                phi = j * phi angle out of the XY plane, then moved by radius
+                along its new X axis
+  genericRepeater  one copy per row of the placement file (PlacementTable): rotated, then moved
+                by the row's translation (or placed at it, without
+                useRelativeTranslation)
+
+The copies of a daughter are placed in every copy of its mother by one batched
+matrix product. Template-backed volumes are read through their shared rows, so
+expanding a tree does not materialize any parameters.
+"""
+import math
+
+import numpy as np
+
+from Classes.StaticData import LENGTH_UNIT_FACTORS, ANGLE_UNIT_FACTORS
+from Classes.IO.placement_file import PlacementTable
+from Classes.UnitNormalization import numbers_of
+
+AXES = {"X": (1.0, 0.0, 0.0), "Y": (0.0, 1.0, 0.0), "Z": (0.0, 0.0, 1.0)}
+_ALIGN = {    # rotation turning a volume's Z axis onto the named axis
+    "X": ((0.0, 0.0, 1.0), (0.0, 1.0, 0.0), (-1.0, 0.0, 0.0)),
+    "Y": ((1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (0.0, -1.0, 0.0)),
+    "Z": ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)),
+}
+
+
+def _command(path: str) -> str:
+    """'/<volume>/placement/setTranslation' -> 'placement/setTranslation'."""
+    parts = (path or "").split("/", 2)
+    return parts[2] if len(parts) == 3 else ""
+
+
+class ParameterRows(object):
+    """A volume's parameter rows by command, read as numbers in mm / rad."""
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, command, param):
+        self.rows.setdefault(command, param)       # the first row of a command, like get_parameter
+
+    def numbers(self, command) -> list:
+        param = self.rows.get(command)
+        return numbers_of(param.default_value_list) if param is not None else []
+
+    def _factor(self, command, factors, default_unit):
+        param = self.rows.get(command)
+        unit = getattr(param, "default_unit", None)
+        return factors[unit] if unit in factors else factors[default_unit]
+
+    def number(self, command, default=0.0) -> float:
+        values = self.numbers(command)
+        return values[0] if values else float(default)
+
+    def count(self, command, default=1) -> int:
+        return max(0, int(round(self.number(command, default))))
+
+    def length(self, command, default=0.0) -> float:
+        """In mm; a missing (or non-length) unit counts as mm, like in GATE commands."""
+        return self.number(command, default) * self._factor(command, LENGTH_UNIT_FACTORS, "mm")
+
+    def angle(self, command, default=0.0) -> float:
+        """In rad; default and unitless values are in degrees."""
+        return self.number(command, default) * self._factor(command, ANGLE_UNIT_FACTORS, "deg")
+
+    def lengths(self, command, default=(0.0, 0.0, 0.0)) -> np.ndarray:
+        values = self.numbers(command) or list(default)
+        values = (values + [0.0, 0.0, 0.0])[:3]
+        return np.array(values) * self._factor(command, LENGTH_UNIT_FACTORS, "mm")
+
+    def text(self, command, default="") -> str:
+        param = self.rows.get(command)
+        values = param.default_value_list if param is not None else None
+        return str(values[0]).strip() if values and values[0] is not None else default
+
+    def file(self, command) -> str:
+        """Path of a Select row: the file chosen with Browse (kept in value_list), else its default."""
+        param = self.rows.get(command)
+        for values in (param.value_list, param.default_value_list) if param is not None else ():
+            if values and values[0] is not None and str(values[0]).strip() not in ("", "None"):
+                return str(values[0]).strip()
+        return ""
+
+    def flag(self, command, default=True) -> bool:
+        text = self.text(command)
+        return default if not text else text.lower() in ("1", "true", "yes", "on")
+
+
+def volume_rows(obj):
+    """(placement rows, [(repeater type, its rows), ...] in insertion order) of a volume."""
+    own = ParameterRows()
+    repeaters = []
+    for p in obj.peek_parameters():
+        command = _command(p.path)
+        if command.startswith("repeaters/insert "):
+            repeaters.append((command.split(" ", 1)[1].strip(), ParameterRows()))
+        elif repeaters and command.startswith(repeaters[-1][0] + "/"):
+            repeaters[-1][1].add(command[len(repeaters[-1][0]) + 1:], p)
+        else:
+            own.add(command, p)
+    return own, repeaters
+
+
+# ---------------------- matrices ----------------------
+def rotations(axes, angles) -> np.ndarray:
+    """(n, 3, 3) active rotations by angles (n,) about axes (3,) or (n, 3); a zero axis does not rotate."""
+    angles = np.asarray(angles, dtype=np.float64)
+    axes = np.broadcast_to(np.asarray(axes, dtype=np.float64), angles.shape + (3,))
+    norm = np.linalg.norm(axes, axis=-1, keepdims=True)
+    k = np.divide(axes, norm, out=np.zeros_like(axes), where=norm > 0)
+    angles = np.where(norm[..., 0] > 0, angles, 0.0)
+    c, s = np.cos(angles), np.sin(angles)
+    t = 1.0 - c
+    x, y, z = k[..., 0], k[..., 1], k[..., 2]
+    r = np.empty(angles.shape + (3, 3))
+    r[..., 0, 0] = c + x * x * t
+    r[..., 0, 1] = x * y * t - z * s
+    r[..., 0, 2] = x * z * t + y * s
+    r[..., 1, 0] = y * x * t + z * s
+    r[..., 1, 1] = c + y * y * t
+    r[..., 1, 2] = y * z * t - x * s
+    r[..., 2, 0] = z * x * t - y * s
+    r[..., 2, 1] = z * y * t + x * s
+    r[..., 2, 2] = c + z * z * t
+    return r
+
+
+def _transforms(rot, shift) -> np.ndarray:
+    """(n, 4, 4) from rotations (n, 3, 3) and translations (n, 3)."""
+    out = np.zeros((len(rot), 4, 4))
+    out[:, :3, :3] = rot
+    out[:, :3, 3] = shift
+    out[:, 3, 3] = 1.0
+    return out
+
+
+def placement_matrix(rows: ParameterRows) -> np.ndarray:
+    """A volume's own placement in its mother (4, 4)."""
+    m = np.eye(4)
+    axis = AXES.get(rows.text("placement/setRotationAxis"))
+    if axis is not None:
+        m[:3, :3] = rotations(axis, [rows.angle("placement/setRotationAngle")])[0]
+    for command in ("placement/setAxis", "placement/alignToX"):
+        target = rows.text(command)
+        if target in _ALIGN:
+            m[:3, :3] = _ALIGN[target]
+    shift = rows.lengths("placement/setTranslation")
+    magnitude = rows.length("placement/setMagOfTranslation")
+    if magnitude:
+        theta = rows.angle("placement/setThetaOfTranslation")
+        phi = rows.angle("placement/setPhiOfTranslation")
+        shift = magnitude * np.array([math.sin(theta) * math.cos(phi), math.sin(theta) * math.sin(phi), math.cos(theta)])
+    m[:3, 3] = shift
+    return m
+
+
+def _moved(placements, offsets) -> np.ndarray:
+    """Every placement (m, 4, 4) moved by every offset (n, 3): (m * n, 4, 4), copies of one placement together."""
+    out = np.repeat(placements, len(offsets), axis=0)
+    out[:, :3, 3] += np.tile(offsets, (len(placements), 1))
+    return out
+
+
+def _applied(placements, transforms) -> np.ndarray:
+    """transforms (n, 4, 4), in the mother's frame, applied to every placement: (m * n, 4, 4)."""
+    return np.matmul(transforms[None, :], placements[:, None]).reshape(-1, 4, 4)
+
+
+# ---------------------- repeaters ----------------------
+def _linear(placements, rows):
+    n = rows.count("setRepeatNumber")
+    steps = np.arange(n, dtype=np.float64)
+    if rows.flag("autoCenter"):
+        steps -= (n - 1) / 2.0
+    return _moved(placements, steps[:, None] * rows.lengths("setRepeatVector"))
+
+
+def _cubic_array(placements, rows):
+    counts = np.array([rows.count("setRepeatNumberX"), rows.count("setRepeatNumberY"), rows.count("setRepeatNumberZ")])
+    k, j, i = np.meshgrid(np.arange(counts[2]), np.arange(counts[1]), np.arange(counts[0]), indexing="ij")
+    grid = np.stack([i.ravel(), j.ravel(), k.ravel()], axis=1).astype(np.float64)
+    if rows.flag("autoCenter"):
+        grid -= (counts - 1) / 2.0
+    return _moved(placements, grid * rows.lengths("setRepeatVector"))
+
+
+def _ring(placements, rows):
+    n = rows.count("setRepeatNumber")
+    span = rows.angle("setAngularSpan", 360)
+    step = 0.0 if n < 2 else span / n if math.isclose(span, 2 * math.pi) else span / (n - 1)
+    angles = rows.angle("setFirstAngle") + step * np.arange(n)
+    point1 = rows.lengths("setPoint1", (0, 0, 0))
+    rot = rotations(rows.lengths("setPoint2", (0, 0, 1)) - point1, angles)
+    if rows.flag("enableAutoRotation"):
+        # about the axis through point1: x -> R (x - p1) + p1
+        return _applied(placements, _transforms(rot, point1 - rot @ point1))
+    out = np.repeat(placements, n, axis=0)
+    rot = np.tile(rot, (len(placements), 1, 1))
+    out[:, :3, 3] = np.einsum("nij,nj->ni", rot, out[:, :3, 3] - point1) + point1
+    return out
+
+
+def _quadrant(placements, rows):
+    i, j = np.tril_indices(rows.count("setLineNumber"))
+    orientation = rows.angle("setOrientation")
+    u = np.array([math.cos(orientation), math.sin(orientation), 0.0])
+    v = np.array([-u[1], u[0], 0.0])
+    offsets = rows.length("setCopySpacing") * ((i - j)[:, None] * u + j[:, None] * v)
+    max_range = rows.length("setMaxRange")
+    if max_range > 0:
+        offsets = offsets[np.linalg.norm(offsets, axis=1) <= max_range * (1 + 1e-12)]
+    return _moved(placements, offsets)
+
+
+def _sphere(placements, rows):
+    n_theta = rows.count("setRepeatNumberWithTheta", rows.count("setRepeatNumberTheta"))
+    n_phi = rows.count("setRepeatNumberWithPhi", rows.count("setRepeatNumberPhi"))
+    theta_step = rows.angle("setThetaAngle", 360.0 / max(n_theta, 1))
+    phi_step = rows.angle("setPhiAngle", 0)
+    j, i = np.meshgrid(np.arange(n_phi), np.arange(n_theta), indexing="ij")
+    theta, phi = (i.ravel() * theta_step), (j.ravel() * phi_step)
+    rot = rotations((0, 0, 1), theta) @ rotations((0, 1, 0), -phi)
+    return _applied(placements, _transforms(rot, rows.length("setRadius") * rot[:, :, 0]))
+
+
+def _generic(placements, rows):
+    path = rows.file("setPlacementsFilename")
+    if not path:
+        return placements       # no file chosen yet: the volume stays where it is
+    table = PlacementTable.load(path).rows.reshape(-1)
+    angles, axes, shifts = table["angle"], table["axis"], table["translation"]
+    rot = np.tile(rotations(axes, angles), (len(placements), 1, 1))
+    shifts = np.tile(shifts, (len(placements), 1))
+    out = np.repeat(placements, len(angles), axis=0)
+    out[:, :3, :3] = rot @ out[:, :3, :3]
+    if rows.flag("useRelativeTranslation"):
+        out[:, :3, 3] += shifts
+    else:
+        out[:, :3, 3] = shifts
+    return out
+
+
+REPEATERS = {
+    "linear": _linear,
+    "cubicArray": _cubic_array,
+    "ring": _ring,
+    "quadrant": _quadrant,
+    "sphere": _sphere,
+    "genericRepeater": _generic,
+}
+
+
+# ---------------------- volumes and trees ----------------------
+def volume_placements(obj, rows=None) -> np.ndarray:
+    """(N, 4, 4) placements of obj's copies in its mother's frame (N = 1 without repeaters); rows: its volume_rows."""
+    own, repeaters = rows or volume_rows(obj)
+    placements = placement_matrix(own)[None]
+    for kind, rows in repeaters:
+        step = REPEATERS.get(kind)
+        if step is not None:
+            placements = step(placements, rows)
+    return placements
+
+
+def expand_tree(root) -> dict:
+    """
+    root and every enabled volume below it -> (N, 4, 4) placements of its copies
+    in root's frame; copy c of a mother holds copies c * n .. c * n + n - 1 of a
+    daughter with n copies per mother.
+    """
+    frames = {root: np.eye(4)[None]}
+    stack = [root]
+    while stack:
+        mother = stack.pop()
+        outer = frames[mother]
+        for daughter in mother.daughters:
+            if not getattr(daughter, "enabled", True):
+                continue
+            local = volume_placements(daughter)
+            frames[daughter] = np.matmul(outer[:, None], local[None, :]).reshape(-1, 4, 4)
+            stack.append(daughter)
+    return frames
+
+
+def copy_counts(root) -> dict:
+    """root and every enabled volume below it -> number of its copies in root's frame (nothing is composed)."""
+    counts = {root: 1}
+    stack = [root]
+    while stack:
+        mother = stack.pop()
+        for daughter in mother.daughters:
+            if not getattr(daughter, "enabled", True):
+                continue
+            counts[daughter] = counts[mother] * len(volume_placements(daughter))
+            stack.append(daughter)
+    return counts
@@ -39,6 +39,12 @@ class RepeaterParameterBuilder:
                 GateParameter(f"/{name}/sphere/setRepeatNumberTheta", "Repeat Theta", ["TextArea"], [8], [8], LENGTH_UNITS),
                 GateParameter(f"/{name}/sphere/setRadius", "Radius", ["TextArea"], [10], [10], LENGTH_UNITS)
             ]
+        elif repeater_type == "genericRepeater":
+            return [
+                GateParameter(f"/{name}/repeaters/insert genericRepeater", "Insert Generic Repeater", [], [], []),
+                GateParameter(f"/{name}/genericRepeater/setPlacementsFilename", "Placement File", ["Select"], [None], [None]),
+                GateParameter(f"/{name}/genericRepeater/useRelativeTranslation", "Relative Translation", ["DropDown"], ["1"], [["0", "1"]])
+            ]
         elif repeater_type == "generic":
             return [
                 GateParameter(f"/{name}/repeaters/insert generic", "Insert Generic Repeater", [], [], []),
@@ -19,6 +19,68 @@ TEMPERATURE_UNITS = ['K']
 FORCE_PRESSURE_UNITS = ['N', 'Pa', 'bar', 'atm']
 POWER_UNITS = ['W']
 FREQUENCY_UNITS = ['Hz', 'kHz', 'MHz']
+# Value of one unit in Geant4's internal units (CLHEP: mm, rad, ns, MeV, e+, K, mol), for computing with parameter values
+_E_SI = 1.602176634e-19                 # C per e+
+_S, _M = 1e9, 1e3                       # second, meter
+_J = 1e-6 / _E_SI                       # joule
+_KG = _J * _S ** 2 / _M ** 2
+_C = 1.0 / _E_SI                        # coulomb
+_A = _C / _S                            # ampere
+_V = 1e-6                               # volt: MeV / e+
+_T = _V * _S / _M ** 2                  # tesla
+_N = _J / _M                            # newton
+_PA = _N / _M ** 2
+_DEG = 0.017453292519943295
+_TURN = 6.283185307179586
+LENGTH_UNIT_FACTORS = {'pc': 3.0856775807e19, 'km': 1e6, 'm': 1e3, 'cm': 10.0, 'mm': 1.0,
+                       'mum': 1e-3, 'nm': 1e-6, 'Ang': 1e-7}
+SURFACE_UNIT_FACTORS = {'km2': 1e12, 'm2': 1e6, 'cm2': 1e2, 'mm2': 1.0}
+VOLUME_UNIT_FACTORS = {'km3': 1e18, 'm3': 1e9, 'cm3': 1e3, 'mm3': 1.0}
+ANGLE_UNIT_FACTORS = {'rad': 1.0, 'mrad': 1e-3, 'sr': 1.0, 'deg': _DEG}
+TIME_UNIT_FACTORS = {'s': 1e9, 'ms': 1e6, 'mus': 1e3, 'ns': 1.0, 'ps': 1e-3}
+SPEED_UNIT_FACTORS = {f"{length}/{time}": LENGTH_UNIT_FACTORS[length] / (_S * seconds)
+                      for time, seconds in (('s', 1), ('min', 60), ('h', 3600)) for length in ('m', 'cm', 'mm')}
+ANGULAR_SPEED_UNIT_FACTORS = {f"{angle}/{time}": turn / (_S * seconds)
+                              for time, seconds in (('s', 1), ('min', 60), ('h', 3600))
+                              for angle, turn in (('rad', 1.0), ('deg', _DEG), ('rot', _TURN))}
+ENERGY_UNIT_FACTORS = {'eV': 1e-6, 'KeV': 1e-3, 'MeV': 1.0, 'GeV': 1e3, 'TeV': 1e6, 'PeV': 1e9, 'j': _J}
+ACTIVITY_DOSE_UNIT_FACTORS = {'Bq': 1.0 / _S, 'Ci': 3.7e10 / _S, 'Gy': _J / _KG}
+AMOUNT_OF_SUBSTANCE_UNIT_FACTORS = {'mol': 1.0}
+MASS_UNIT_FACTORS = {'mg': 1e-6 * _KG, 'g': 1e-3 * _KG, 'kg': _KG}
+VOLUMIC_MASS_UNIT_FACTORS = {'g/cm3': 1e-3 * _KG / 1e3, 'mg/cm3': 1e-6 * _KG / 1e3, 'kg/m3': _KG / 1e9}
+ELECTRIC_CHARGE_UNIT_FACTORS = {'e+': 1.0, 'C': _C, 'muA': 1e-6 * _A, 'nA': 1e-9 * _A}
+ELECTRIC_CURRENT_UNIT_FACTORS = {'A': _A, 'mA': 1e-3 * _A}
+ELECTRIC_POTENTIAL_UNIT_FACTORS = {'V': _V, 'kV': 1e3 * _V, 'MV': 1e6 * _V, 'kG': 0.1 * _T}
+MAGNETIC_FLUX_UNIT_FACTORS = {'Wb': _V * _S, 'T': _T, 'G': 1e-4 * _T}
+TEMPERATURE_UNIT_FACTORS = {'K': 1.0}
+FORCE_PRESSURE_UNIT_FACTORS = {'N': _N, 'Pa': _PA, 'bar': 1e5 * _PA, 'atm': 101325.0 * _PA}
+POWER_UNIT_FACTORS = {'W': _J / _S}
+FREQUENCY_UNIT_FACTORS = {'Hz': 1.0 / _S, 'kHz': 1e3 / _S, 'MHz': 1e6 / _S}
+# unit list name (as GateParameter.compare_lists reports it) -> factors of its units;
+# UNIT_FACTORS: any unit -> factor (no unit name is in two lists)
+UNIT_LIST_FACTORS = {
+    "LENGTH_UNITS": LENGTH_UNIT_FACTORS,
+    "SURFACE_UNITS": SURFACE_UNIT_FACTORS,
+    "VOLUME_UNITS": VOLUME_UNIT_FACTORS,
+    "ANGLE_UNITS": ANGLE_UNIT_FACTORS,
+    "TIME_UNITS": TIME_UNIT_FACTORS,
+    "SPEED_UNITS": SPEED_UNIT_FACTORS,
+    "ANGULAR_SPEED_UNITS": ANGULAR_SPEED_UNIT_FACTORS,
+    "ENERGY_UNITS": ENERGY_UNIT_FACTORS,
+    "ACTIVITY_DOSE_UNITS": ACTIVITY_DOSE_UNIT_FACTORS,
+    "AMOUNT_OF_SUBSTANCE_UNITS": AMOUNT_OF_SUBSTANCE_UNIT_FACTORS,
+    "MASS_UNITS": MASS_UNIT_FACTORS,
+    "VOLUMIC_MASS_UNITS": VOLUMIC_MASS_UNIT_FACTORS,
+    "ELECTRIC_CHARGE_UNITS": ELECTRIC_CHARGE_UNIT_FACTORS,
+    "ELECTRIC_CURRENT_UNITS": ELECTRIC_CURRENT_UNIT_FACTORS,
+    "ELECTRIC_POTENTIAL_UNITS": ELECTRIC_POTENTIAL_UNIT_FACTORS,
+    "MAGNETIC_FLUX_UNITS": MAGNETIC_FLUX_UNIT_FACTORS,
+    "TEMPERATURE_UNITS": TEMPERATURE_UNIT_FACTORS,
+    "FORCE_PRESSURE_UNITS": FORCE_PRESSURE_UNIT_FACTORS,
+    "POWER_UNITS": POWER_UNIT_FACTORS,
+    "FREQUENCY_UNITS": FREQUENCY_UNIT_FACTORS,
+}
+UNIT_FACTORS = {unit: factor for factors in UNIT_LIST_FACTORS.values() for unit, factor in factors.items()}
 PHYSICS_LISTS = [
     " - ", "FTFP_BERT", "FTFP_BERT_ATL", "FTFP_BERT_HP", "FTFP_BERT_TRV", "FTFP_INCLXX",
     "FTFQGSP_BERT", "FTF_BIC", "LBE", "NuBeam", "QBBC", "QBBC_ABLA", "QGSP_BERT",
@@ -1,7 +1,7 @@
 DARK_MODE_STYLESHEET = """
 QWidget, QToolTip { background-color: #2E2E2E; color: white; }
 QMenuBar, QToolBar, QStatusBar { background-color: #3E3E3E; }
-QTreeWidget, QListWidget, QListView { background-color: #3E3E3E; color: white; }
+QTreeView, QListWidget, QListView { background-color: #3E3E3E; color: white; }
 QLabel, QLineEdit, QComboBox, QPushButton, QCheckBox { color: white; }
 """
 
@@ -9,8 +9,8 @@ LIGHT_MODE_STYLESHEET = """
 QMainWindow { background-color: lightgray;}
 QMenuBar, QToolBar, QStatusBar { background-color: black; color: white; }
 QToolBar QToolButton { color: white; }
-QTreeWidget, QListWidget, QListView, QLabel, QDialog { background-color: white; color: black; }
-QTreeWidget::item:selected { background-color: lightblue; color: black; }
+QTreeView, QListWidget, QListView, QLabel, QDialog { background-color: white; color: black; }
+QTreeView::item:selected { background-color: lightblue; color: black; }
 QLineEdit, QComboBox, QPushButton, QCheckBox { 
     color: black; background-color: lightgrey; border-style: outset; border-width: 1px; border-color: black; 
 } 
@@ -4,23 +4,51 @@ from pathlib import Path
 from PyQt6.QtWidgets import (
     QMainWindow, QVBoxLayout, QWidget, QLabel,
     QMenuBar, QStatusBar, QSplitter, QFileDialog, QLabel, 
-    QSlider, QToolButton
+    QSlider, QToolButton, QProgressDialog, QApplication, QInputDialog
 )
 from PyQt6.QtGui import QAction, QFont, QStandardItemModel, QStandardItem
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QEventLoop
 from Classes.UI.popups.PhysicsProcessPopup import PhysicsProcessPopup
 from Classes.UI.popups.WorldObjectPopup import WorldObjectPopup
 import Classes.StyleSheets as Style
 
 
 from Classes.UI.actions.toolbar import ToolbarBuilder
-from Classes.UI.sections.consoleSection import ConsoleSection
+from Classes.UI.sections.consoleSection import ConsoleSection, INFO, WARNING, ERROR
 from Classes.UI.sections.hierarchySection import HierarchySection
 from Classes.UI.sections.inspectorSection import InspectorSection
 from Classes.UI.popups.MaterialDBViewerDialog import MaterialDBViewerDialog
 from Classes.IO.project_io import ProjectSerializer, ProjectDeserializer
 from Classes.IO.JsonHandler import JsonHandler
 from Classes.GateObject import GateObject
+from Classes.UndoStack import UndoStack, TreeEditor, AddObject, RemoveObject, SetParameter, SetParameters
+from Classes.OverlapCheck import check_overlaps
+from Classes.GeometryBounds import BoundsEngine, apply_sizes, format_extent
+
+
+class _WindowEditor(TreeEditor):
+    """Undo/redo steps applied through the hierarchy model and written to the edit journal."""
+    def __init__(self, window):
+        self.window = window
+
+    def set_parameter(self, obj, param, values, unit):
+        super().set_parameter(obj, param, values, unit)
+        self.window.cManager.journal.set_parameter(obj, param)
+
+    def rename(self, obj, name):
+        old_name = obj.get_name()
+        super().rename(obj, name)
+        self.window.cManager.journal.rename(obj, old_name)
+        self.window.hierarchySection.refresh_object(obj)
+
+    def insert(self, parent, obj, row):
+        super().insert(parent, obj, row)
+        self.window.hierarchySection.add_child_item(parent, obj)
+        self.window.cManager.journal.insert(obj)
+
+    def remove(self, obj):
+        self.window.cManager.journal.remove(obj)
+        self.window.hierarchySection.remove_object(obj)
 
 
 class MainWindow(QMainWindow):
@@ -29,17 +57,27 @@ class MainWindow(QMainWindow):
         self.cManager = commander
         self.json_handler = jsonHandler
         self.current_theme = "light"
+        self.history = UndoStack(_WindowEditor(self))
+        self.bounds = BoundsEngine()        # volume extents, kept in step with the edits
+        self._import_progress = None
         
         self.default_font_size = 16
         self.setupUi()  # Initialize the UI
     
         
-    def write_to_console(self, message):
+    def write_to_console(self, message, level=INFO):
         """Writes a message to the console"""
         if hasattr(self, "consoleSection") and self.consoleSection:
-            self.consoleSection.write(message)
+            self.consoleSection.write(message, level)
         else:
             print("Error while printing to console")
+
+    def closeEvent(self, event):
+        # fold pending edits into the project file; a journal left behind means a crash
+        self.inspectorSection.finish_typing()
+        self.cManager.autosave(wait=True)
+        self.cManager.journal.close()
+        super().closeEvent(event)
         
 
     def setupUi(self):
@@ -57,6 +95,9 @@ class MainWindow(QMainWindow):
         self.consoleSection = ConsoleSection(self)
         self.inspectorSection = InspectorSection(self)
         self.hierarchySection = HierarchySection(self)
+        self.hierarchySection.model.enabledChanged.connect(self.bounds.invalidate_subtree)
+        self.hierarchySection.model.loadFailed.connect(
+            lambda obj, error: self.write_to_console(f"Cannot load '{obj.get_name()}': {error}", ERROR))
         
         # Splitters (Hierarchy and Inspector sections)
         top_splitter = QSplitter(Qt.Orientation.Horizontal, self.centralwidget)
@@ -75,17 +116,24 @@ class MainWindow(QMainWindow):
         # Setup toolbar
         self.toolbar_builder = ToolbarBuilder(self)
         self.toolbar = self.addToolBar("CT Toolbar")
-        self.toolbar_builder.build_toolbar(
+        actions = self.toolbar_builder.build_toolbar(
             self.toolbar,
             on_import=lambda: self.browse_file("import_json"),
             on_export=lambda: self.browse_file("export_json"),
-            on_apply=lambda: None,
+            on_apply=lambda: self.browse_file("export_macro"),
             on_run=lambda: None,
             on_toggle_theme=self.toggle_theme,
             on_view_material_db=self.open_material_db_viewer,
             on_exit=self.close,
             on_add=self.open_create_object_popup,
+            on_undo=self.undo,
+            on_redo=self.redo,
+            on_delete=self.delete_selected_object,
+            on_check_overlaps=self.check_overlaps,
+            on_fit_contents=self.fit_to_contents,
         )
+        self.history_actions = actions
+        self.update_history_actions()
 
         self.action_view_mat = getattr(self.toolbar_builder, "action_view_mat", None)
         if self.action_view_mat:
@@ -106,8 +154,7 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("MainWindow")
         
         # Connect hierarchy events
-        self.hierarchySection.tree.itemClicked.connect(self.inspectorSection.populate_parameters)
-        self.hierarchySection.tree.itemChanged.connect(self.on_tree_item_check_changed)
+        self.hierarchySection.tree.clicked.connect(self.inspectorSection.populate_parameters)
         
         # Populate
         if self.cManager.node_tree:
@@ -153,8 +200,7 @@ class MainWindow(QMainWindow):
         
         self.hierarchySection.apply_font(size)
         self.inspectorSection.apply_font(size)
-        
-        # self.inspectorSection.resize_parameters(size)
+        self.inspectorSection.resize_parameters(size)     # restyles the bound rows, no repopulate
         
          # Resize toolbar buttons
         for action in self.toolbar.actions():
@@ -164,27 +210,163 @@ class MainWindow(QMainWindow):
                 if isinstance(tool_button, QToolButton):
                     tool_button.setIconSize(QSize(size + 8, size + 8))
         
-        current = self.hierarchySection.tree.currentItem()
-        if current:
-            self.inspectorSection.populate_parameters(current)        
-        
     # ======= hierarchy + inspector =======
-    def on_tree_item_check_changed(self, item, column: int):
-        state = item.checkState(0) == Qt.CheckState.Checked
-        self.hierarchySection.set_item_enabled_recursively(item, state)
+    def refresh_inspector(self):
+        """Rebuild the inspector for the selected object (e.g. after its dropdown options changed)."""
+        current = self.hierarchySection.current_object()
+        if current:
+            self.inspectorSection.populate_parameters(current)
+
+    # ======= progressive import =======
+    def begin_import(self, node):
+        """Show node's tree while a project is applied onto it (see CTCommanderManager.stream_project_snapshot)."""
+        self.populate_hierarchy_tree(node)
+        self.hierarchySection.expand_root()
+        self._import_progress = QProgressDialog("Importing project...", None, 0, 1000, self)
+        self._import_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self._import_progress.setMinimumDuration(300)     # only for imports that take a while
+
+    def import_progress(self, fraction, parents):
+        """fraction of the file read; parents got new daughters since the last call."""
+        self.hierarchySection.children_appended(parents)
+        if self._import_progress is not None:
+            self._import_progress.setValue(int(fraction * 1000))
+        # repaint, but no edits of a half-loaded tree
+        QApplication.processEvents(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
+
+    def end_import(self):
+        if self._import_progress is not None:
+            self._import_progress.close()
+            self._import_progress = None
+
+    # ======= undo / redo =======
+    def push_undo(self, command):
+        """Record an edit that was just made (see Classes/UndoStack.py)."""
+        self.history.push(command)
+        self._bounds_changed(command)
+        self.update_history_actions()
+
+    def reset_history(self):
+        self.history.clear()
+        self.bounds.clear()
+        self.update_history_actions()
+
+    def _bounds_changed(self, command):
+        """Drop the cached extents a command (done, undone or redone) may have moved."""
+        if isinstance(command, AddObject):      # and RemoveObject
+            self.bounds.invalidate(command.parent)
+        elif isinstance(command, SetParameter):
+            self.bounds.parameter_changed(command.obj, command.param)
+        elif isinstance(command, SetParameters):
+            self.bounds.invalidate(command.obj)
+
+    def update_history_actions(self):
+        for key, can, text in (("undo", self.history.can_undo(), self.history.undo_text()),
+                               ("redo", self.history.can_redo(), self.history.redo_text())):
+            action = self.history_actions.get(key)
+            if action is not None:
+                action.setEnabled(can)
+                action.setStatusTip(f"{key.capitalize()} {text}" if can else "")
+
+    def undo(self):
+        self.inspectorSection.finish_typing()       # the field being typed into is the last step
+        command = self.history.undo()
+        if command is not None:
+            self._bounds_changed(command)
+            self._after_history(f"Undone: {command.text}")
+
+    def redo(self):
+        self.inspectorSection.finish_typing()
+        command = self.history.redo()
+        if command is not None:
+            self._bounds_changed(command)
+            self._after_history(f"Redone: {command.text}")
+
+    def _after_history(self, message):
+        self.update_history_actions()
+        current = self.hierarchySection.current_object()
+        if current is not None:
+            self.inspectorSection.populate_parameters(current)
+        else:
+            self.inspectorSection.clear()
+        self.write_to_console(message)
+
+    def delete_selected_object(self):
+        """Delete the selected volume (with its daughters), source or distribution."""
+        obj = self.hierarchySection.current_object()
+        parent = obj.parent if obj is not None else None
+        if parent is None or (parent.get_name() not in ("source", "distributions")
+                              and not self.inspectorSection._is_under_world(obj)):
+            self.write_to_console("Select a volume, source or distribution to delete.")
+            return
+        command = RemoveObject(obj)
+        self.cManager.journal.remove(obj)
+        self.hierarchySection.remove_object(obj)
+        self.push_undo(command)
+        self.inspectorSection.clear()
+        self.write_to_console(f"Deleted '{obj.get_name()}'.")
+
+    def _world(self):
+        root = self.cManager.node_tree
+        return next((d for d in root.daughters if d.get_name() == "world"), None) if root is not None else None
+
+    def check_overlaps(self):
+        """Report overlapping volumes and volumes outside their mother in the console."""
+        world = self._world()
+        if world is None:
+            self.write_to_console("No world volume to check.")
+            return
+        report = check_overlaps(world)
+        lines = report.lines()
+        for line in lines[:-1]:
+            self.write_to_console(line, WARNING)
+        self.write_to_console(lines[-1], INFO if report.ok else WARNING)
+
+    def fit_to_contents(self):
+        """Report the extents of the selected volume (else the world) and offer to size it around its daughters."""
+        world = self._world()
+        obj = self.hierarchySection.current_object()
+        if obj is None or not (obj is world or self.inspectorSection._is_under_world(obj)):
+            obj = world
+        if obj is None:
+            self.write_to_console("No world volume to fit.")
+            return
+        name = obj.get_name()
+        try:
+            extent = self.bounds.extent(obj)
+        except (OSError, ValueError) as e:
+            self.write_to_console(f"Cannot measure '{name}': {e}", ERROR)
+            return
+        self.write_to_console(f"'{name}' solid: {format_extent(extent.own)}")
+        self.write_to_console(f"'{name}' daughters: {format_extent(extent.content)}")
+        if obj is not world:
+            self.write_to_console(f"'{name}' in its mother ({extent.copies} copies): {format_extent(extent.placed)}")
+        if not self.bounds.fit(obj):
+            self.write_to_console(f"'{name}' cannot be sized to its contents: it needs daughters "
+                                  f"and a box, cylinder or sphere shape.")
+            return
+        margin, ok = QInputDialog.getDouble(self, "Fit to Contents",
+                                            f"Size '{name}' around its daughters, with a margin (mm) of:",
+                                            10.0, 0.0, 1e9, 3)
+        if not ok:
+            return
+        changes = apply_sizes(obj, self.bounds.fit(obj, margin))
+        if not changes:
+            self.write_to_console(f"'{name}' already fits its contents.")
+            return
+        for param, _, _ in changes:
+            self.cManager.journal.set_parameter(obj, param)
+        self.push_undo(SetParameters(obj, changes, f"Fit {name} to contents"))
+        self.refresh_inspector()
+        sizes = ", ".join(f"{p.displayed_name} {p.default_value_list[0]:g} {p.default_unit}" for p, _, _ in changes)
+        self.write_to_console(f"Resized '{name}': {sizes}")
 
     def populate_hierarchy_tree(self, node):
         # snapshot
         exp, sel, scroll = self.hierarchySection.snapshot_state()
         
-        tree = self.hierarchySection.tree
-        tree.setUpdatesEnabled(False)
-        try:
-            old_block = tree.blockSignals(True)
-            self.hierarchySection.populate(node, self.consoleSection.write)
-        finally:
-            tree.blockSignals(old_block)
-            tree.setUpdatesEnabled(True)
+        self.hierarchySection.populate(node)
+        self.bounds.clear()
             
         #restore
         self.hierarchySection.restore_state(exp, sel, scroll)    
@@ -221,46 +403,53 @@ class MainWindow(QMainWindow):
         if action == "export_json":
             dlg.setAcceptMode(QFileDialog.AcceptMode.AcceptSave)   # <-- Save dialog
             dlg.setFileMode(QFileDialog.FileMode.AnyFile)          # allow new file
-            dlg.setNameFilter("JSON files (*.json)")
+            dlg.setNameFilter("JSON files (*.json);;Project archives (*.ctproj)")
             dlg.setDefaultSuffix("json")
             dlg.selectFile("project.json")
+        elif action == "export_macro":
+            dlg.setAcceptMode(QFileDialog.AcceptMode.AcceptSave)
+            dlg.setFileMode(QFileDialog.FileMode.AnyFile)
+            dlg.setNameFilter("GATE macros (*.mac)")
+            dlg.setDefaultSuffix("mac")
+            dlg.selectFile("main.mac")
         elif action == "import_json":
             dlg.setAcceptMode(QFileDialog.AcceptMode.AcceptOpen)
             dlg.setFileMode(QFileDialog.FileMode.ExistingFile)
-            dlg.setNameFilter("JSON files (*.json);;All files (*.*)")
+            dlg.setNameFilter("Projects (*.json *.ctproj);;All files (*.*)")
         elif action == "import_material_db":
             dlg.setAcceptMode(QFileDialog.AcceptMode.AcceptOpen)
-            dlg.setFileMode(QFileDialog.FileMode.ExistingFile)
-            # ... your start dir / filter ...
+            dlg.setFileMode(QFileDialog.FileMode.ExistingFiles)
+            dlg.setNameFilter("Material databases (*.db);;All files (*.*)")
 
         if not dlg.exec():
             return
 
+        if action == "import_material_db":
+            self.cManager.import_material_dbs(dlg.selectedFiles())
+            return
+
         path = dlg.selectedFiles()[0]
-        if action == "export_json" and not path.lower().endswith(".json"):
+        if action == "export_json" and not path.lower().endswith((".json", ".ctproj")):
             path += ".json"
+        if action == "export_macro" and not path.lower().endswith(".mac"):
+            path += ".mac"
 
         if action == "export_json":
             self.cManager.export_json(path)
         elif action == "import_json":
             self.cManager.import_json(path)
-        elif action == "import_material_db":
-            self.cManager.import_material_db(path)
+        elif action == "export_macro":
+            self.cManager.export_macro(path)
 
 
     def open_create_object_popup(self):
-        tree = self.hierarchySection.tree
-        selected_item = tree.currentItem()
-        if not selected_item:
+        parent_obj = self.hierarchySection.current_object()
+        if not parent_obj:
             self.consoleSection.write("Invalid parent item")
             print("Invalid parent item selected.")
             return
-            
-        parent_obj = selected_item.data(0, Qt.ItemDataRole.UserRole)
-        if not parent_obj:
-            return
         
-        existing_names = [tree.topLevelItem(i).text(0) for i in range(tree.topLevelItemCount())]
+        existing_names = self.hierarchySection.top_level_names()
         
         dialog = WorldObjectPopup(
             self, 
@@ -272,38 +461,13 @@ class MainWindow(QMainWindow):
     
     def add_object_to_tree(self, new_obj, parent_obj):
         parent_obj.add_daughter(new_obj)
+        self.cManager.journal.add(new_obj, "volume", new_obj.subtype)
+        self.push_undo(AddObject(new_obj))
         self.consoleSection.write(f"Added object '{new_obj.get_name()}' to '{parent_obj.get_name()}'.")
         
-        # Try direct insert. If not found, fall back to repopulate-with-restore.
-        item = self.hierarchySection.add_child_item(parent_obj,new_obj)
-        if item is not None:
-            self.inspectorSection.populate_parameters(item)
-            return
-        
-        if item is None:
-            exp, sel, scroll = self.hierarchySection.snapshot_state()
-            self.populate_hierarchy_tree(self.cManager.node_tree)
-            self.hierarchySection.restore_state(exp, sel, scroll)
-            # Select new node after fallback:
-            tree = self.hierarchySection.tree
-            def find_and_select_new(item):
-                obj = item.data(0, Qt.ItemDataRole.UserRole)
-                if obj is new_obj:
-                    # expand its parent so you see it
-                    parent = item.parent()
-                    if parent:
-                        parent.setExpanded(True)
-                    tree.setCurrentItem(item)
-                    return True
-                for i in range(item.childCount()):
-                    if find_and_select_new(item.child(i)):
-                        return True
-                return False
-
-            root = tree.invisibleRootItem()
-            for i in range(root.childCount()):
-                if find_and_select_new(root.child(i)):
-                    break
+        # Insert the row in place (the model announces it, nothing is rebuilt)
+        if self.hierarchySection.add_child_item(parent_obj, new_obj) is not None:
+            self.inspectorSection.populate_parameters(new_obj)
                 
     def set_material_db_available(self, available: bool):
         """Enable/disable the 'View Material DB' action."""
@@ -311,12 +475,12 @@ class MainWindow(QMainWindow):
             self.action_view_mat.setEnabled(bool(available))
 
     def open_material_db_viewer(self):
-        # Ask manager for the loaded GMaterialDB
-        gmat_db = getattr(self.cManager, "material_db", None)
-        if not gmat_db:
+        # Ask manager for the loaded databases
+        registry = self.cManager.materials
+        if not len(registry):
             self.write_to_console("No material database loaded.")
             return
-        dlg = MaterialDBViewerDialog(self, gmat_db)
+        dlg = MaterialDBViewerDialog(self, registry)
         dlg.exec()
         
     
@@ -332,7 +496,7 @@ class MainWindow(QMainWindow):
                     source_obj = child
                     break
             if source_obj is None:
-                self.write_to_console("Error: could not find '/source' node.")
+                self.write_to_console("Error: could not find '/source' node.", ERROR)
                 return
 
             from Classes.GObjectCreator import GObjectCreator
@@ -340,34 +504,15 @@ class MainWindow(QMainWindow):
 
             # add to data model
             source_obj.add_daughter(new_src)
+            self.cManager.journal.add(new_src, "source", new_src.source_type)
+            self.push_undo(AddObject(new_src))
 
-            # add to tree (try incremental first)
-            item = self.hierarchySection.add_child_item(source_obj, new_src)
-            if item is None:
-                # fallback full refresh with state restore
-                exp, sel, scroll = self.hierarchySection.snapshot_state()
-                self.populate_hierarchy_tree(self.cManager.node_tree)
-                self.hierarchySection.restore_state(exp, sel, scroll)
-                # try to select it
-                tree = self.hierarchySection.tree
-                def walk(it):
-                    obj = it.data(0, Qt.ItemDataRole.UserRole)
-                    if obj is new_src:
-                        if it.parent(): it.parent().setExpanded(True)
-                        tree.setCurrentItem(it)
-                        return True
-                    for i in range(it.childCount()):
-                        if walk(it.child(i)): return True
-                    return False
-                root = tree.invisibleRootItem()
-                for i in range(root.childCount()):
-                    if walk(root.child(i)): break
-            else:
-                self.hierarchySection.tree.setCurrentItem(item)
+            # add to tree
+            self.hierarchySection.add_child_item(source_obj, new_src)
 
             self.write_to_console(f"Created source '{name}' ({src_type}).")
         except Exception as e:
-            self.write_to_console(f"Failed to create source: {e}")
+            self.write_to_console(f"Failed to create source: {e}", ERROR)
             
     def add_distribution_from_popup(self, name: str, dtype: str):
         """
@@ -381,7 +526,7 @@ class MainWindow(QMainWindow):
                     distributions_obj = child
                     break
             if distributions_obj is None:
-                self.write_to_console("Error: could not find '/distributions' node.")
+                self.write_to_console("Error: could not find '/distributions' node.", ERROR)
                 return
 
             from Classes.GObjectCreator import GObjectCreator
@@ -390,56 +535,32 @@ class MainWindow(QMainWindow):
             new_dist = GObjectCreator.add_distribution_under_root(
                 distributions_obj, name, dtype
             )
+            self.cManager.journal.add(new_dist, "distribution", dtype)
+            self.push_undo(AddObject(new_dist))
 
-            # add to tree (try incremental first)
-            item = self.hierarchySection.add_child_item(distributions_obj, new_dist)
-            if item is None:
-                # fallback full refresh with state restore
-                exp, sel, scroll = self.hierarchySection.snapshot_state()
-                self.populate_hierarchy_tree(self.cManager.node_tree)
-                self.hierarchySection.restore_state(exp, sel, scroll)
-
-                # try selecting the new node
-                tree = self.hierarchySection.tree
-                def walk(it):
-                    obj = it.data(0, Qt.ItemDataRole.UserRole)
-                    if obj is new_dist:
-                        if it.parent(): it.parent().setExpanded(True)
-                        tree.setCurrentItem(it)
-                        return True
-                    for i in range(it.childCount()):
-                        if walk(it.child(i)): return True
-                    return False
-                root = tree.invisibleRootItem()
-                for i in range(root.childCount()):
-                    if walk(root.child(i)): break
-            else:
-                self.hierarchySection.tree.setCurrentItem(item)
+            # add to tree
+            self.hierarchySection.add_child_item(distributions_obj, new_dist)
 
             self.write_to_console(f"Created distribution '{new_dist.get_name()}' ({dtype}).")
 
         except Exception as e:
-            self.write_to_console(f"Failed to create distribution: {e}")
+            self.write_to_console(f"Failed to create distribution: {e}", ERROR)
             
             
     def save_project_to_json(self, path: str, changed_only=False):
         root: GateObject = self.cManager.node_tree
         ser = ProjectSerializer(include_only_changed=changed_only)
-        data = ser.object_to_dict(root)
-        # ensure only the top carries the schema marker
-        data["_schema"] = "1.0"
+        data = ser.to_document(root)
         JsonHandler().save(path, data)
         self.write_to_console(f"Saved project to {path}")
 
     def load_project_from_json(self, path: str):
         raw = JsonHandler().load(path)
         # You can validate schema here if you want
-        deser = ProjectDeserializer(material_db=self.material_db, gate_version=(9,3,0))
+        deser = ProjectDeserializer(material_db=self.cManager.get_material_db(), gate_version=(9,3,0))
         new_root = deser.dict_to_object(raw, parent=None)
 
         # swap into controller + refresh UI
         self.cManager.node_tree = new_root
-        exp, sel, scroll = self.hierarchySection.snapshot_state() if hasattr(self.hierarchySection, "snapshot_state") else (None,None,None)
-        self.populate_hierarchy_tree(new_root)
-        if exp is not None: self.hierarchySection.restore_state(exp, sel, scroll)
+        self.populate_hierarchy_tree(new_root)      # keeps the expanded rows and the selection
         self.write_to_console(f"Loaded project from {path}")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import QToolBar
-from PyQt6.QtGui import QAction
+from PyQt6.QtGui import QAction, QKeySequence
 
 class ToolbarBuilder:
     def __init__(self, parent):
@@ -13,11 +13,13 @@ class ToolbarBuilder:
         toolbar.addAction(action)
         return action
     
-    def build_toolbar(self, toolbar: QToolBar,*, on_import, on_export, on_apply, on_run, on_toggle_theme, on_exit, on_add, on_view_material_db=None):
+    def build_toolbar(self, toolbar: QToolBar,*, on_import, on_export, on_apply, on_run, on_toggle_theme, on_exit, on_add, on_view_material_db=None,
+                      on_undo=None, on_redo=None, on_delete=None, on_check_overlaps=None,
+                      on_fit_contents=None):
         actions = {}
         actions["import"] = self._add_action(toolbar, "Import", "Import Json configuration file", on_import)
         actions["export"] = self._add_action(toolbar, "Export", "Export configurations as Json", on_export)
-        actions["apply"] = self._add_action(toolbar, "Apply Configurations", "Apply Configurations as JSON file", on_apply)
+        actions["apply"] = self._add_action(toolbar, "Apply Configurations", "Export configurations as GATE macro", on_apply)
         actions["run"] = self._add_action(toolbar, "Run Simulation", "Run the GATE simulation", on_run)
         actions["toggle"] = self._add_action(toolbar, "Toggle Theme", "Switch between light and dark mode", on_toggle_theme)
         if on_view_material_db:
@@ -27,4 +29,19 @@ class ToolbarBuilder:
             self.action_view_mat.setEnabled(False)
         actions["exit"] = self._add_action(toolbar, "Exit", "Exit the application", on_exit)
         actions["add"] = self._add_action(toolbar, "Add Geometry", "Create World Object", on_add)
+        if on_check_overlaps:
+            actions["overlaps"] = self._add_action(toolbar, "Check Overlaps",
+                                                   "Look for overlapping volumes before running GATE", on_check_overlaps)
+        if on_fit_contents:
+            actions["fit"] = self._add_action(toolbar, "Fit to Contents",
+                                              "Show the extents of the selected volume (or the world) and size it around its daughters",
+                                              on_fit_contents)
+        for key, name, tip, cb, shortcut in (
+            ("delete", "Delete", "Delete the selected volume, source or distribution", on_delete, QKeySequence.StandardKey.Delete),
+            ("undo", "Undo", "Undo the last edit", on_undo, QKeySequence.StandardKey.Undo),
+            ("redo", "Redo", "Redo the last undone edit", on_redo, QKeySequence.StandardKey.Redo),
+        ):
+            if cb:
+                actions[key] = self._add_action(toolbar, name, tip, cb)
+                actions[key].setShortcut(QKeySequence(shortcut))
         return actions
\ No newline at end of file
@@ -0,0 +1,93 @@
+import weakref
+from bisect import bisect_left, bisect_right
+
+from PyQt6.QtCore import QStringListModel
+
+from Classes.GateParameter import shared_list
+
+
+class OptionListModel(QStringListModel):
+    """
+    The items of one dropdown option list, shared by every combo showing that
+    list: binding a row to a parameter is a setModel, not a copy of the strings.
+
+    search() answers filter queries from indexes built on first use:
+      - prefix matches: bisect over the lowercased items, sorted once
+      - substring matches: str.find over one lowercased, newline-joined copy
+    """
+    # id(option list) -> model; option lists are GateParameter shared tables,
+    # so equal lists give the same model, and the model keeps its list alive.
+    # Held weakly: a model lives while a combo row holds it, then goes with its
+    # list and search index (e.g. the material names each registry load replaces)
+    _SHARED: "weakref.WeakValueDictionary[int, OptionListModel]" = weakref.WeakValueDictionary()
+
+    def __init__(self, items, parent=None):
+        self.items = items
+        self.texts = [str(v) for v in items]
+        super().__init__(self.texts, parent)
+        self._rows = None           # text -> first row
+        self._sorted_keys = None    # lowercased texts, sorted
+        self._sorted_rows = None    # row of each sorted key
+        self._haystack = None       # "\n".join(lowercased texts)
+        self._starts = None         # offset of each row in _haystack
+
+    @classmethod
+    def shared(cls, items) -> "OptionListModel":
+        model = cls._SHARED.get(id(items))
+        if model is not None and model.items is items:
+            return model
+        items = shared_list(items)
+        model = cls._SHARED.get(id(items))
+        if model is None or model.items is not items:
+            model = cls._SHARED[id(items)] = cls(items)
+        return model
+
+    def row_of(self, text) -> int:
+        """Row of the first item shown as text, -1 if none (findText without the scan)."""
+        if self._rows is None:
+            self._rows = {}
+            for row, t in enumerate(self.texts):
+                self._rows.setdefault(t, row)
+        return self._rows.get(text, -1)
+
+    def _build_search_index(self):
+        lowered = [t.lower() for t in self.texts]
+        order = sorted(range(len(lowered)), key=lowered.__getitem__)
+        self._sorted_keys = [lowered[r] for r in order]
+        self._sorted_rows = order
+        self._haystack = "\n".join(lowered)
+        starts, pos = [], 0
+        for t in lowered:
+            starts.append(pos)
+            pos += len(t) + 1
+        self._starts = starts
+
+    def search(self, text) -> list[str]:
+        """Items containing text (case-insensitive): prefix matches first, each group in list order."""
+        needle = text.strip().lower()
+        if not needle:
+            return self.texts
+        if self._sorted_keys is None:
+            self._build_search_index()
+
+        keys = self._sorted_keys
+        lo = bisect_left(keys, needle)
+        hi = bisect_left(keys, needle + "\uffff", lo)
+        prefix = sorted(self._sorted_rows[lo:hi])
+
+        seen = set(prefix)
+        inner = []
+        haystack, starts = self._haystack, self._starts
+        n = len(starts)
+        i = haystack.find(needle)
+        while i >= 0:
+            row = bisect_right(starts, i) - 1
+            if row not in seen:
+                seen.add(row)
+                inner.append(row)
+            if row + 1 >= n:
+                break
+            i = haystack.find(needle, starts[row + 1])     # next item, one hit per item is enough
+
+        texts = self.texts
+        return [texts[r] for r in prefix] + [texts[r] for r in inner]
@@ -0,0 +1,56 @@
+from PyQt6.QtCore import QStringListModel, QTimer
+from PyQt6.QtWidgets import QComboBox, QCompleter
+
+from Classes.UI.parameters.BigPopupCombo import BigPopupCombo
+
+
+class SearchableCombo(BigPopupCombo):
+    """
+    Editable combo for long option lists (materials). Typing narrows the
+    choices in a completer popup filled from OptionListModel.search; the arrow
+    still opens the whole list. The choice only changes when the text names an
+    item (picked in the popup, or typed in full), otherwise the text reverts,
+    so listen to currentIndexChanged rather than currentTextChanged.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+
+        self._matches = QStringListModel(self)
+        completer = QCompleter(self._matches, self)
+        completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        completer.activated.connect(self._pick)
+        self.setCompleter(completer)
+
+        self.lineEdit().setPlaceholderText("Type to filter...")
+        self.lineEdit().textEdited.connect(self._filter)
+        self.lineEdit().editingFinished.connect(self._commit)
+
+    def setModel(self, model):
+        super().setModel(model)
+        self.completer().setModel(self._matches)    # QComboBox hands its model to the completer
+
+    def focusInEvent(self, e):
+        super().focusInEvent(e)
+        QTimer.singleShot(0, self.lineEdit().selectAll)    # typing replaces the shown item
+
+    def _filter(self, text):
+        self._matches.setStringList(self.model().search(text))
+        self.completer().complete()
+
+    def _pick(self, text):
+        row = self.model().row_of(text)
+        if row >= 0:
+            self.setCurrentIndex(row)
+
+    def _commit(self):
+        text = self.lineEdit().text()
+        row = self.model().row_of(text)
+        if row < 0:
+            matches = self.model().search(text)
+            if len(matches) == 1:
+                row = self.model().row_of(matches[0])
+        if row >= 0:
+            self.setCurrentIndex(row)
+        self.lineEdit().setText(self.itemText(self.currentIndex()))
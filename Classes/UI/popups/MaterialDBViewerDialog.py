@@ -1,15 +1,19 @@
+import os
+
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTabWidget, QTableView, QPushButton, QHBoxLayout
 from PyQt6.QtGui import QStandardItemModel, QStandardItem
 from PyQt6.QtCore import Qt
 
+from Classes.MaterialPhysics import MaterialPhysics
+
 class MaterialDBViewerDialog(QDialog):
-    def __init__(self, parent, gmat_db):
+    def __init__(self, parent, registry):
         super().__init__(parent)
         self.setWindowTitle("Material Database")
         self.setModal(True)
         self.resize(800, 600)
 
-        self.gmat_db = gmat_db
+        self.registry = registry    # MaterialRegistry: loaded databases, merged by name
 
         layout = QVBoxLayout(self)
 
@@ -39,30 +43,57 @@ class MaterialDBViewerDialog(QDialog):
 
     def _build_elements_model(self):
         model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(["Name", "Symbol", "Z", "Molar Mass"])
+        model.setHorizontalHeaderLabels(["Name", "Symbol", "Z", "Molar Mass", "Database"])
 
-        for elem in self.gmat_db.element_DB.values():
-            row = [
-                QStandardItem(str(elem.name)),
-                QStandardItem(str(elem.symbol)),
-                QStandardItem(str(elem.atomic_number)),
-                QStandardItem(str(elem.atomic_weight)),
-            ]
-            for it in row:
-                it.setEditable(False)
-            model.appendRow(row)
+        seen = set()
+        for path in self.registry.paths:
+            for elem in self.registry.databases[path].element_DB.values():
+                if elem.name in seen:
+                    continue
+                seen.add(elem.name)
+                row = [
+                    QStandardItem(str(elem.name)),
+                    QStandardItem(str(elem.symbol)),
+                    QStandardItem(str(elem.atomic_number)),
+                    QStandardItem(str(elem.atomic_weight)),
+                    QStandardItem(os.path.basename(path)),
+                ]
+                for it in row:
+                    it.setEditable(False)
+                model.appendRow(row)
 
         return model
 
     def _build_materials_model(self):
-        # For now materials only have a name in your class.
-        # Later you can extend with density, composition, etc.
         model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(["Name"])
+        model.setHorizontalHeaderLabels(["Name", "Density (g/cm3)", "State", "Z eff", "Rel. electron density",
+                                         "I (eV)", "Composition (mass fractions)", "Database"])
 
-        for mat in self.gmat_db.material_DB.values():
-            it = QStandardItem(str(mat.name))
-            it.setEditable(False)
-            model.appendRow([it])
+        registry = self.registry
+        for path in registry.paths:
+            db = registry.databases[path]
+            store = db.store
+            physics = MaterialPhysics.for_db(db)
+            columns = [store.density, physics.z_eff, physics.relative_electron_density, physics.mean_excitation]
+            for row, name in enumerate(store.names):
+                if registry.index[name] != path:
+                    continue        # defined by an earlier database
+                fractions = store.fractions[row]
+                composition = ", ".join(f"{store.element_names[col]} {fractions[col]:.4g}"
+                                        for col in fractions.nonzero()[0])
+                numbers = []
+                for column in columns:
+                    it = QStandardItem()
+                    it.setData(round(float(column[row]), 4), Qt.ItemDataRole.DisplayRole)    # numeric sort
+                    numbers.append(it)
+                source = QStandardItem(os.path.basename(path))
+                shadowed = registry.duplicates.get(name, [])[1:]
+                if shadowed:
+                    source.setToolTip("Also defined in " + ", ".join(os.path.basename(p) for p in shadowed))
+                items = [QStandardItem(name), numbers[0], QStandardItem(store.state[row] or ""),
+                         *numbers[1:], QStandardItem(composition), source]
+                for it in items:
+                    it.setEditable(False)
+                model.appendRow(items)
 
-        return model
\ No newline at end of file
+        return model
@@ -84,8 +84,8 @@ class PhysicsProcessPopup(QDialog):
         return label
 
     def _already_added(self, process_name):
-        return any(param.path.endswith(process_name)
-                   for param in self.physics_obj.parameters if "Process" in param.displayed_name)
+        param = self.physics_obj.get_parameter(f"/physics/{process_name}")
+        return param is not None and "Process" in param.displayed_name
 
     def _get_existing_processes(self):
         return [p.displayed_name.split(" ")[0]
@@ -1,7 +1,70 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QListWidget
+from collections import deque
+from logging import DEBUG, INFO, WARNING, ERROR
+
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QListView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+from PyQt6.QtGui import QColor
 from .header import create_header_section
 
+LEVEL_COLORS = {DEBUG: QColor("gray"), WARNING: QColor("darkorange"), ERROR: QColor("red")}
+
+
+class ConsoleModel(QAbstractListModel):
+    """List model over a bounded ring buffer of (level, message) lines."""
+
+    def __init__(self, max_lines: int, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self._lines = deque()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._lines)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        level, message = self._lines[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return message
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return LEVEL_COLORS.get(level)
+        return None
+
+    def append_lines(self, lines):
+        """Append a batch: one remove signal for what falls off the top, one insert signal."""
+        lines = lines[-self.max_lines:]
+        overflow = len(self._lines) + len(lines) - self.max_lines
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._lines.popleft()
+            self.endRemoveRows()
+        first = len(self._lines)
+        self.beginInsertRows(QModelIndex(), first, first + len(lines) - 1)
+        self._lines.extend(lines)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._lines.clear()
+        self.endResetModel()
+
+    def messages(self):
+        return [message for _level, message in self._lines]
+
+
 class ConsoleSection:
+    """
+    Console log. Messages are buffered and flushed to the view in batches
+    (at most every FLUSH_MS), the view keeps the last MAX_LINES, and messages
+    below `level` are dropped on write. The buffer is bounded too: a burst
+    written with no event loop in between (e.g. a synchronous import logging
+    per node) keeps its last messages, and the flush reports how many were
+    dropped (`dropped` counts them all).
+    """
+
+    MAX_LINES = 5000
+    FLUSH_MS = 50
     
     def __init__(self,parent):
         """Creates and configures the console section."""
@@ -11,13 +74,49 @@ class ConsoleSection:
         self.label = create_header_section(self.widget, "Console Log")
         self.layout.addWidget(self.label)
         
-        self.list = QListWidget()
+        self.level = INFO
+        self.model = ConsoleModel(self.MAX_LINES, self.widget)
+        self._pending = deque(maxlen=self.MAX_LINES - 1)     # one line left for the dropped notice
+        self._dropped = 0       # since the last flush
+        self.dropped = 0
+        self._timer = QTimer(self.widget)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FLUSH_MS)
+        self._timer.timeout.connect(self.flush)
+
+        self.list = QListView()
+        self.list.setModel(self.model)
+        self.list.setUniformItemSizes(True)
         self.layout.addWidget(self.list)
         
-    def write(self, message: str):
+    def write(self, message: str, level: int = INFO):
         """Writes a message to the console"""
+        if level < self.level:
+            return
         if self.list is not None:
-            self.list.addItem(message)
-            self.list.scrollToBottom()            
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+                self.dropped += 1
+            self._pending.append((level, str(message)))
+            if not self._timer.isActive():
+                self._timer.start()
         else:
-            print("Error while printing to console")
\ No newline at end of file
+            print("Error while printing to console")
+
+    def flush(self):
+        """Push the buffered messages to the view and scroll to the last one."""
+        self._timer.stop()
+        if not self._pending:
+            return
+        lines = list(self._pending)
+        self._pending.clear()
+        if self._dropped:
+            lines.insert(0, (WARNING, f"... {self._dropped} earlier messages dropped"))
+            self._dropped = 0
+        self.model.append_lines(lines)
+        self.list.scrollToBottom()
+
+    def clear(self):
+        self._pending.clear()
+        self._dropped = 0
+        self.model.clear()
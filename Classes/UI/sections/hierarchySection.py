@@ -1,15 +1,263 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTreeWidget, QTreeWidgetItem
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont, QFontMetrics
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTreeView, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QFont, QFontMetrics, QColor
 from .header import create_header_section
 
+
+def _subtree(obj):
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.daughters))
+
+
+class GateTreeModel(QAbstractItemModel):
+    """
+    Item model reading the GateObject tree directly (no per-node items).
+    Children are exposed lazily, FETCH_BATCH rows at a time, and structural
+    edits are announced with insert/remove signals instead of a rebuild.
+    Indexes carry their GateObject as internal pointer. Rows are looked up in
+    a per-mother row cache (Qt asks for parents constantly), checked on every
+    use and rebuilt for a mother whose daughters moved.
+    """
+
+    FETCH_BATCH = 512
+    enabledChanged = pyqtSignal(object)     # the GateObject whose subtree was enabled or disabled
+    loadFailed = pyqtSignal(object, str)    # a lazily opened section that could not be read, error message
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root = None
+        self._fetched: dict[int, int] = {}     # id(obj) -> number of daughters exposed
+        self._rows: dict[int, dict[int, int]] = {}     # id(mother) -> {id(daughter): row}
+
+    # ---------------------- tree ----------------------
+    def set_root(self, node):
+        self.beginResetModel()
+        self._root = node
+        self._fetched = {}
+        self._rows = {}
+        self.endResetModel()
+
+    def root(self):
+        return self._root
+
+    def object_at(self, index: QModelIndex):
+        return index.internalPointer() if index.isValid() else None
+
+    def index_of(self, obj) -> QModelIndex:
+        """Index of obj, fetching the rows of its ancestors as needed."""
+        if obj is None or self._root is None:
+            return QModelIndex()
+        chain = []
+        node = obj
+        while node is not self._root:
+            parent = node.parent
+            if parent is None:
+                return QModelIndex()        # not in this tree
+            chain.append((parent, self._row_in(parent, node)))
+            node = parent
+        for parent, row in reversed(chain):
+            self._fetch_to(parent, row + 1)
+        return self.createIndex(chain[0][1] if chain else 0, 0, obj)
+
+    def _row_of(self, obj) -> int:
+        parent = obj.parent
+        if parent is None or obj is self._root:
+            return 0
+        return self._row_in(parent, obj)
+
+    def _row_in(self, parent, obj) -> int:
+        """Row of obj among parent's daughters in O(1); ValueError if it is not one of them."""
+        daughters = parent.daughters
+        rows = self._rows.get(id(parent))
+        row = rows.get(id(obj)) if rows is not None else None
+        if row is None or row >= len(daughters) or daughters[row] is not obj:
+            # daughters were inserted, removed or moved since: renumber this mother once
+            rows = self._rows[id(parent)] = {id(d): i for i, d in enumerate(daughters)}
+            row = rows.get(id(obj))
+            if row is None:
+                raise ValueError(f"'{obj.name}' is not a daughter of '{parent.name}'")
+        return row
+
+    def _fetch_to(self, obj, count: int):
+        have = self._fetched.get(id(obj), 0)
+        count = min(count, len(obj.daughters))
+        if count <= have:
+            return
+        self.beginInsertRows(self._index_for(obj), have, count - 1)
+        self._fetched[id(obj)] = count
+        self.endInsertRows()
+
+    def _index_for(self, obj) -> QModelIndex:
+        # for objects already exposed by the model
+        return self.createIndex(self._row_of(obj), 0, obj)
+
+    def _forget(self, obj):
+        for o in _subtree(obj):
+            self._fetched.pop(id(o), None)
+            self._rows.pop(id(o), None)
+
+    def _parent_obj(self, parent: QModelIndex):
+        return parent.internalPointer() if parent.isValid() else None
+
+    # ---------------------- structural edits ----------------------
+    def child_added(self, parent_obj, child_obj) -> QModelIndex:
+        """Announce child_obj, already added to parent_obj.daughters (at any row)."""
+        if self._root is None or (parent_obj is not self._root and parent_obj.parent is None):
+            return QModelIndex()
+        parent_index = self.index_of(parent_obj)
+        row = self._row_in(parent_obj, child_obj)
+        have = self._fetched.get(id(parent_obj), 0)
+        if row <= have:
+            self.beginInsertRows(parent_index, row, row)
+            self._fetched[id(parent_obj)] = have + 1
+            self.endInsertRows()
+        else:
+            self._fetch_to(parent_obj, row + 1)
+        return self.createIndex(row, 0, child_obj)
+
+    def children_appended(self, obj):
+        """Show daughters appended to obj (up to a fetch batch) if its rows are already shown."""
+        have = self._fetched.get(id(obj))
+        if have is not None and have < self.FETCH_BATCH:
+            self._fetch_to(obj, self.FETCH_BATCH)
+
+    def remove_child(self, parent_obj, child_obj):
+        """Detach child_obj from parent_obj in both the GateObject tree and the model."""
+        row = self._row_in(parent_obj, child_obj)
+        have = self._fetched.get(id(parent_obj), 0)
+        if row < have:
+            self.beginRemoveRows(self.index_of(parent_obj), row, row)
+            parent_obj.remove_daughter(child_obj)
+            self._fetched[id(parent_obj)] = have - 1
+            self._forget(child_obj)
+            self.endRemoveRows()
+        else:
+            parent_obj.remove_daughter(child_obj)
+            self._forget(child_obj)
+
+    def refresh(self, obj):
+        """Repaint obj's row (e.g. after a rename)."""
+        parent = obj.parent
+        if obj is self._root or (parent is not None and self._row_of(obj) < self._fetched.get(id(parent), 0)):
+            index = self._index_for(obj)
+            self.dataChanged.emit(index, index)
+
+    def set_enabled(self, index: QModelIndex, enabled: bool):
+        obj = self.object_at(index)
+        if obj is None:
+            return
+        for o in _subtree(obj):
+            o.enabled = enabled
+        self.dataChanged.emit(index, index)
+        self._emit_subtree_changed(obj)
+        self.enabledChanged.emit(obj)
+
+    def _emit_subtree_changed(self, obj):
+        count = self._fetched.get(id(obj), 0)
+        if not count:
+            return
+        daughters = obj.daughters
+        self.dataChanged.emit(self.createIndex(0, 0, daughters[0]),
+                              self.createIndex(count - 1, 0, daughters[count - 1]))
+        for d in daughters[:count]:
+            self._emit_subtree_changed(d)
+
+    # ---------------------- QAbstractItemModel ----------------------
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0:
+            return QModelIndex()
+        obj = self._parent_obj(parent)
+        if obj is None:
+            if row == 0 and self._root is not None:
+                return self.createIndex(0, 0, self._root)
+            return QModelIndex()
+        if row >= self._fetched.get(id(obj), 0):
+            return QModelIndex()
+        return self.createIndex(row, 0, obj.daughters[row])
+
+    def parent(self, index=QModelIndex()):
+        obj = self.object_at(index)
+        if obj is None or obj is self._root or obj.parent is None:
+            return QModelIndex()
+        return self._index_for(obj.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        obj = self._parent_obj(parent)
+        if obj is None:
+            return 1 if self._root is not None else 0
+        return self._fetched.get(id(obj), 0)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        obj = self._parent_obj(parent)
+        if obj is None:
+            return self._root is not None
+        return obj.has_daughters()     # does not load a lazily opened section
+
+    def canFetchMore(self, parent):
+        obj = self._parent_obj(parent)
+        if obj is None:
+            return False
+        try:
+            obj.load()
+        except Exception as e:
+            self.loadFailed.emit(obj, str(e))
+            return False
+        return self._fetched.get(id(obj), 0) < len(obj.daughters)
+
+    def fetchMore(self, parent):
+        obj = self._parent_obj(parent)
+        if obj is not None:
+            self._fetch_to(obj, self._fetched.get(id(obj), 0) + self.FETCH_BATCH)
+
+    def flags(self, index):
+        obj = self.object_at(index)
+        if obj is None:
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if obj.node_type == "world":
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        obj = self.object_at(index)
+        if obj is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return obj.name
+        if role == Qt.ItemDataRole.UserRole:
+            return obj
+        if role == Qt.ItemDataRole.CheckStateRole and obj.node_type == "world":
+            return Qt.CheckState.Checked if obj.enabled else Qt.CheckState.Unchecked
+        if not obj.enabled:
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return QColor(Qt.GlobalColor.gray)
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return QColor(Qt.GlobalColor.lightGray)
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.CheckStateRole or self.object_at(index) is None:
+            return False
+        self.set_enabled(index, Qt.CheckState(value) == Qt.CheckState.Checked)
+        return True
+
+
 class HierarchySection:
     
     """
     Encapsulates the hierarchy widget area.
     Exposes:
       - widget: QWidget container
-      - tree: QTreeWidget
+      - tree: QTreeView over a GateTreeModel
+      - model: GateTreeModel
     """
     
     def __init__(self, parent):
@@ -19,12 +267,15 @@ class HierarchySection:
         self.label = create_header_section(self.widget, "Hierarchy View")
         self.layout.addWidget(self.label)
 
-        self.tree = QTreeWidget()
-        self.tree.setColumnCount(1)
-        self.tree.setHeaderLabels(["Hierarchy"])
+        self.model = GateTreeModel(self.widget)
+        self.tree = QTreeView()
+        self.tree.setModel(self.model)
         self.tree.setHeaderHidden(True)
-        self.tree.setSelectionMode(QTreeWidget.SelectionMode.SingleSelection)
+        self.tree.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.tree.setIndentation(16)
+        self.tree.setUniformRowHeights(True)
+        # the view only fetches once per expand; keep fetching while scrolling down
+        self.tree.verticalScrollBar().valueChanged.connect(self._fetch_visible)
         self.layout.addWidget(self.tree)
         
 
@@ -47,138 +298,141 @@ class HierarchySection:
         row_h = max(22, fm.height() + 6)
         self.tree.setStyleSheet(
             f"""
-            QTreeWidget::item {{ height: {row_h}px; padding: 1px 4px; }}
+            QTreeView::item {{ height: {row_h}px; padding: 1px 4px; }}
             """
         )
         
         
-    def populate(self, node, write_to_console):
-        self.tree.clear()
-        
-        def find_existing_item(name):
-            found = self.tree.findItems(name, Qt.MatchFlag.MatchExactly, 0)
-            return found[0] if found else None
-        
-        def add_objects_to_tree(parent_item, gate_obj):
-            existing_node = find_existing_item(gate_obj.get_name())
-            
-            if not existing_node:
-                item = QTreeWidgetItem([gate_obj.get_name()])
-                item.setData(0, Qt.ItemDataRole.UserRole, gate_obj)
-                
-                if gate_obj.get_type() == "world":
-                    item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-                    item.setCheckState(0, Qt.CheckState.Checked)
-                    
-                if parent_item is None:
-                    self.tree.addTopLevelItem(item)
-                else:
-                    parent_item.addChild(item)
-                    
-                write_to_console(f"Adding {gate_obj.get_name()} to tree.")
-            else:
-                write_to_console(f"Skipping duplicate: {gate_obj.get_name()}")
-                item = existing_node
-                
-            for d in getattr(gate_obj, "daughters", []) or []:
-                add_objects_to_tree(item, d)
-                
-        add_objects_to_tree(None, node)
-            
-    def set_item_enabled_recursively(self, item: QTreeWidgetItem, enabled: bool):
-        color = Qt.GlobalColor.black if enabled else Qt.GlobalColor.gray
-        item.setForeground(0, color)
-        
-        gate_obj = item.data(0, Qt.ItemDataRole.UserRole)
-        if gate_obj:
-            gate_obj.enabled = enabled
-            
-        item.setBackground(0, Qt.GlobalColor.white if enabled else Qt.GlobalColor.lightGray)
-        for i in range(item.childCount()):
-            child = item.child(i)
-            child.setCheckState(0, Qt.CheckState.Checked if enabled else Qt.CheckState.Unchecked)
-            self.set_item_enabled_recursively(child, enabled)
-            
-    
-    def _walk(self, item, func):
-        func(item)
-        for i in range(item.childCount()):
-            self._walk(item.child(i), func)
+    def populate(self, node):
+        self.model.set_root(node)
+
+    def _fetch_visible(self, value):
+        bar = self.tree.verticalScrollBar()
+        if value < bar.maximum() - bar.pageStep():
+            return
+        viewport = self.tree.viewport()
+        index = self.tree.indexAt(viewport.rect().bottomLeft())
+        while index.isValid():
+            parent = index.parent()
+            if self.model.canFetchMore(parent):
+                self.model.fetchMore(parent)
+                return
+            index = parent
+
+    # ---------------------- objects ----------------------
+    def object_at(self, index):
+        return self.model.object_at(index)
+
+    def current_object(self):
+        return self.model.object_at(self.tree.currentIndex())
+
+    def top_level_names(self):
+        root = self.model.root()
+        return [root.get_name()] if root is not None else []
+
+    def select_object(self, obj):
+        index = self.model.index_of(obj)
+        if not index.isValid():
+            return index
+        self.tree.expand(index.parent())
+        self.tree.setCurrentIndex(index)
+        self.tree.scrollTo(index)
+        return index
+
+    def set_enabled_recursively(self, obj, enabled: bool):
+        self.model.set_enabled(self.model.index_of(obj), enabled)
+
+    def refresh_object(self, obj):
+        self.model.refresh(obj)
+
+    def children_appended(self, objs):
+        for obj in objs:
+            self.model.children_appended(obj)
+
+    def expand_root(self):
+        root = self.model.root()
+        if root is not None:
+            self.tree.expand(self.model.index_of(root))
+
+    def remove_object(self, obj):
+        """Detach obj from its parent GateObject and drop its row."""
+        parent = obj.parent
+        if parent is not None:
+            self.model.remove_child(parent, obj)
             
     def snapshot_state(self):
-        """Return (expanded_ids, selected_id, scroll_value)."""
-        expanded_ids = set()
-        selected_id = None
-
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            self._walk(root.child(i), lambda it: (
-                expanded_ids.add(id(it.data(0, Qt.ItemDataRole.UserRole))) if it.isExpanded() else None
-            ))
-
-        current = self.tree.currentItem()
-        if current:
-            obj = current.data(0, Qt.ItemDataRole.UserRole)
-            if obj is not None:
-                selected_id = id(obj)
+        """
+        Return (expanded, selected, scroll_value). Objects are remembered by
+        their chain of (row, name) from the root, so the state carries over to
+        a re-imported tree as well as to the same one.
+        """
+        expanded = []
+        root = self.model.root()
+        if root is not None:
+            pending = [((), root, self.model.index_of(root))]
+            while pending:
+                chain, obj, index = pending.pop()
+                if not self.tree.isExpanded(index):
+                    continue
+                expanded.append(chain)
+                for row in range(self.model.rowCount(index)):
+                    d = obj.daughters[row]
+                    pending.append((chain + ((row, d.name),), d, self.model.index(row, 0, index)))
+
+        current = self.current_object()
+        selected = self._chain_of(current) if current is not None else None
 
         vscroll = self.tree.verticalScrollBar().value()
-        return expanded_ids, selected_id, vscroll
-    
-    
-    def restore_state(self, expanded_ids, selected_id, vscroll):
-        selected_item = None
-        
-        def apply_state(it):
-            nonlocal selected_item
-            obj = it.data(0, Qt.ItemDataRole.UserRole)
-            if obj is None:
-                return
-            oid = id(obj)
-            if oid in expanded_ids:
-                it.setExpanded(True)
-            if selected_id is not None and oid == selected_id:
-                selected_item = it
-
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            self._walk(root.child(i), apply_state)
-            
-        if selected_id is not None:
-            self.tree.setCurrentItem(selected_item)
-            self.tree.scrollToItem(selected_item)
+        return expanded, selected, vscroll
+
+    def _chain_of(self, obj):
+        chain = []
+        while obj.parent is not None:
+            chain.append((self.model._row_of(obj), obj.name))
+            obj = obj.parent
+        return tuple(reversed(chain))
+
+    def _follow(self, chain):
+        """
+        The object at the end of chain, or None. Only the objects on the chain
+        are visited, and a lazily opened section that is not loaded yet ends
+        the walk (it stays unloaded and collapsed).
+        """
+        obj = self.model.root()
+        for row, name in chain:
+            if obj.is_deferred():
+                return None
+            daughters = obj.daughters
+            if row < len(daughters) and daughters[row].name == name:
+                obj = daughters[row]
+            else:
+                obj = next((d for d in daughters if d.name == name), None)
+                if obj is None:
+                    return None
+        return obj
+
+    def restore_state(self, expanded, selected, vscroll):
+        if self.model.root() is None:
+            return
+        for chain in sorted(expanded, key=len):        # mothers before their daughters
+            obj = self._follow(chain)
+            if obj is not None and not obj.is_deferred():
+                self.tree.expand(self.model.index_of(obj))
+
+        obj = self._follow(selected) if selected is not None else None
+        if obj is not None:
+            index = self.model.index_of(obj)
+            self.tree.setCurrentIndex(index)
+            self.tree.scrollTo(index)
 
         self.tree.verticalScrollBar().setValue(vscroll)
             
     
     def add_child_item(self, parent_obj, child_obj):
-        """Insert a single child into the existing tree without rebuilding."""
-        from PyQt6.QtWidgets import QTreeWidgetItem
-
-        # Find parent item
-        target = None
-        root = self.tree.invisibleRootItem()
-
-        def finder(it):
-            nonlocal target
-            obj = it.data(0, Qt.ItemDataRole.UserRole)
-            if obj is parent_obj:
-                target = it
-
-        for i in range(root.childCount()):
-            self._walk(root.child(i), finder)
-
-        if target is None:
-            return None  # parent not found; fall back to full repopulate
-
-        # Create and attach
-        item = QTreeWidgetItem([child_obj.get_name()])
-        item.setData(0, Qt.ItemDataRole.UserRole, child_obj)
-        if getattr(child_obj, "get_type", lambda: None)() == "world":
-            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-            item.setCheckState(0, Qt.CheckState.Checked)
-
-        target.addChild(item)
-        target.setExpanded(True)
-        self.tree.setCurrentItem(item)
-        return item
\ No newline at end of file
+        """Show a child just added to parent_obj without rebuilding; returns its index."""
+        index = self.model.child_added(parent_obj, child_obj)
+        if not index.isValid():
+            return None  # parent not in this tree
+        self.tree.expand(index.parent())
+        self.tree.setCurrentIndex(index)
+        return index
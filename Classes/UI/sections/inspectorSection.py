@@ -1,10 +1,9 @@
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QListView, QLabel, QHBoxLayout, QLineEdit,
+    QWidget, QVBoxLayout, QListView, QHBoxLayout, QLineEdit,
     QPushButton, QCheckBox, QSizePolicy, QFileDialog, QAbstractItemView, QComboBox
 )
-from PyQt6.QtGui import QFont, QStandardItemModel, QStandardItem, QFontMetrics
-from PyQt6.QtCore import Qt, QSize
-from functools import partial
+from PyQt6.QtGui import QFont, QStandardItemModel, QStandardItem, QFontMetrics, QColor
+from PyQt6.QtCore import Qt, QSize, QModelIndex, QPoint, QTimer
 
 # Use your existing popups
 from Classes.UI.popups.PhysicsProcessPopup import PhysicsProcessPopup
@@ -12,8 +11,199 @@ from Classes.UI.popups.SourcePopup import SourcePopup
 from .header import create_header_section
 from Classes.StaticData import SYSTEM_TYPES, SYSTEM_LEVELS_BY_TYPE, SYSTEM_LEVEL_SHAPES
 from Classes.UI.parameters.BigPopupCombo import BigPopupCombo
+from Classes.UI.parameters.SearchableCombo import SearchableCombo
+from Classes.UI.parameters.OptionListModel import OptionListModel
 from Classes.UI.parameters.ElidingLabel import ElidingLabel
 from Classes.UI.popups.DistributionsPopup import DistributionPopup
+from Classes.UndoStack import SetParameter, SetAttributes, Rename, RemoveObject
+from Classes.IO.placement_file import PlacementTable, acquisition_window, kind_of
+from Classes.UI.sections.consoleSection import WARNING, ERROR
+
+# Model role holding the GateParameter shown by a pooled row
+PARAM_ROLE = Qt.ItemDataRole.UserRole + 1
+# Model role holding the section key of a collapsible section header
+SECTION_ROLE = Qt.ItemDataRole.UserRole + 2
+# DropDowns offering at least this many options (materials) get a filterable SearchableCombo
+SEARCHABLE_OPTIONS = 24
+
+SECTION_TITLES = {
+    "placement": "Placement Settings",
+    "moves": "Moving Settings",
+    "vis": "Visualization Settings",
+    "random": "Random Settings",
+    "repeater": "Repeater Settings",
+}
+
+
+class ParameterRow(QWidget):
+    """
+    One recyclable parameter row: label, one input per input type and an optional
+    unit dropdown. Rows are pooled by signature (input types, has units,
+    searchable dropdowns) and rebound to whichever GateParameter they show; the
+    widget signals act on the currently bound parameter. DropDowns show the
+    shared OptionListModel of their option list instead of copies of the items.
+    """
+
+    def __init__(self, section, signature, parent=None):
+        super().__init__(parent)
+        self.section = section
+        self.signature = signature
+        self.param = None
+        self.font_size = None
+        self._options = {}      # slot -> OptionListModel shown by that DropDown
+
+        h = QHBoxLayout(self)
+        h.setContentsMargins(1, 2, 1, 2)
+        h.setSpacing(4)
+        h.setAlignment(Qt.AlignmentFlag.AlignLeft)
+
+        self.label = ElidingLabel("")
+        self.label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
+        h.addWidget(self.label)
+
+        input_types, has_units, self.searchable = signature
+        self.inputs = []
+        for i, input_type in enumerate(input_types):
+            w = self._create_input(input_type, i)
+            if w is not None:
+                h.addWidget(w, 0)
+            self.inputs.append(w)
+
+        self.unit_dd = None
+        if has_units:
+            self.unit_dd = section._combo(12, width=100)
+            self.unit_dd.currentIndexChanged.connect(self._unit_changed)
+            h.addWidget(self.unit_dd)
+
+    def _create_input(self, input_type, i):
+        if input_type == "TextArea":
+            w = QLineEdit()
+            w.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
+            w.textChanged.connect(lambda v, idx=i: self.section.type_parameter_value(self.param, idx, v))
+            w.editingFinished.connect(self.section.finish_typing)
+            return w
+
+        if input_type == "DropDown":
+            if self.searchable:
+                w = self.section._combo(12, searchable=True)
+                w.currentIndexChanged.connect(lambda row, idx=i, w=w: self._dropdown_changed(idx, w.itemText(row)))
+            else:
+                w = self.section._combo(12)
+                w.currentTextChanged.connect(lambda v, idx=i: self._dropdown_changed(idx, v))
+            return w
+
+        if input_type == "CheckBox":
+            w = QCheckBox()
+            w.stateChanged.connect(lambda st, idx=i: self.section.update_checkbox_value(self.param, idx, st))
+            return w
+
+        if input_type == "Select":
+            w = QPushButton()
+            w.clicked.connect(lambda _=False, idx=i: self._select_clicked(idx))
+            return w
+
+        return None
+
+    # ---------------------- binding ----------------------
+    def bind(self, param, font_size: int):
+        self.param = param
+        defaults = param.default_value_list
+        values = param.value_list
+        for i, (input_type, w) in enumerate(zip(self.signature[0], self.inputs)):
+            if w is None:
+                continue
+            default_value = defaults[i] if i < len(defaults) else ""
+            current_value = values[i] if i < len(values) else ""
+            w.blockSignals(True)
+            if input_type == "TextArea":
+                w.setText(str(default_value))
+                w.setEnabled(True)
+                w.setStyleSheet("")
+                w.setToolTip("")
+            elif input_type == "DropDown":
+                items = current_value if isinstance(current_value, list) else [" - "]
+                model = self._load_items(i, w, items)
+                w.setCurrentIndex(max(0, model.row_of(str(default_value))))
+                if w.isEditable():
+                    w.setEditText(w.itemText(w.currentIndex()))    # drop a half-typed filter
+            elif input_type == "CheckBox":
+                w.setChecked(bool(default_value))
+            elif input_type == "Select":
+                w.setText("Browse..." if not current_value else str(current_value))
+            w.blockSignals(False)
+
+        if self.unit_dd is not None:
+            units = param.unit_list
+            self.unit_dd.blockSignals(True)
+            self._load_items("unit", self.unit_dd, units)
+            self.unit_dd.setCurrentIndex(units.index(param.default_unit) if param.default_unit in units else 0)
+            self.unit_dd.blockSignals(False)
+
+        self.label.setText(param.displayed_name)
+        if font_size != self.font_size:
+            self.apply_font(font_size)
+
+    def _load_items(self, slot, combo, items) -> OptionListModel:
+        model = OptionListModel.shared(items)
+        if self._options.get(slot) is not model:
+            combo.setModel(model)
+            self._options[slot] = model
+        return model
+
+    def apply_font(self, fs: int):
+        section = self.section
+        font = section._font(fs)
+        h = section._control_height(fs)
+
+        self.label.setFont(font)
+        self.label.setMinimumWidth(section._label_min_px(fs))
+        self.label.setFixedHeight(h)
+        for w in self.inputs:
+            if w is None:
+                continue
+            w.setFont(font)
+            w.setFixedHeight(h)
+            if isinstance(w, QLineEdit):
+                w.setFixedWidth(120 + fs * 2)
+            elif isinstance(w, (QComboBox, QPushButton)):
+                w.setFixedWidth(220 + fs * 2)
+        if self.unit_dd is not None:
+            self.unit_dd.setFont(font)
+            self.unit_dd.setFixedWidth(90 + (fs // 2))
+            self.unit_dd.setFixedHeight(h)
+        self.font_size = fs
+
+    # ---------------------- signals ----------------------
+    def _dropdown_changed(self, idx, value):
+        self.section.update_parameter_value(self.param, idx, value)
+        if self.param.path.endswith("/random/setEngineSeed"):
+            self.section._sync_seed_manual_state()
+
+    def _unit_changed(self, idx):
+        if idx >= 0:
+            old = self.param.default_value_list, self.param.default_unit
+            self.param.default_unit = self.param.unit_list[idx]
+            self.section.record_edit(self.param, *old)
+
+    def _select_clicked(self, idx):
+        if self.param.path == "/geometry/setMaterialDatabase":
+            self.section.host.browse_file("import_material_db")
+        else:
+            self.section.browse_file_for_param(self.inputs[idx], self.param, idx)
+
+
+class _RowListView(QListView):
+    """QListView reporting scrolls and relayouts so pooled rows can follow."""
+
+    def __init__(self, on_layout):
+        super().__init__()
+        self._on_layout = on_layout
+        self.verticalScrollBar().valueChanged.connect(lambda _v: on_layout())
+
+    def updateGeometries(self):
+        super().updateGeometries()
+        self._on_layout()
+
 
 class InspectorSection:
     """
@@ -21,28 +211,49 @@ class InspectorSection:
     Public API:
       - widget: container to add in layout
       - listview: QListView (for font update)
-      - populate_parameters(item)  # mirrors your old method name/signature
+      - populate_parameters(item)  # hierarchy QModelIndex or GateObject
       - resize_parameters(font_size)
     """
+    TYPING_PAUSE_MS = 1000      # a text field edit is recorded once typing pauses this long (or the field is left)
     
     def __init__(self, parent):
         self.host = parent
         self.widget = QWidget(parent)
         self.layout = QVBoxLayout(self.widget)
 
-        self._seed_mode_dd = None
         self._seed_manual_edit = None
 
         self.label = create_header_section(self.widget, "Inspector View")
         self.layout.addWidget(self.label)
 
-        self.listview = QListView()
+        self._seed_mode_param = None
+        self._shown_object = None      # object whose parameters are on display (edits are journaled against it)
+
+        # The text field being typed into, as (object, parameter, old values, old unit):
+        # keystrokes set the value at once, the edit is journaled and made undoable
+        # once, when the field is left or typing pauses (see type_parameter_value)
+        self._typing = None
+        self._typing_timer = QTimer(self.widget)
+        self._typing_timer.setSingleShot(True)
+        self._typing_timer.setInterval(self.TYPING_PAUSE_MS)
+        self._typing_timer.timeout.connect(self.finish_typing)
+
+        self.listview = _RowListView(self._layout_rows)
         self.listview.setSpacing(0)
         self.layout.addWidget(self.listview)
 
-        # Cache of inspector widgets for resize
-        # Each entryL {"label": QLabel|None, "inputs": [widgets], "unit": QComboBox|None}
-        self.inspector_widgets = []
+        # Parameter rows are recycled: idle rows wait in a pool per signature,
+        # only the rows inside the viewport are bound (model row -> ParameterRow)
+        self._row_pool: dict[tuple, list[ParameterRow]] = {}
+        self._bound_rows: dict[int, ParameterRow] = {}
+        self._row_font_size = None
+
+        # Collapsible sections: keys expanded per node type, and the parameters
+        # of each section of the node on display (their rows exist only while expanded)
+        self._expanded_sections: dict[str, set[str]] = {}
+        self._section_params: dict[str, list] = {}
+        self._section_node_type = None
+        self.listview.clicked.connect(self._on_row_clicked)
 
 
     # --------------------------
@@ -71,8 +282,8 @@ class InspectorSection:
         view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerItem)
         cb.setView(view)
         
-    def _combo(self, fs: int, items=None, width: int | None = None) -> BigPopupCombo:
-        dd = BigPopupCombo(popup_rows=14, min_chars=16)
+    def _combo(self, fs: int, items=None, width: int | None = None, searchable: bool = False) -> BigPopupCombo:
+        dd = (SearchableCombo if searchable else BigPopupCombo)(popup_rows=14, min_chars=16)
         dd.setFont(self._font(fs))
         self._prepare_combo(dd)
         if items:
@@ -117,17 +328,28 @@ class InspectorSection:
     # Main population
     # -----------------------------
     def populate_parameters(self, item):
-        if not item:
+        if isinstance(item, QModelIndex):
+            item = self.host.hierarchySection.object_at(item)
+        if item is None:
             return
-        gate_object = item.data(0, Qt.ItemDataRole.UserRole)
-        if gate_object is None:
+        gate_object = item
+        self.finish_typing()
+        try:
+            gate_object.load()      # a lazily opened section
+        except Exception as e:
+            self.host.write_to_console(f"Cannot load '{gate_object.get_name()}': {e}", ERROR)
             return
+        self._shown_object = gate_object
+        self.host.history.checkpoint()      # edits of another visit are separate undo steps
 
-        # reset model + cache
-        self.inspector_widgets = []
+        # reset model, parameter rows go back to their pools
+        self._release_rows()
+        self._seed_manual_edit = None
+        self._seed_mode_param = None
         model = QStandardItemModel()
         self.listview.setModel(model)
         font_size = self.host.font_size_slider.value()
+        self._row_font_size = font_size
 
         # header
         self._add_header(model, gate_object)
@@ -147,9 +369,8 @@ class InspectorSection:
 
         # parameters
         self._add_parameters_block(model, gate_object, font_size)
-        self._sync_seed_manual_state()
 
-        # final pass for sizing
+        # final pass for sizing, then bind the rows in view
         self.resize_parameters(font_size)
     
     
@@ -159,14 +380,17 @@ class InspectorSection:
     def _add_header(self, model, gate_object):
         model.appendRow(QStandardItem(f"Object: {gate_object.get_name()}"))
         
-    def _add_section_label(self, model, title, font_size):
-        label_item = QStandardItem()
-        label = ElidingLabel(title)
-        label.setFont(self._font(font_size, bold=True))
-        label.setStyleSheet("color: black; background-color: #e0e0e0; padding: 4px;")
-        model.appendRow(label_item)
-        self.listview.setIndexWidget(label_item.index(), label)
-        self._apply_row_height(label_item, label, font_size, vpad=4)
+    def _section_label_item(self, title, font_size, key=None, expanded=True) -> QStandardItem:
+        if key is not None:
+            title = f"{'▾' if expanded else '▸'} {title}"
+        label_item = QStandardItem(title)
+        label_item.setData(key, SECTION_ROLE)
+        label_item.setFont(self._font(font_size, bold=True))
+        label_item.setForeground(QColor("black"))
+        label_item.setBackground(QColor("#e0e0e0"))
+        label_item.setEditable(False)
+        label_item.setSizeHint(QSize(1, self._control_height(font_size) + 4))
+        return label_item
     
 
     # -----------------------------
@@ -238,6 +462,7 @@ class InspectorSection:
             dd.setCurrentText(gate_object.system_type)
 
         def set_root_enabled(st):
+            before = {"system_type": gate_object.system_type, "system_name": gate_object.system_name}
             if st == Qt.CheckState.Checked.value:
                 # ensure model has helpers on object
                 if not hasattr(gate_object, "set_system_root"):
@@ -245,9 +470,16 @@ class InspectorSection:
                 gate_object.set_system_root(dd.currentText())
             else:
                 gate_object.system_type = None
+            self.host.push_undo(SetAttributes(gate_object, before, "System root"))
+
+        def set_root_type(v):
+            if cb.isChecked():
+                before = {"system_type": gate_object.system_type, "system_name": gate_object.system_name}
+                gate_object.set_system_root(v)
+                self.host.push_undo(SetAttributes(gate_object, before, "System type"))
 
         cb.stateChanged.connect(set_root_enabled)
-        dd.currentTextChanged.connect(lambda v: gate_object.set_system_root(v) if cb.isChecked() else None)
+        dd.currentTextChanged.connect(set_root_type)
 
         h.addWidget(lbl)
         h.addWidget(cb)
@@ -255,8 +487,10 @@ class InspectorSection:
         self._append_widget_row(model, row, font_size)
 
     def _maybe_add_attach_row(self, model, gate_object, font_size):
-        systems = self._all_system_roots()
-        if not systems or gate_object.get_type() == "root" or not self._is_under_world(gate_object):
+        if gate_object.get_type() == "root" or not self._is_under_world(gate_object):
+            return
+        systems = self._all_system_roots()     # walks the tree: loads deferred project sections
+        if not systems:
             return
 
         row, h = self._row_widget()
@@ -317,9 +551,6 @@ class InspectorSection:
     # Parameters block
     # -----------------------------    
     def _add_parameters_block(self, model, gate_object, font_size):
-        # section gates
-        sections_shown = {"placement": False, "moves": False, "vis": False, "random": False, "repeater": False}
-        
         # Section tests collected here to avoid long if-chains; behavior identical.
         def _section_key_for(param_path: str) -> str | None:
             if "/placement/" in param_path:
@@ -334,119 +565,189 @@ class InspectorSection:
                 return "repeater"
             return None
 
+        node_type = gate_object.get_type()
+        expanded = self._expanded_sections.setdefault(node_type, set())
+        self._section_node_type = node_type
+        self._section_params = {}
+
+        # a section runs from its header to the next one
+        rows = []
+        current = None
         for param in gate_object.parameters:
             self._normalize_param_lists(param)
+            if param.path.endswith("/random/setEngineSeed"):
+                self._seed_mode_param = param
 
             key = _section_key_for(param.path)
-            if key and not sections_shown[key]:
-                title = {
-                    "placement": "Placement Settings",
-                    "moves": "Moving Settings",
-                    "vis": "Visualization Settings",
-                    "random": "Random Settings",
-                    "repeater": "Repeater Settings",
-                }[key]
-                self._add_section_label(model, title, font_size)
-                sections_shown[key] = True
-
-            # one param row
-            row_widget = self._build_param_row(param, font_size)
-            self._append_widget_row(model, row_widget, font_size)
+            if key and key not in self._section_params:
+                self._section_params[key] = []
+                rows.append(self._section_label_item(SECTION_TITLES[key], font_size, key, key in expanded))
+                rows.append(key)        # the section's rows go here
+                current = key
+            if current is None:
+                rows.extend(self._param_items(param, font_size))
+            else:
+                self._section_params[current].append(param)
+
+        # collapsed sections get no rows at all until they are opened
+        block = []
+        for item in rows:
+            if not isinstance(item, str):
+                block.append(item)
+            elif item in expanded:
+                for param in self._section_params[item]:
+                    block.extend(self._param_items(param, font_size))
+        rows = block
+
+        # one insertion for the whole block instead of a relayout per row
+        model.invisibleRootItem().appendRows(rows)
+
+    def _param_items(self, param, font_size) -> list[QStandardItem]:
+        """Model rows of one parameter; its widgets are bound when it scrolls into view."""
+        row_item = QStandardItem()
+        row_item.setData(param, PARAM_ROLE)
+        row_item.setEditable(False)
+        row_item.setSizeHint(QSize(1, self._control_height(font_size) + 4))
+        return [row_item, self._spacer_item(1)]
+
+    def _on_row_clicked(self, index):
+        key = index.data(SECTION_ROLE)
+        if key:
+            self._toggle_section(index.row(), key)
+
+    def _toggle_section(self, row, key):
+        """Open or close the section whose header is at row; remembered per node type."""
+        model = self.listview.model()
+        expanded = self._expanded_sections.setdefault(self._section_node_type, set())
+        font_size = self._row_font_size
+        params = self._section_params.get(key, [])
+
+        self._release_rows()        # row numbers below the header shift
+        if key in expanded:
+            expanded.discard(key)
+            model.removeRows(row + 1, 2 * len(params))
+        else:
+            expanded.add(key)
+            items = [it for p in params for it in self._param_items(p, font_size)]
+            model.invisibleRootItem().insertRows(row + 1, items)
+        header = model.item(row)
+        header.setText(f"{'▾' if key in expanded else '▸'} {SECTION_TITLES[key]}")
+        self._layout_rows()
 
     def _normalize_param_lists(self, p):
         p.default_value_list = p.default_value_list or []
         p.value_list = p.value_list or []
         p.input_type_list = p.input_type_list or []
 
-    def _build_param_row(self, param, font_size) -> QWidget:
-        row, h = self._row_widget()
-
-        label = ElidingLabel(param.displayed_name)
-        label.setFont(self._font(font_size))
-        label.setMinimumWidth(self._label_min_px(font_size))
-        label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
-        h.addWidget(label)
-
-        inputs = []
-        for i, input_type in enumerate(param.input_type_list):
-            w = self._build_input_widget(input_type, param, i, font_size)
-            if w:
-                w.setFont(QFont("Arial", font_size))
-                h.addWidget(w, 0)
-                inputs.append(w)
-
-        # units
-        unit_dd = None
-        if getattr(param, "unit_list", None):
-            unit_dd = self._combo(font_size, items=param.unit_list or [], width=100)
-            default_index = (param.unit_list.index(param.default_unit)
-                            if getattr(param, "default_unit", None) in (param.unit_list or []) else 0)
-            unit_dd.setCurrentIndex(default_index)
-            unit_dd.currentIndexChanged.connect(lambda idx, p=param: setattr(p, "default_unit", p.unit_list[idx]))
-            h.addWidget(unit_dd)
-        
-        self.inspector_widgets.append({"label":label, "inputs":inputs, "unit":unit_dd})
-        return row
+    # -----------------------------
+    # Row pooling
+    # -----------------------------
+    def _acquire_row(self, param) -> ParameterRow:
+        types = param.input_type_list
+        searchable = any(t == "DropDown" and isinstance(v, list) and len(v) >= SEARCHABLE_OPTIONS
+                         for t, v in zip(types, param.value_list))
+        signature = (tuple(types), bool(param.unit_list), searchable)
+        pool = self._row_pool.setdefault(signature, [])
+        if pool:
+            return pool.pop()
+        return ParameterRow(self, signature, self.listview.viewport())
+
+    def _release_row(self, row: ParameterRow):
+        row.hide()
+        if self._seed_manual_edit is not None and self._seed_manual_edit in row.inputs:
+            self._seed_manual_edit = None
+        row.param = None
+        self._row_pool[row.signature].append(row)
+
+    def _release_rows(self):
+        for row in self._bound_rows.values():
+            self._release_row(row)
+        self._bound_rows = {}
+
+    def _layout_rows(self):
+        """Bind pooled rows to the parameter rows inside the viewport, release the others."""
+        view = self.listview
+        model = view.model()
+        viewport = view.viewport()
+        if model is None or not view.isVisible() or viewport.height() <= 0:
+            return
 
-    def _build_input_widget(self, input_type, param, i, font_size):
-        default_value = param.default_value_list[i] if i < len(param.default_value_list) else ""
-        current_value = param.value_list[i] if i < len(param.value_list) else ""
+        first = view.indexAt(QPoint(1, 0)).row()
+        last = view.indexAt(QPoint(1, viewport.height() - 1)).row()
+        if first < 0:
+            first = 0
+        if last < 0:
+            last = model.rowCount() - 1
 
-        if input_type == "TextArea":
-            w = QLineEdit()
-            w.setText(str(default_value))
-            w.setFixedWidth(60 + font_size)
-            w.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
-            w.textChanged.connect(lambda v, p=param, idx=i: self.update_parameter_value(p, idx, v))
-            if getattr(param, "path", "").endswith("/random/setEngineSeedValue"):
-                self._seed_manual_edit = w
-                self._sync_seed_manual_state()
-            return w
+        for r in [r for r in self._bound_rows if r < first or r > last]:
+            self._release_row(self._bound_rows.pop(r))
 
-        if input_type == "DropDown":
-            w = self._combo(font_size, width=120 + font_size * 2)
-            items = current_value if isinstance(current_value, list) else [" - "]
-            w.addItems(items)
-            w.setCurrentText(str(default_value))
-            w.setFixedWidth(120 + font_size * 2)
-            #self._prepare_combo(w)
-            w.currentTextChanged.connect(lambda v, p=param, idx=i: self.update_parameter_value(p, idx, v))
-            if getattr(param, "path", "").endswith("/random/setEngineSeed"):
-                self._seed_mode_dd = w
-                # react to changes
-                w.currentTextChanged.connect(lambda _=None: self._sync_seed_manual_state())
-                w.currentIndexChanged.connect(lambda _=None: self._sync_seed_manual_state())
-                self._sync_seed_manual_state()
-            return w
-
-        if input_type == "CheckBox":
-            w = QCheckBox()
-            w.setChecked(bool(default_value))
-            w.stateChanged.connect(partial(self.update_checkbox_value, param, i))
-            return w
-
-        if input_type == "Select":
-            w = self._button("Browse..." if not current_value else str(current_value), font_size, 200,
-                                click=(lambda: self.host.browse_file("import_material_db")) if param.path == "/geometry/setMaterialDatabase"
-                                else (lambda _, b=None, p=param, idx=i: self.browse_file_for_param(w, p, idx)))
-            return w
+        for r in range(first, last + 1):
+            index = model.index(r, 0)
+            param = index.data(PARAM_ROLE)
+            if param is None:
+                continue
+            row = self._bound_rows.get(r)
+            if row is None:
+                row = self._bound_rows[r] = self._acquire_row(param)
+                row.bind(param, self._row_font_size)
+                if param.path.endswith("/random/setEngineSeedValue"):
+                    self._seed_manual_edit = next((w for w in row.inputs if isinstance(w, QLineEdit)), None)
+                    self._sync_seed_manual_state()
+            rect = view.visualRect(index)
+            rect.setLeft(0)
+            rect.setWidth(max(rect.width(), viewport.width()))
+            row.setGeometry(rect)
+            row.show()
 
-        return None
-    
     # -----------------------------
     # Utility actions
     # -----------------------------
     
     def update_parameter_value(self, param, index, value):
-        while len(param.default_value_list) <= index:
-            param.default_value_list.append(None)
-        param.default_value_list[index] = value
+        old = param.default_value_list, param.default_unit
+        param.set_value(index, value)
+        self.record_edit(param, *old)
+
+    def type_parameter_value(self, param, index, value):
+        """A keystroke in a text field: the value changes now, the edit is recorded by finish_typing."""
+        if self._typing is not None and self._typing[1] is not param:
+            self.finish_typing()
+        if self._typing is None:
+            self._typing = (self._shown_object, param, param.default_value_list, param.default_unit)
+        param.set_value(index, value)
+        self.host.bounds.parameter_changed(self._typing[0], param)
+        self._typing_timer.start()
+
+    def finish_typing(self):
+        """Journal the text field being typed into and make it one undo step (no-op when none is)."""
+        self._typing_timer.stop()
+        typing, self._typing = self._typing, None
+        if typing is None:
+            return
+        gate_object, param, old_values, old_unit = typing
+        if list(param.default_value_list or []) != list(old_values or []) or param.default_unit != old_unit:
+            self.record_edit(param, old_values, old_unit, gate_object)
 
     def update_checkbox_value(self, param, index, state):
         is_checked = (state == Qt.CheckState.Checked.value)
-        while len(param.default_value_list) <= index:
-            param.default_value_list.append(None)
-        param.default_value_list[index] = is_checked
+        old = param.default_value_list, param.default_unit
+        param.set_value(index, is_checked)
+        self.record_edit(param, *old)
+
+    def record_edit(self, param, old_values, old_unit, gate_object=None):
+        """Journal the new value of param and make it undoable (default: a parameter of the object on display)."""
+        gate_object = gate_object or self._shown_object
+        if gate_object is not None:
+            self.host.cManager.journal.set_parameter(gate_object, param)
+            self.host.push_undo(SetParameter(gate_object, param, old_values, old_unit))
+
+    def clear(self):
+        """Show nothing (the object on display was deleted)."""
+        self.finish_typing()
+        self._shown_object = None
+        self._release_rows()
+        self.listview.setModel(QStandardItemModel())
 
     def browse_file_for_param(self, button, param, index):
         dlg = QFileDialog()
@@ -454,11 +755,28 @@ class InspectorSection:
         dlg.setFileMode(QFileDialog.FileMode.ExistingFile)
         if dlg.exec():
             selected_file = dlg.selectedFiles()[0]
-            while len(param.value_list) <= index:
-                param.value_list.append("")
-            param.value_list[index] = selected_file
+            values = list(param.value_list or [])     # value_list may be a shared table, never edit it in place
+            while len(values) <= index:
+                values.append("")
+            values[index] = selected_file
+            param.value_list = values
             button.setText(selected_file)
             self.host.write_to_console(f"Selected file for {param.displayed_name}: {selected_file}")
+            self.host.bounds.parameter_changed(self._shown_object, param)     # a genericRepeater file moves copies
+            if kind_of(param.path):
+                self.report_placement_file(param, selected_file)
+
+    def report_placement_file(self, param, path):
+        """Summary and problems of a generic repeater / movement placement file, in the console."""
+        try:
+            table = PlacementTable.load(path)
+        except (OSError, ValueError) as e:
+            self.host.write_to_console(f"Cannot read the placement file: {e}", ERROR)
+            return
+        self.host.write_to_console(f"Placements: {table.summary()}")
+        start, stop, time_slice = acquisition_window(self.host.cManager.node_tree)
+        for problem in table.validate(start, stop, time_slice, kind=kind_of(param.path)):
+            self.host.write_to_console(f"Placement file: {problem}", WARNING)
     
     
     # -----------------------------
@@ -518,10 +836,7 @@ class InspectorSection:
     
     
     def rename_gate_object(self, gate_object, new_name):
-        existing_names = set()
-        root = self.host.hierarchySection.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            existing_names.add(root.child(i).text(0))
+        existing_names = set(self.host.hierarchySection.top_level_names())
 
         unique_name = new_name
         if new_name in existing_names and gate_object.get_name() != new_name:
@@ -530,10 +845,12 @@ class InspectorSection:
                 i += 1
             unique_name = f"{new_name}{i}"
 
+        old_name = gate_object.get_name()
         gate_object.name = unique_name
-        selected_item = self.host.hierarchySection.tree.currentItem()
-        if selected_item:
-            selected_item.setText(0, unique_name)
+        if unique_name != old_name:
+            self.host.cManager.journal.rename(gate_object, old_name)
+            self.host.push_undo(Rename(gate_object, old_name))
+        self.host.hierarchySection.refresh_object(gate_object)
         self.host.write_to_console(f"Renamed object to: {unique_name}")
     
     # -----------------------------
@@ -551,14 +868,16 @@ class InspectorSection:
         for name in self._world_volume_names():
             dd.addItem(name)
 
-        attach_param = next((p for p in src_obj.parameters if p.path.endswith("/attachTo")), None)
+        attach_param = next(iter(src_obj.get_parameters_by_label("Attach to volume")), None)
         current_attach = (attach_param.default_value_list[0] if (attach_param and attach_param.default_value_list) else "")
         if current_attach and dd.findText(current_attach) != -1:
             dd.setCurrentText(current_attach)
 
         def on_attach_changed(txt):
             if attach_param:
+                old = attach_param.default_value_list, attach_param.default_unit
                 attach_param.default_value_list = ["" if txt.strip() in ("", "-", " - ") else txt]
+                self.record_edit(attach_param, *old, gate_object=src_obj)
 
         dd.currentTextChanged.connect(on_attach_changed)
 
@@ -576,54 +895,39 @@ class InspectorSection:
     def _world_volume_names(self):
         """Return names of world and all its descendants as candidate attach targets."""
         names = []
-        tree = self.host.hierarchySection.tree
-        root = tree.invisibleRootItem()
-        # find the 'world' item
-        world_item = None
-        for i in range(root.childCount()):
-            it = root.child(i)
-            obj = it.data(0, Qt.ItemDataRole.UserRole)
-            if obj and obj.get_name() == "world":
-                world_item = it
+        root = self.host.hierarchySection.model.root()
+        # find the 'world' object
+        world_obj = None
+        for obj in ([root] + root.daughters if root is not None else []):
+            if obj.get_name() == "world":
+                world_obj = obj
                 break
-        if not world_item:
+        if not world_obj:
             return names
 
-        def walk(it):
-            obj = it.data(0, Qt.ItemDataRole.UserRole)
-            if obj:
-                names.append(obj.get_name())  # use Gate name (matches Gate macro)
-            for k in range(it.childCount()):
-                walk(it.child(k))
+        def walk(obj):
+            names.append(obj.get_name())  # use Gate name (matches Gate macro)
+            for d in obj.daughters:
+                walk(d)
 
-        walk(world_item)
+        walk(world_obj)
         return names
     
     
     def _delete_source(self, item, src_obj):
-        # Remove from GateObject parent
+        # Remove from the GateObject parent and the hierarchy model
         parent_obj = getattr(src_obj, "parent", None)
         if parent_obj and hasattr(parent_obj, "daughters"):
             try:
-                parent_obj.daughters.remove(src_obj)
+                command = RemoveObject(src_obj)
+                self.host.cManager.journal.remove(src_obj)
+                self.host.hierarchySection.remove_object(src_obj)
+                self.host.push_undo(command)
             except ValueError:
                 pass
 
-        # REmove from the QTreeWidget
-        tree = self.host.hierarchySection.tree
-        # 'item' here is the QTreeWidgetItem passed from populate_parameters; if not, find it:
-        qt_item = item if hasattr(item, "data") else tree.currentItem()
-        if qt_item and qt_item.parent():
-            parent_qt = qt_item.parent()
-            parent_qt.removeChild(qt_item)
-        elif qt_item:
-            # top-level under /source
-            idx = tree.indexOfTopLevelItem(qt_item)
-            if idx >= 0:
-                tree.takeTopLevelItem(idx)
-
         # Clear inspector
-        self.listview.setModel(QStandardItemModel())
+        self.clear()
 
         # Console note
         self.host.write_to_console(f"Deleted source '{src_obj.get_name()}'.")
@@ -631,24 +935,25 @@ class InspectorSection:
     # -----------------------------
     # Misc utilities
     # -----------------------------
+    def _spacer_item(self, height=1) -> QStandardItem:
+        s = QStandardItem()
+        s.setSizeHint(QSize(10, height))
+        return s
+
     def _add_spacer(self, model, height=1):
-        s = QStandardItem(); 
-        s.setSizeHint(QSize(10, height)); 
-        model.appendRow(s)
+        model.appendRow(self._spacer_item(height))
         
     def _all_system_roots(self):
         # Scan the current tree for objects with system_type set
         systems = []
-        tree = self.host.hierarchySection.tree
-        root = tree.invisibleRootItem()
-        def walk(item):
-            obj = item.data(0, Qt.ItemDataRole.UserRole)
-            if obj and getattr(obj, "system_type", None):
+        def walk(obj):
+            if getattr(obj, "system_type", None):
                 systems.append(obj)
-            for i in range(item.childCount()):
-                walk(item.child(i))
-        for i in range(root.childCount()):
-            walk(root.child(i))
+            for d in obj.daughters:
+                walk(d)
+        root = self.host.hierarchySection.model.root()
+        if root is not None:
+            walk(root)
         return systems 
         
     def _shape_hint_text(self, gate_object, system_type, level):
@@ -679,7 +984,8 @@ class InspectorSection:
     def _sync_seed_manual_state(self):
         if not self._seed_manual_edit:
             return
-        mode = (self._seed_mode_dd.currentText() if self._seed_mode_dd else "").strip().lower()
+        p = self._seed_mode_param
+        mode = str(p.default_value_list[0] if p and p.default_value_list else "").strip().lower()
         is_manual = (mode == "manual")
         self._seed_manual_edit.setEnabled(is_manual)
         if is_manual:
@@ -709,82 +1015,33 @@ class InspectorSection:
     # Resizing (public API)
     # -----------------------------
     def resize_parameters(self, font_size: int):
-        if not self.inspector_widgets:
+        model = self.listview.model()
+        if not model:
             return
-        
-        def _text_width(fs: int) -> int: return 120 + (fs * 2)
-        def _dd_width(fs: int)   -> int: return 220 + (fs * 2)
-
-        for entry in self.inspector_widgets:
-            # ---- normalize entry  ----
-            if isinstance(entry, dict):
-                label   = entry.get("label")
-                inputs  = entry.get("inputs") or []
-                unit_dd = entry.get("unit")
-            else:
-                label   = entry[0] if len(entry) > 0 else None
-                second  = entry[1] if len(entry) > 1 else None
-                unit_dd = entry[2] if len(entry) > 2 else None
-                if isinstance(second, (list, tuple)):
-                    inputs = list(second)
-                elif second is None:
-                    inputs = []
-                else:
-                    inputs = [second]
-
-            # ---- label sizing ----
-            if isinstance(label, QLabel):
-                label.setFont(QFont(label.font().family(), font_size))
-                if hasattr(self, "_label_min_px"):
-                    label.setMinimumWidth(self._label_min_px(font_size))
-
-            # ---- input widgets ----
-            for w in inputs:
-                if not w:
-                    continue
-                w.setFont(QFont(w.font().family(), font_size))
-
-                # consistent widths per type
-                if isinstance(w, QLineEdit):
-                    w.setFixedWidth(_text_width(font_size))
-                    w.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
-                elif isinstance(w, (QComboBox, BigPopupCombo)):
-                    w.setFixedWidth(_dd_width(font_size))
-                elif isinstance(w, QCheckBox):
-                    w.setStyleSheet("")
-                elif isinstance(w, QPushButton):
-                    w.setFixedWidth(_dd_width(font_size))
-
-            # ---- unit dropdown  ----
-            if isinstance(unit_dd, BigPopupCombo):
-                unit_dd.setFont(QFont("Arial", font_size))
-                unit_dd.setFixedWidth(90 + (font_size // 2))
-                self._prepare_combo(unit_dd)
-
-        # ---- row heights ----
-        row_h = self._control_height(font_size)
-        for entry in self.inspector_widgets:
-            # apply height to all widgets
-            if isinstance(entry, dict):
-                widgets = [entry.get("label")] + (entry.get("inputs") or []) + [entry.get("unit")]
-            else:
-                second = entry[1] if len(entry) > 1 else None
-                if isinstance(second, (list, tuple)):
-                    widgets = [entry[0]] + list(second) + ([entry[2]] if len(entry) > 2 else [])
-                else:
-                    widgets = [entry[0], second, entry[2] if len(entry) > 2 else None]
 
-            for w in widgets:
-                if w and hasattr(w, "setFixedHeight"):
-                    w.setFixedHeight(row_h)
+        # pooled rows restyle themselves when (re)bound at another font size
+        self._row_font_size = font_size
+        for row in self._bound_rows.values():
+            row.apply_font(font_size)
 
-        # normalize QListView row heights to fix the clipping
-        model = self.listview.model()
-        if model:
-            vpad = 4
-            for r in range(model.rowCount()):
-                it = model.item(r)
-                if it is not None:
-                    sh = it.sizeHint()
-                    it.setSizeHint(QSize(sh.width(), row_h + vpad))
-    
+        # normalize QListView row heights to fix the clipping; labels and the
+        # special rows (buttons, rename, ...) keep their weight, only the size changes
+        row_h = self._control_height(font_size)
+        vpad = 4
+        for r in range(model.rowCount()):
+            it = model.item(r)
+            if it is not None:
+                sh = it.sizeHint()
+                it.setSizeHint(QSize(sh.width(), row_h + vpad))
+                if it.font().pointSize() != font_size:
+                    f = it.font()
+                    f.setPointSize(font_size)
+                    it.setFont(f)
+                widget = self.listview.indexWidget(it.index())
+                if widget is not None:
+                    for w in (widget, *widget.findChildren(QWidget)):
+                        if w.font().pointSize() != font_size:
+                            f = w.font()
+                            f.setPointSize(font_size)
+                            w.setFont(f)
+        self._layout_rows()
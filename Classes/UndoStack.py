@@ -0,0 +1,251 @@
+"""
+Undo/redo for edits of a GateObject tree.
+
+    stack = UndoStack(TreeEditor())
+    stack.push(SetParameter(obj, param, old_values, old_unit))   # edit already applied
+    stack.undo(); stack.redo()
+
+Commands store the inverse of one edit, not a copy of the project:
+  - SetParameter keeps the old and new value lists. They are the lists the
+    parameter held (never mutated in place), so holding them costs a reference.
+  - RemoveObject keeps the detached subtree itself; undo puts the same objects
+    back at the same row, so undoing a delete walks the subtree once, like the delete.
+History memory is capped by an estimate of what the commands keep alive
+(max_bytes); the oldest commands are dropped first.
+
+Commands apply changes through a TreeEditor, so the window can keep its views
+and the edit journal in step (see MainWindow).
+"""
+import sys
+
+# rough cost of what a command keeps alive (see benchmarks/param_memory.py)
+COMMAND_BYTES = 200
+OBJECT_BYTES = 600
+PARAMETER_BYTES = 150
+
+
+class TreeEditor(object):
+    """Applies command steps to the tree; subclass to update views alongside."""
+    def set_parameter(self, obj, param, values, unit):
+        param.default_value_list = values
+        if unit is not None:
+            param.default_unit = unit
+
+    def set_attributes(self, obj, values: dict):
+        for name, value in values.items():
+            setattr(obj, name, value)
+
+    def rename(self, obj, name):
+        obj.name = name
+
+    def insert(self, parent, obj, row):
+        parent.insert_daughter(row, obj)
+
+    def remove(self, obj):
+        obj.parent.remove_daughter(obj)
+
+
+class Command(object):
+    text = ""
+
+    def redo(self, editor: TreeEditor):
+        raise NotImplementedError
+
+    def undo(self, editor: TreeEditor):
+        raise NotImplementedError
+
+    def merge(self, other) -> bool:
+        """Absorb other (pushed right after self); True if merged."""
+        return False
+
+    def size(self) -> int:
+        return COMMAND_BYTES
+
+
+class SetParameter(Command):
+    """A parameter edit; push it after the new value was set."""
+    def __init__(self, obj, param, old_values, old_unit):
+        self.obj, self.param = obj, param
+        self.old = (old_values, old_unit)
+        self.new = (param.default_value_list, param.default_unit)
+        self.text = f"Edit {param.displayed_name or param.path}"
+
+    def redo(self, editor):
+        editor.set_parameter(self.obj, self.param, *self.new)
+
+    def undo(self, editor):
+        editor.set_parameter(self.obj, self.param, *self.old)
+
+    def merge(self, other):
+        # typing in a field sends one edit per keystroke: keep the first old value
+        if type(other) is not SetParameter or other.param is not self.param:
+            return False
+        self.new = other.new
+        return True
+
+    def size(self):
+        return COMMAND_BYTES + sys.getsizeof(self.old[0] or []) + sys.getsizeof(self.new[0] or [])
+
+
+class SetParameters(Command):
+    """Several parameter edits of one object made as one step; changes holds (param, old values, old unit)."""
+    def __init__(self, obj, changes, text="Edit parameters"):
+        self.obj = obj
+        self.old = [(param, values, unit) for param, values, unit in changes]
+        self.new = [(param, param.default_value_list, param.default_unit) for param, _, _ in changes]
+        self.text = text
+
+    def redo(self, editor):
+        for param, values, unit in self.new:
+            editor.set_parameter(self.obj, param, values, unit)
+
+    def undo(self, editor):
+        for param, values, unit in reversed(self.old):
+            editor.set_parameter(self.obj, param, values, unit)
+
+    def size(self):
+        return COMMAND_BYTES * (1 + len(self.new))
+
+
+class SetAttributes(Command):
+    """Object attributes (system_type, role, ...); before holds their old values."""
+    def __init__(self, obj, before: dict, text="Edit object"):
+        self.obj = obj
+        self.before = dict(before)
+        self.after = {name: getattr(obj, name) for name in before}
+        self.text = text
+
+    def redo(self, editor):
+        editor.set_attributes(self.obj, self.after)
+
+    def undo(self, editor):
+        editor.set_attributes(self.obj, self.before)
+
+
+class Rename(Command):
+    def __init__(self, obj, old_name):
+        self.obj, self.old, self.new = obj, old_name, obj.get_name()
+        self.text = f"Rename {old_name} to {self.new}"
+
+    def redo(self, editor):
+        editor.rename(self.obj, self.new)
+
+    def undo(self, editor):
+        editor.rename(self.obj, self.old)
+
+
+class AddObject(Command):
+    """obj was just added under its parent."""
+    def __init__(self, obj):
+        self.obj, self.parent = obj, obj.parent
+        self.row = self.parent.daughters.index(obj)
+        self.text = f"Add {obj.get_name()}"
+
+    def redo(self, editor):
+        editor.insert(self.parent, self.obj, self.row)
+
+    def undo(self, editor):
+        editor.remove(self.obj)
+
+    def size(self):
+        return _subtree_size(self.obj)
+
+
+class RemoveObject(AddObject):
+    """obj is about to be removed (create the command before removing it)."""
+    def __init__(self, obj):
+        super().__init__(obj)
+        self.text = f"Delete {obj.get_name()}"
+
+    def redo(self, editor):
+        editor.remove(self.obj)
+
+    def undo(self, editor):
+        editor.insert(self.parent, self.obj, self.row)
+
+
+def _subtree_size(obj) -> int:
+    size = COMMAND_BYTES
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        # template-backed objects share their rows with the template
+        size += OBJECT_BYTES + PARAMETER_BYTES * o.own_parameter_count()
+        stack.extend(o.daughters)
+    return size
+
+
+class UndoStack(object):
+    def __init__(self, editor: TreeEditor | None = None, max_bytes: int = 64 * 2**20):
+        self.editor = editor or TreeEditor()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._done: list[tuple[Command, int]] = []      # (command, size when pushed)
+        self._undone: list[tuple[Command, int]] = []
+        self._mergeable = False     # no merging into a command that was undone and redone
+
+    def __len__(self):
+        return len(self._done)
+
+    def can_undo(self) -> bool:
+        return bool(self._done)
+
+    def can_redo(self) -> bool:
+        return bool(self._undone)
+
+    def undo_text(self) -> str:
+        return self._done[-1][0].text if self._done else ""
+
+    def redo_text(self) -> str:
+        return self._undone[-1][0].text if self._undone else ""
+
+    def clear(self):
+        self._done, self._undone, self.bytes = [], [], 0
+
+    def checkpoint(self):
+        """Start a new undo step: the next command is not merged into the last one."""
+        self._mergeable = False
+
+    def push(self, command: Command, done: bool = True):
+        """Record command; done=False runs it first (otherwise the edit was already made)."""
+        if not done:
+            command.redo(self.editor)
+        self.bytes -= sum(size for _, size in self._undone)
+        self._undone = []
+        if self._mergeable and self._done and self._done[-1][0].merge(command):
+            top, size = self._done[-1]
+            self.bytes -= size
+            self._done[-1] = (top, top.size())
+            self.bytes += self._done[-1][1]
+        else:
+            size = command.size()
+            self._done.append((command, size))
+            self.bytes += size
+        self._mergeable = True
+        self._trim()
+
+    def _trim(self):
+        drop = 0
+        while self.bytes > self.max_bytes and drop < len(self._done) - 1:
+            self.bytes -= self._done[drop][1]
+            drop += 1
+        if drop:
+            del self._done[:drop]
+
+    def undo(self) -> Command | None:
+        if not self._done:
+            return None
+        entry = self._done.pop()
+        entry[0].undo(self.editor)
+        self._undone.append(entry)
+        self._mergeable = False
+        return entry[0]
+
+    def redo(self) -> Command | None:
+        if not self._undone:
+            return None
+        entry = self._undone.pop()
+        entry[0].redo(self.editor)
+        self._done.append(entry)
+        self._mergeable = False
+        return entry[0]
@@ -0,0 +1,185 @@
+"""
+Parameter values of a whole tree in Geant4's internal units, in one pass.
+
+    tree = normalize_tree(root)
+    tree.values_of(i)               # parameter i's numbers, in internal units
+    tree.first                      # (n,) first number of each parameter (nan: none)
+    tree.params[i], tree.object_of(i)
+    i = tree.find(obj, "/world/geometry/setXLength")
+    lengths = tree.of_kind("LENGTH_UNITS")         # indices of the parameters in a length unit
+    to_internal(12.5, "cm")         # 125.0
+
+Parameters are numbered in tree order (each object before its daughters, rows
+in their order; objects not yet loaded are loaded). A parameter's numbers
+are those of its value list: numbers as they are, text fields split into
+numbers ("0 0 25"), anything else skipped, as RepeaterExpansion reads them.
+They are multiplied by the factor of the parameter's unit (StaticData.UNIT_FACTORS:
+mm, rad, ns, MeV, e+, K, mol); a parameter without a unit keeps its numbers,
+and one with a unit no table knows gets nan.
+
+Value tables as built and template rows are shared (GateParameter.shared_list,
+ParameterTemplate), so a big tree has few distinct (value table, unit) pairs
+besides its edited values. Each row is reduced to the code of its pair (the
+rows of a template once for all its objects), each pair is parsed and converted
+once, and the values of every parameter are then gathered from the pairs in
+one array step.
+"""
+import numpy as np
+
+from Classes.GateObject import ParameterTemplate
+from Classes.GateParameter import table_keys
+from Classes.StaticData import UNIT_FACTORS, UNIT_LIST_FACTORS
+
+KINDS = tuple(UNIT_LIST_FACTORS)        # kind code -> unit list name; -1: no unit, -2: unknown unit
+_KIND_OF = {unit: k for k, factors in enumerate(UNIT_LIST_FACTORS.values()) for unit in factors}
+NO_UNIT, UNKNOWN_UNIT = -1, -2
+
+
+def to_internal(value: float, unit: str | None) -> float:
+    """value in unit -> internal units (no unit: unchanged, unknown unit: nan)."""
+    if unit is None:
+        return float(value)
+    return float(value) * UNIT_FACTORS.get(unit, np.nan)
+
+
+def numbers_of(values) -> list:
+    """The numbers of a value list: numbers as they are, text split on spaces and commas."""
+    out = []
+    for v in values or []:
+        if isinstance(v, (int, float)):
+            out.append(float(v))
+        elif isinstance(v, str):
+            for token in v.replace(",", " ").split():       # "0 1 0" text fields
+                try:
+                    out.append(float(token))
+                except ValueError:
+                    pass
+    return out
+
+
+class _RowCodes(object):
+    """Numbers a row to a code per distinct (value table, unit); each code is read once."""
+    __slots__ = ("codes", "samples")
+
+    def __init__(self):
+        self.codes = {}         # GateParameter.table_keys key -> code
+        self.samples = []       # code -> a parameter with that table and unit (keeps the table alive)
+
+    def of(self, rows) -> np.ndarray:
+        codes, samples = self.codes, self.samples
+        keys = table_keys(rows)
+        out = list(map(codes.get, keys))
+        if None in out:         # pairs not seen yet
+            for i, (p, key) in enumerate(zip(rows, keys)):
+                if out[i] is None:
+                    out[i] = codes.get(key)
+                    if out[i] is None:
+                        out[i] = codes[key] = len(samples)
+                        samples.append(p)
+        return np.array(out, dtype=np.int64)
+
+    def tables(self):
+        """Per code: numbers (concatenated, in internal units), offsets into them, factor and kind."""
+        numbers, counts, factors, kinds = [], [], [], []
+        for p in self.samples:
+            unit = p.default_unit
+            factor = 1.0 if unit is None else UNIT_FACTORS.get(unit, np.nan)
+            values = numbers_of(p.default_value_list)
+            numbers.extend(v * factor for v in values)
+            counts.append(len(values))
+            factors.append(factor)
+            kinds.append(NO_UNIT if unit is None else _KIND_OF.get(unit, UNKNOWN_UNIT))
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return (np.array(numbers, dtype=np.float64), offsets,
+                np.array(factors, dtype=np.float64), np.array(kinds, dtype=np.int8))
+
+
+class NormalizedTree(object):
+    """Numbers of every parameter of a tree, in internal units, keyed by parameter index."""
+    __slots__ = ("objects", "params", "object_starts", "offsets", "values", "factors", "kinds", "_by_object")
+
+    def __init__(self, objects, params, object_starts, offsets, values, factors, kinds):
+        self.objects = objects                  # tree order
+        self.params = params                    # parameter index -> GateParameter (template rows are shared)
+        self.object_starts = object_starts      # (len(objects) + 1,) first parameter index of each object
+        self.offsets = offsets                  # (n + 1,) parameter i's numbers are values[offsets[i]:offsets[i + 1]]
+        self.values = values
+        self.factors = factors                  # (n,) unit factor of each parameter
+        self.kinds = kinds                      # (n,) index into KINDS, or NO_UNIT / UNKNOWN_UNIT
+        self._by_object = None
+
+    def __len__(self):
+        return len(self.params)
+
+    def values_of(self, i) -> np.ndarray:
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def first(self) -> np.ndarray:
+        """(n,) first number of each parameter, nan for parameters without numbers."""
+        out = np.full(len(self.params), np.nan)
+        has = self.offsets[1:] > self.offsets[:-1]
+        out[has] = self.values[self.offsets[:-1][has]]
+        return out
+
+    def of_kind(self, list_name: str) -> np.ndarray:
+        """Indices of the parameters whose unit is in that StaticData list ("LENGTH_UNITS", ...)."""
+        return np.flatnonzero(self.kinds == KINDS.index(list_name))
+
+    def object_of(self, i):
+        return self.objects[int(np.searchsorted(self.object_starts, i, side="right")) - 1]
+
+    def span(self, obj) -> range:
+        """Parameter indices of obj."""
+        if self._by_object is None:
+            self._by_object = {o: k for k, o in enumerate(self.objects)}
+        k = self._by_object[obj]
+        return range(int(self.object_starts[k]), int(self.object_starts[k + 1]))
+
+    def find(self, obj, path: str) -> int:
+        """Index of obj's first parameter with that path (template rows match by their suffix), or -1."""
+        own = f"/{obj.get_name()}/"
+        if obj.template is not None and path.startswith(own):
+            path = f"/{ParameterTemplate.PLACEHOLDER}/" + path[len(own):]
+        for i in self.span(obj):
+            if self.params[i].path == path:
+                return i
+        return -1
+
+
+def normalize_tree(root) -> NormalizedTree:
+    """Every parameter of root and the objects below it, converted in one pass (see the module doc)."""
+    rows_codes = _RowCodes()
+    blocks = {}             # id(row sequence) -> (rows, codes): objects of one template share theirs
+    objects, order = [], []
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        rows = obj.peek_parameters()
+        block = blocks.get(id(rows))
+        if block is None:
+            block = blocks[id(rows)] = (rows, rows_codes.of(rows))
+        objects.append(obj)
+        order.append(block)
+        stack.extend(reversed(obj.daughters))
+
+    params = []
+    for rows, _ in order:
+        params.extend(rows)
+    object_starts = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum([len(codes) for _, codes in order], out=object_starts[1:])
+    codes = np.concatenate([c for _, c in order]) if order else np.zeros(0, dtype=np.int64)
+
+    numbers, code_offsets, code_factors, code_kinds = rows_codes.tables()
+    counts = np.diff(code_offsets)[codes]
+    offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    # value k of parameter i is number code_offsets[code] + k
+    gather = np.repeat(code_offsets[codes] - offsets[:-1], counts) + np.arange(offsets[-1])
+    return NormalizedTree(objects, params, object_starts, offsets, numbers[gather],
+                          code_factors[codes], code_kinds[codes])
@@ -0,0 +1,107 @@
+"""
+Extents of a large tree of distinct volumes, before and after an edit.
+
+    python benchmarks/geometry_bounds.py [--sectors 200 --blocks 50 --crystals 16]
+
+The world holds --sectors sectors (boxes placed around Z), each with --blocks
+blocks, each block a cubicArray of --crystals x --crystals crystals: every
+sector and block is its own volume, as in an imported project. Times the first
+measure of the whole tree, a cached query, and a query after one crystal
+was resized (BoundsEngine only re-measures the path from it to the world),
+against expanding every placement (expand_tree) and taking the crystal corners.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.GObjectCreator import GObjectCreator
+from Classes.RepeaterParameterBuilder import RepeaterParameterBuilder
+from Classes.RepeaterExpansion import expand_tree
+from Classes.GeometryBounds import BoundsEngine, format_extent
+
+
+def volume(name, mother, repeater=None, **values):
+    obj = GObjectCreator.create_world_daughter(name, "box", None)
+    mother.add_daughter(obj)
+    if repeater:
+        obj.parameters.extend(RepeaterParameterBuilder.get_parameters(name, repeater))
+    for command, value in values.items():
+        p = obj.get_parameter(f"/{name}/{command}")
+        p.default_value_list = value if isinstance(value, list) else [value]
+        if p.unit_list:
+            p.default_unit = "mm"
+    return obj
+
+
+def build_tree(sectors: int, blocks: int, crystals: int):
+    world = GObjectCreator.create_world_daughter("world", "box", None)
+    crystal_rows = {"geometry/setXLength": 2, "geometry/setYLength": 2, "geometry/setZLength": 10,
+                    "cubicArray/setRepeatNumberX": crystals, "cubicArray/setRepeatNumberY": crystals,
+                    "cubicArray/setRepeatVector": "2 2 0"}
+    side = 2 * crystals
+    for s in range(sectors):
+        angle = 2 * math.pi * s / sectors
+        sector = volume(f"sector{s}", world, **{
+            "geometry/setXLength": side, "geometry/setYLength": side, "geometry/setZLength": 12 * blocks,
+            "placement/setTranslation": [500 * math.cos(angle), 500 * math.sin(angle), 0],
+            "placement/setRotationAxis": "0 0 1", "placement/setRotationAngle": math.degrees(angle)})
+        for b in range(blocks):
+            block = volume(f"block{s}_{b}", sector, **{
+                "geometry/setXLength": side, "geometry/setYLength": side, "geometry/setZLength": 10,
+                "placement/setTranslation": [0, 0, 12 * (b - (blocks - 1) / 2)]})
+            volume(f"crystal{s}_{b}", block, "cubicArray", **crystal_rows)
+    return world
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sectors", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=50)
+    parser.add_argument("--crystals", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    world = build_tree(args.sectors, args.blocks, args.crystals)
+    engine = BoundsEngine()
+    t0 = time.perf_counter()
+    box = engine.subtree(world)
+    t1 = time.perf_counter()
+    engine.subtree(world)
+    t2 = time.perf_counter()
+    crystal = world.daughters[0].daughters[0].daughters[0]
+    param = crystal.get_parameter(f"/{crystal.get_name()}/geometry/setZLength")
+    param.default_value_list = [30]
+    engine.parameter_changed(crystal, param)
+    measured = engine.computed
+    t3 = time.perf_counter()
+    edited = engine.subtree(world)
+    t4 = time.perf_counter()
+
+    frames = expand_tree(world)
+    corners = np.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float64)
+    lo, hi = np.full(3, np.inf), np.full(3, -np.inf)
+    for obj, placements in frames.items():
+        if obj.get_name().startswith("crystal"):
+            half = np.array([1.0, 1.0, 15.0 if obj is crystal else 5.0])
+            points = np.einsum("nij,kj->nki", placements[:, :3, :3], corners * half) + placements[:, None, :3, 3]
+            lo, hi = np.minimum(lo, points.min(axis=(0, 1))), np.maximum(hi, points.max(axis=(0, 1)))
+    t5 = time.perf_counter()
+
+    print(f"volumes         : {measured}, {sum(len(p) for p in frames.values())} placements")
+    print(f"extent          : {format_extent(box)}")
+    print(f"after the edit  : {format_extent(edited)} ({engine.computed - measured} volumes re-measured)")
+    print(f"expanded        : {format_extent(np.array([lo, hi]))}")
+    print(f"first measure   : {(t1 - t0) * 1000:8.1f} ms")
+    print(f"cached query    : {(t2 - t1) * 1e6:8.1f} us")
+    print(f"after an edit   : {(t4 - t3) * 1000:8.2f} ms")
+    print(f"expand_tree     : {(t5 - t4) * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
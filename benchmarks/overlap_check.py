@@ -0,0 +1,59 @@
+"""
+Checking a large crystal array for overlaps.
+
+    python benchmarks/overlap_check.py [--nx 320 --ny 240 --gap 0.0]
+
+Places --nx x --ny crystals (3 x 3 x 20 mm on a 3 mm pitch, made --gap mm
+wider so that neighbours overlap when it is > 0) in the world with a
+cubicArray repeater, and times check_overlaps.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.GObjectCreator import GObjectCreator
+from Classes.RepeaterParameterBuilder import RepeaterParameterBuilder
+from Classes.OverlapCheck import check_overlaps
+
+
+def set_rows(obj, unit="mm", **values):
+    for command, value in values.items():
+        p = obj.get_parameter(f"/{obj.get_name()}/{command}")
+        p.default_value_list = value if isinstance(value, list) else [value]
+        if p.unit_list:
+            p.default_unit = unit
+
+
+def build_array(nx: int, ny: int, gap: float):
+    world = GObjectCreator.create_world_daughter("world", "box", None)
+    set_rows(world, **{"geometry/setXLength": 4 * nx, "geometry/setYLength": 4 * ny, "geometry/setZLength": 100})
+    crystal = GObjectCreator.create_world_daughter("crystal", "box", None)
+    world.add_daughter(crystal)
+    crystal.parameters.extend(RepeaterParameterBuilder.get_parameters("crystal", "cubicArray"))
+    set_rows(crystal, **{"geometry/setXLength": 3 + gap, "geometry/setYLength": 3, "geometry/setZLength": 20,
+                         "cubicArray/setRepeatNumberX": nx, "cubicArray/setRepeatNumberY": ny,
+                         "cubicArray/setRepeatVector": "3 3 0"})
+    return world
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nx", type=int, default=320)
+    parser.add_argument("--ny", type=int, default=240)
+    parser.add_argument("--gap", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    world = build_array(args.nx, args.ny, args.gap)
+    t0 = time.perf_counter()
+    report = check_overlaps(world)
+    dt = time.perf_counter() - t0
+    print(report.lines(limit=0)[-1])
+    print(f"check_overlaps  : {dt * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Memory per parameter of a generated node tree.
+
+    python benchmarks/param_memory.py [--params 100000]
+
+Builds world daughters (cycling through shapes) until the tree holds at least
+--params parameters and reports the memory retained by the tree with the
+current slotted GateParameter/GateObject. For reference it also builds the
+same tree with the previous layout (per-instance __dict__, unit string per
+parameter, value and dropdown option lists copied per parameter, no index).
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.GObjectCreator import GObjectCreator
+from Classes.GateObject import GateObject
+
+SHAPES = ("box", "cylinder", "sphere", "cone", "ellipsoid", "wedge")
+
+
+class LegacyParameter(object):
+    """GateParameter as it was before __slots__/shared tables."""
+    def __init__(self, path, displayed_name, input_type_list, default_value_list, value_list, unit_list=None, default_unit=None):
+        self.path = path
+        self.displayed_name = displayed_name
+        self.input_type_list = input_type_list
+        self.default_value_list = default_value_list
+        self.value_list = value_list
+        self.unit_list = unit_list
+        self.default_unit = default_unit
+
+
+class LegacyObject(object):
+    def __init__(self, name, path, node_type, parameters):
+        self.name = name
+        self.path = path
+        self.node_type = node_type
+        self.parameters = list(parameters)
+        self.daughters = []
+        self.enabled = True
+        self.role = None
+        self.parent = None
+        self.system_type = None
+        self.system_name = None
+        self.system_level = None
+        self.subtype = None
+
+
+def build_tree(n_params: int) -> tuple[GateObject, int]:
+    root = GateObject("world", "", "world")
+    count, i = 0, 0
+    while count < n_params:
+        shape = SHAPES[i % len(SHAPES)]
+        vol = GObjectCreator.create_world_daughter(f"vol{i}", shape, None)
+        vol.shape = shape
+        root.add_daughter(vol)
+        count += len(vol.parameters)
+        i += 1
+    return root, count
+
+
+def to_legacy(obj: GateObject) -> LegacyObject:
+    params = [LegacyParameter(p.path, p.displayed_name,
+                              list(p.input_type_list or []),
+                              list(p.default_value_list or []),
+                              [list(v) if isinstance(v, list) else v for v in (p.value_list or [])],
+                              p.unit_list,      # builders already shared the StaticData unit lists
+                              p.default_unit)
+              for p in obj.parameters]
+    legacy = LegacyObject(obj.name, obj.path, obj.node_type, params)
+    for d in obj.daughters:
+        child = to_legacy(d)
+        child.parent = legacy
+        legacy.daughters.append(child)
+    return legacy
+
+
+def index_bytes(root: GateObject) -> int:
+    tree = root._tree
+    return sum(sys.getsizeof(d) + sum(sys.getsizeof(v) for v in d.values() if type(v) is list)
+               for d in (tree.by_path, tree.by_label))
+
+
+def retained(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    keep = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del keep
+    return size
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--params", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    GObjectCreator.create_world_daughter("warmup", SHAPES[0], None)   # import-time caches out of the way
+    count = {}
+
+    def current():
+        root, count["n"] = build_tree(args.params)
+        count["index"] = index_bytes(root)
+        return root
+
+    def legacy():
+        root, _ = build_tree(args.params)
+        old = to_legacy(root)
+        del root
+        gc.collect()
+        return old
+
+    new_bytes = retained(current)
+    old_bytes = retained(legacy)
+    n, idx = count["n"], count["index"]
+    print(f"parameters        : {n}")
+    print(f"previous layout   : {old_bytes / 2**20:8.1f} MiB  {old_bytes / n:6.0f} B/param")
+    print(f"slotted + shared  : {new_bytes / 2**20:8.1f} MiB  {new_bytes / n:6.0f} B/param"
+          f"  (path/label index {idx / n:.0f} B/param included)")
+    print(f"reduction         : {old_bytes / new_bytes:8.2f}x  ({old_bytes / (new_bytes - idx):.2f}x without the index)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
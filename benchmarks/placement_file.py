@@ -0,0 +1,63 @@
+"""
+Loading a large genericMove placement file: text parse, sidecar, memory.
+
+    python benchmarks/placement_file.py [--lines 1000000]
+
+Writes a gantry motion file of --lines timed placements, then reports the
+time of the first load (parsing the text and writing the '.cache' sidecar),
+of a load from the memory-mapped sidecar (a new session), of a load from the
+in-memory cache (the file selected again) and of summary + validate.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.IO.placement_file import PlacementTable
+
+
+def write_file(path: str, lines: int):
+    t = np.arange(lines) * 1e-3
+    data = np.column_stack([t, (t * 6.0) % 360.0, np.zeros(lines), np.zeros(lines), np.ones(lines),
+                            np.zeros((lines, 2)), np.sin(t) * 50.0])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("###### gantry motion\nTime s\nRotation deg\nTranslation mm\n")
+        np.savetxt(f, data, fmt="%.6g")
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gantry.placements")
+        write_file(path, args.lines)
+        print(f"file            : {os.path.getsize(path) / 2**20:8.2f} MiB, {args.lines:,} lines")
+        _, dt = timed(lambda: PlacementTable.load(path))
+        print(f"parse + sidecar : {dt * 1000:8.1f} ms")
+        PlacementTable._LOADED.clear()
+        table, dt = timed(lambda: PlacementTable.load(path))
+        print(f"sidecar (mmap)  : {dt * 1000:8.1f} ms")
+        _, dt = timed(lambda: PlacementTable.load(path))
+        print(f"memory cache    : {dt * 1000:8.3f} ms")
+        _, dt = timed(lambda: (table.summary(), table.validate(0.0, 600e9, 1e9, kind="genericMove")))
+        print(f"summary+validate: {dt * 1000:8.1f} ms")
+        del table
+        PlacementTable._LOADED.clear()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Opening a large project: JSON snapshot versus .ctproj archive.
+
+    python benchmarks/project_format.py [--volumes 20000]
+
+Builds a project with --volumes edited world daughters, saves it as JSON
+(as export_json does) and as an archive, then times rebuilding the tree from
+each. Applying the nodes dominates, so the whole archive opens about as fast
+as the JSON file; the lazy archive load only applies the sections that get
+used. The last line opens the archive and then uses one small section
+(digitizer).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.GObjectCreator import GObjectCreator
+from Classes.IO.JsonHandler import JsonHandler
+from Classes.IO.project_archive import ProjectArchive, write_project_archive
+from Classes.IO.project_io import ProjectSnapshot, load_project_tree
+
+
+def build_document(n_volumes: int) -> dict:
+    root = GObjectCreator.create_static_objects(GObjectCreator.create_gate_root(), [], sd_names=[])
+    world = next(d for d in root.daughters if d.name == "world")
+    for i in range(n_volumes):
+        vol = GObjectCreator.create_world_daughter(f"crystal{i}", "box", None)
+        world.add_daughter(vol)
+        vol.get_parameter(f"/crystal{i}/geometry/setXLength").set_value(0, 4.0 + i % 7)
+    return ProjectSnapshot().build(root)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--volumes", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    document = build_document(args.volumes)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "project.json")
+        archive_path = os.path.join(tmp, "project.ctproj")
+        JsonHandler().save(json_path, document)
+        write_project_archive(archive_path, document)
+        print(f"JSON file                 : {os.path.getsize(json_path) / 2**20:8.2f} MiB")
+        print(f"archive file              : {os.path.getsize(archive_path) / 2**20:8.2f} MiB")
+
+        dt, _ = timed(lambda: load_project_tree(JsonHandler().load(json_path)))
+        print(f"JSON load + apply         : {dt * 1000:8.1f} ms")
+        dt, _ = timed(lambda: load_project_tree(ProjectArchive(archive_path).document()))
+        print(f"archive, whole document   : {dt * 1000:8.1f} ms")
+
+        def lazy():
+            root = load_project_tree(ProjectArchive(archive_path))
+            next(d for d in root.daughters if d.name == "digitizer").parameters
+            return root
+        dt, root = timed(lazy)
+        print(f"archive, lazy + digitizer : {dt * 1000:8.1f} ms  ({len(root._tree.deferred)} sections not loaded)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Importing a large JSON project: json.load then apply, versus streaming.
+
+    python benchmarks/project_import.py [--volumes 20000]
+
+Writes a project with --volumes edited world daughters (each with a few
+changed values) and imports it both ways onto a fresh factory tree. Reports
+the time, the time until the first node was applied (what the hierarchy can
+show), and, in a second traced run, the peak memory beyond the finished tree.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.GObjectCreator import GObjectCreator
+from Classes.IO.json_stream import JsonStream
+from Classes.IO.project_io import ProjectSnapshot, read_project_stream
+
+SHAPES = ("box", "cylinder", "sphere")
+
+
+def factory_tree():
+    return GObjectCreator.create_static_objects(GObjectCreator.create_gate_root(), [], sd_names=[])
+
+
+def write_project(path: str, n_volumes: int):
+    root = factory_tree()
+    world = next(d for d in root.daughters if d.name == "world")
+    for i in range(n_volumes):
+        vol = GObjectCreator.create_world_daughter(f"crystal{i}", SHAPES[i % len(SHAPES)], None)
+        world.add_daughter(vol)
+        vol.get_parameter(f"/crystal{i}/setMaterial").set_value(0, "Water")
+        vol.get_parameter(f"/crystal{i}/placement/setTranslation").default_value_list = [i * 0.1, 0.0, 1.0]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ProjectSnapshot().build(root), f, indent=2)
+
+
+def load_then_apply(path):
+    root = factory_tree()
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    first = time.perf_counter()     # nothing can be shown before the whole file is parsed
+    ProjectSnapshot().apply(root, data)
+    return root, first
+
+
+def streamed(path):
+    root = factory_tree()
+    first = []
+
+    def on_node(obj):
+        if not first and obj.parent is not None:
+            first.append(time.perf_counter())
+
+    with open(path, "rb") as f:
+        stream = JsonStream(f)
+        read_project_stream(stream, lambda head: ProjectSnapshot().apply_stream(root, stream, on_node, head))
+    return root, first[0]
+
+
+def measure(fn, path):
+    gc.collect()
+    t0 = time.perf_counter()
+    root, first = fn(path)
+    dt = time.perf_counter() - t0
+    del root
+    gc.collect()
+    tracemalloc.start()         # second run: tracing slows the import down
+    fn(path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dt, first - t0, (peak - current) / 2**20
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--volumes", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "project.json")
+        write_project(path, args.volumes)
+        print(f"JSON file       : {os.path.getsize(path) / 2**20:8.2f} MiB")
+        for name, fn in (("json.load+apply", load_then_apply), ("streamed", streamed)):
+            dt, first, extra = measure(fn, path)
+            print(f"{name:<16}: {dt * 1000:8.1f} ms, first node after {first * 1000:7.1f} ms, "
+                  f"peak beyond the tree {extra:7.2f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Expanding the repeaters of a PET-like scanner into world placements.
+
+    python benchmarks/repeater_expansion.py [--rings 40 --modules 30 --crystals 8]
+
+world/ring (linear repeater, --rings copies along Z) holds module (ring
+repeater, --modules copies around Z) holding crystal (cubicArray,
+--crystals x --crystals in YZ): rings * modules * crystals^2 placements.
+Reports the time of expand_tree over the best of --repeat runs.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.GObjectCreator import GObjectCreator
+from Classes.RepeaterParameterBuilder import RepeaterParameterBuilder
+from Classes.RepeaterExpansion import expand_tree
+
+
+def volume(name, mother, repeater, **values):
+    obj = GObjectCreator.create_world_daughter(name, "box", None)
+    mother.add_daughter(obj)
+    obj.parameters.extend(RepeaterParameterBuilder.get_parameters(name, repeater))
+    for command, value in values.items():
+        p = obj.get_parameter(f"/{name}/{command}")
+        p.default_value_list = value if isinstance(value, list) else [value]
+        if p.unit_list:
+            p.default_unit = "mm"
+    return obj
+
+
+def build_scanner(rings: int, modules: int, crystals: int):
+    world = GObjectCreator.create_world_daughter("world", "box", None)
+    volume("ring", world, "linear", **{"linear/setRepeatNumber": rings, "linear/setRepeatVector": "0 0 25"})
+    ring = world.daughters[0]
+    volume("module", ring, "ring", **{"ring/setRepeatNumber": modules, "placement/setTranslation": [400, 0, 0]})
+    volume("crystal", ring.daughters[0], "cubicArray", **{
+        "cubicArray/setRepeatNumberY": crystals, "cubicArray/setRepeatNumberZ": crystals,
+        "cubicArray/setRepeatVector": "0 3.2 3.2"})
+    return world
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rings", type=int, default=40)
+    parser.add_argument("--modules", type=int, default=30)
+    parser.add_argument("--crystals", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    world = build_scanner(args.rings, args.modules, args.crystals)
+    best, frames = float("inf"), None
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        frames = expand_tree(world)
+        best = min(best, time.perf_counter() - t0)
+    crystal = world.daughters[0].daughters[0].daughters[0]
+    print(f"placements      : {len(frames[crystal])} crystals ({frames[crystal].nbytes / 2**20:.1f} MiB)")
+    print(f"expand_tree     : {best * 1000:8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
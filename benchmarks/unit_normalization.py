@@ -0,0 +1,68 @@
+"""
+Converting every parameter of a large tree to Geant4's internal units.
+
+    python benchmarks/unit_normalization.py [--sectors 200 --blocks 50 --plain 20000]
+
+Uses the tree of benchmarks/geometry_bounds.py (every volume edited, so each
+holds its own parameters) plus --plain volumes still sharing their template
+rows, and compares normalize_tree with converting parameter by parameter
+(numbers_of and to_internal per row). Reports the best of --repeat runs.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.GObjectCreator import GObjectCreator
+from Classes.UnitNormalization import normalize_tree, numbers_of, to_internal
+from geometry_bounds import build_tree
+
+
+def per_parameter(root) -> list:
+    out = []
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        for p in obj.peek_parameters():
+            unit = p.default_unit
+            out.extend(to_internal(v, unit) for v in numbers_of(p.default_value_list))
+        stack.extend(reversed(obj.daughters))
+    return out
+
+
+def best(fn, repeat):
+    result, elapsed = None, float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = min(elapsed, time.perf_counter() - t0)
+    return result, elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sectors", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=50)
+    parser.add_argument("--plain", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    world = build_tree(args.sectors, args.blocks, 16)
+    for i in range(args.plain):
+        world.add_daughter(GObjectCreator.create_world_daughter(f"plain{i}", "cylinder", None))
+
+    tree, fast = best(lambda: normalize_tree(world), args.repeat)
+    values, slow = best(lambda: per_parameter(world), args.repeat)
+    same = np.allclose(tree.values, values, equal_nan=True)
+    print(f"parameters      : {len(tree)} in {len(tree.objects)} objects, {len(tree.values)} numbers (same: {same})")
+    print(f"normalize_tree  : {fast * 1000:8.1f} ms")
+    print(f"per parameter   : {slow * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Cost of creating many world daughters (e.g. the crystals of a PET ring).
+
+    python benchmarks/world_templates.py [--volumes 2000] [--edits 50]
+
+Creates --volumes boxes under a world node, edits the X length of --edits of
+them, and reports time and retained memory at each step. The last line
+materializes every volume, which is what each one used to cost up front.
+"""
+import argparse
+import gc
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.GObjectCreator import GObjectCreator
+from Classes.GateObject import GateObject
+from Classes.IO.macro_io import MacroExporter
+
+
+def scenario(n_volumes: int, n_edits: int):
+    """Yield (label, callable) steps operating on one shared world."""
+    world = GateObject("world", "", "world")
+    volumes = []
+
+    def create():
+        for i in range(n_volumes):
+            vol = GObjectCreator.create_world_daughter(f"crystal{i}", "box", None)
+            world.add_daughter(vol)
+            volumes.append(vol)
+
+    def edit():
+        for vol in volumes[:n_edits]:
+            world.find_parameter(f"/{vol.name}/geometry/setXLength").set_value(0, 4.0)
+
+    def export():
+        MacroExporter(include_run_commands=False).write(world, io.StringIO())
+
+    def materialize_all():
+        for vol in volumes:
+            vol.parameters
+
+    yield f"create {n_volumes} volumes", create
+    yield f"edit {n_edits} volumes", edit
+    yield "export macro", export
+    yield "materialize every volume", materialize_all
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--volumes", type=int, default=2000)
+    parser.add_argument("--edits", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    GObjectCreator.world_daughter_template("box", None)     # the one-off template build is not per volume
+
+    # timings without tracemalloc (it slows every allocation down)
+    times = []
+    for _label, fn in scenario(args.volumes, args.edits):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for (label, fn), dt in zip(scenario(args.volumes, args.edits), times):
+        fn()
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - base
+        print(f"{label:<28}: {dt * 1000:8.1f} ms  {used / 2**20:7.2f} MiB retained")
+    tracemalloc.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Lazily opened .ctproj archives: sections not opened yet must survive the
+project file being rewritten (autosave, export), and a section that cannot be
+read must stay pending.
+
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Classes.GateObject import GateObject
+from Classes.IO.edit_journal import EditJournal, fold_records
+from Classes.IO.project_archive import ProjectArchive, save_project_document, write_project_archive
+from Classes.IO.project_io import ProjectSnapshot, load_project_tree
+
+PROJECT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "project.json")
+
+
+def _child(obj, name):
+    return next(d for d in obj.daughters if d.get_name() == name)
+
+
+def _edit_physics(root):
+    physics = _child(root, "physics")
+    param = physics.get_parameters_by_label("Physics List")[0]
+    param.default_value_list = ["QGSP_BIC_EMZ"]
+    return physics, param
+
+
+def test_unopened_sections_survive_autosave(tmp_path):
+    with open(PROJECT, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    path = str(tmp_path / "project.ctproj")
+    write_project_archive(path, document)
+
+    expected_root = load_project_tree(document)
+    _edit_physics(expected_root)
+    expected = ProjectSnapshot().build(expected_root)
+
+    # as CTCommanderManager.import_json / autosave: one edit, then the file is rewritten
+    root = load_project_tree(ProjectArchive(path))
+    journal = EditJournal()
+    journal.attach(path)
+    journal.set_parameter(*_edit_physics(root))
+    assert journal.compact(lambda project, records: fold_records(project, records),
+                           lambda data: save_project_document(path, data)) is not None
+    assert journal.wait() is None
+    journal.close()
+
+    assert [d.get_name() for d in root.daughters if d.is_deferred()]    # still unopened when the file changed
+    for section in root.daughters:
+        section.load()
+    assert ProjectSnapshot().build(root) == expected
+    assert ProjectSnapshot().build(load_project_tree(ProjectArchive(path))) == expected
+
+
+def test_repeated_autosaves_of_a_lazily_opened_archive(tmp_path):
+    with open(PROJECT, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    path = str(tmp_path / "project.ctproj")
+    write_project_archive(path, document)
+
+    expected_root = load_project_tree(document)
+    _edit_physics(expected_root)
+    _child(_child(expected_root, "world"), "gdgdfgdfg").get_parameters_by_label("X Length")[0].default_value_list = [42]
+    expected = ProjectSnapshot().build(expected_root)
+
+    root = load_project_tree(ProjectArchive(path))
+    journal = EditJournal()
+    journal.attach(path)
+
+    def autosave():
+        journal.compact(lambda project, records: fold_records(project, records),
+                        lambda data: save_project_document(path, data))
+        assert journal.wait() is None
+
+    journal.set_parameter(*_edit_physics(root))
+    autosave()
+    # a section opened between two autosaves, edited, and saved over the file it was read from
+    volume = _child(_child(root, "world"), "gdgdfgdfg")
+    param = volume.get_parameters_by_label("X Length")[0]
+    param.default_value_list = [42]
+    journal.set_parameter(volume, param)
+    autosave()
+    journal.close()
+
+    for section in root.daughters:
+        section.load()
+    assert ProjectSnapshot().build(root) == expected
+    reopened = ProjectArchive(path)
+    assert reopened.head["journal_seq"] == 2
+    assert ProjectSnapshot().build(load_project_tree(reopened)) == expected
+
+
+def test_failed_deferred_load_stays_pending():
+    obj = GateObject("world", "/world", "world", [])
+    calls = []
+
+    def loader(o):
+        calls.append(o)
+        if len(calls) == 1:
+            raise ValueError("section 'world' is damaged")
+        o.add_daughter(GateObject("box", "/box", "world", []))
+
+    obj.defer(loader, has_daughters=True)
+    with pytest.raises(ValueError):
+        obj.daughters
+    assert obj.is_deferred() and obj.has_daughters()
+    assert [d.get_name() for d in obj.daughters] == ["box"]     # retried on the next use
+    assert not obj.is_deferred()